@@ -0,0 +1,153 @@
+# core/ack_reader.py
+#
+# 부트로더 ACK/NACK 대기.
+#
+# 기존 _wait_ack은 time.time() 마감 안에서 ser.read(1)을 반복했다. 한 바이트당
+# syscall 하나, 대기 단위는 포트 timeout(0.2~0.5s)이고, NACK(0x1F)은 노이즈처럼
+# 무시해 타임아웃까지 기다렸다. 실패 프레임 하나가 재시도까지 0.8~1.5s를 먹는다.
+#
+# 여기서는 tty fd를 poll/select로 기다리고(time.monotonic 마감), 바이트가
+# 오면 즉시 판정한다:
+#   ACK  → ACK_OK,  NACK → ACK_NACK (바로 반환), 그 외 바이트 → 무시하고 계속
+# ACK 뒤에 바로 응답 데이터(Get ID의 N+PID, Read Memory 데이터)가 이어지므로
+# 한 번에 1바이트만 읽어 뒤 바이트를 소비하지 않는다.
+#
+# fd를 못 얻는 포트(비 POSIX 등)는 ser.read(1) 루프로 폴백한다.
+#
+# wait(cancel=CancelToken)은 토큰의 pipe fd도 함께 기다려 cancel() 즉시
+# ACK_CANCELLED를 돌려준다 (core/cancel.py). erase처럼 한 번의 대기가 긴 곳용.
+#
+# read_into는 Read Memory 데이터를 호출자 버퍼에 바로 받는다 (core/readout.py).
+import os
+import select
+import time
+from typing import Optional
+
+ACK_BYTE  = 0x79
+NACK_BYTE = 0x1F
+
+ACK_OK      = "ack"
+ACK_NACK    = "nack"
+ACK_TIMEOUT = "timeout"
+ACK_CANCELLED = "cancelled"
+
+_CANCELLED = -1   # _read1: 토큰이 켜짐
+
+
+class AckReader:
+    """한 시리얼 포트에 묶인 ACK/NACK 대기기."""
+
+    def __init__(self, ser):
+        self._ser = ser
+        try:
+            self._fd: Optional[int] = ser.fileno()
+        except Exception:
+            self._fd = None
+        self._poll = None
+        if self._fd is not None and hasattr(select, "poll"):
+            self._poll = select.poll()
+            self._poll.register(self._fd, select.POLLIN)
+        self.last = ACK_TIMEOUT   # 마지막 wait 결과 (로그용)
+
+    def _readable(self, timeout_s: float, cancel_fd: Optional[int] = None) -> bool:
+        if cancel_fd is None and self._poll is not None:
+            return bool(self._poll.poll(max(0, int(timeout_s * 1000 + 0.999))))
+        fds = [self._fd] if cancel_fd is None else [self._fd, cancel_fd]
+        r, _, _ = select.select(fds, [], [], max(0.0, timeout_s))
+        return bool(r)
+
+    def _read1(self, deadline: float, cancel=None) -> Optional[int]:
+        """마감까지 1바이트. 없으면 None, 토큰이 켜지면 _CANCELLED."""
+        if self._fd is None:
+            while time.monotonic() < deadline:
+                if cancel is not None and cancel.cancelled:
+                    return _CANCELLED
+                b = self._ser.read(1)
+                if b:
+                    return b[0]
+            return None
+        cancel_fd = cancel.fileno() if cancel is not None else None
+        while True:
+            if cancel is not None and cancel.cancelled:
+                return _CANCELLED
+            remain = deadline - time.monotonic()
+            if remain <= 0:
+                return None
+            if not self._readable(remain, cancel_fd):
+                continue
+            if cancel is not None and cancel.cancelled:
+                return _CANCELLED   # 깨운 것이 토큰 pipe일 수 있다 — tty read 전에 확인
+            try:
+                b = os.read(self._fd, 1)
+            except BlockingIOError:
+                continue
+            if b:
+                return b[0]
+            # readable인데 0바이트 = 장치 분리
+            raise OSError("serial device disconnected")
+
+    def wait(self, timeout_s: float, cancel=None) -> str:
+        """ACK_OK / ACK_NACK / ACK_TIMEOUT (cancel을 주면 ACK_CANCELLED도)."""
+        deadline = time.monotonic() + timeout_s
+        while time.monotonic() < deadline:
+            b = self._read1(deadline, cancel)
+            if b is None:
+                break
+            if b == _CANCELLED:
+                self.last = ACK_CANCELLED
+                return ACK_CANCELLED
+            if b == ACK_BYTE:
+                self.last = ACK_OK
+                return ACK_OK
+            if b == NACK_BYTE:
+                self.last = ACK_NACK
+                return ACK_NACK
+            # 노이즈: 무시
+        self.last = ACK_TIMEOUT
+        return ACK_TIMEOUT
+
+    def wait_ack(self, timeout_s: float) -> bool:
+        """ACK면 True. NACK은 즉시 False, 타임아웃도 False (구분은 self.last)."""
+        return self.wait(timeout_s) == ACK_OK
+
+    def read_exact(self, n: int, timeout_s: float) -> bytes:
+        """마감까지 최대 n바이트. n보다 더 읽지 않는다."""
+        if self._fd is None:
+            return self._ser.read(n)
+        deadline = time.monotonic() + timeout_s
+        out = bytearray()
+        while len(out) < n:
+            remain = deadline - time.monotonic()
+            if remain <= 0 or not self._readable(remain):
+                break
+            try:
+                chunk = os.read(self._fd, n - len(out))
+            except BlockingIOError:
+                continue
+            if not chunk:
+                raise OSError("serial device disconnected")
+            out += chunk
+        return bytes(out)
+
+    def read_into(self, view: memoryview, timeout_s: float) -> int:
+        """read_exact의 복사 없는 버전: 마감까지 view를 채운다. 읽은 바이트 수."""
+        n = len(view)
+        got = 0
+        if self._fd is None:
+            deadline = time.monotonic() + timeout_s
+            while got < n and time.monotonic() < deadline:
+                got += self._ser.readinto(view[got:]) or 0
+            return got
+        deadline = time.monotonic() + timeout_s
+        while got < n:
+            remain = deadline - time.monotonic()
+            if remain <= 0 or not self._readable(remain):
+                break
+            try:
+                k = os.readv(self._fd, [view[got:]])
+            except BlockingIOError:
+                continue
+            if not k:
+                raise OSError("serial device disconnected")
+            got += k
+        return got
@@ -0,0 +1,111 @@
+# core/baud.py
+#
+# 부트로더 baud rate 협상.
+#
+# STM32 ROM 부트로더는 리셋 후 처음 받은 0x7F의 비트 폭으로 baud를 잡는다
+# (autobaud). 따라서 115200 고정일 이유가 없지만, 한 번 잡힌 baud는 다음
+# 리셋 전까지 바뀌지 않는다. 후보 baud가 실패하면 반드시 부트로더를 다시
+# 리셋(BOOT0=1 + NRST 펄스)한 뒤 다음 후보로 내려가야 한다.
+#
+# 각 후보는 SYNC(0x7F)/ACK 뒤에 짧은 테스트 트랜잭션(Get ID)까지 통과해야
+# 채택한다. 성공한 baud는 포트별로 캐시 파일에 기억해 다음 협상 때 먼저 시도한다.
+# 캐시 갱신(읽기-수정-쓰기)은 모듈 락 안에서 한다 — 멀티 타깃/데몬은 포트마다
+# 스레드가 따로 협상한다. 임시 파일은 쓰기마다 새 이름(mkstemp)이라 다른
+# 프로세스와 겹쳐도 반쯤 쓴 파일로 교체되지 않는다.
+import json
+import os
+import tempfile
+import threading
+from typing import Callable, Dict, List, Optional, Sequence
+
+DEFAULT_BAUD    = 115200
+BAUD_AUTO       = 0       # "--baud auto": 후보 목록으로 협상
+BAUD_CANDIDATES = (921600, 460800, 230400, 115200)
+
+_cache_lock = threading.Lock()
+
+
+def parse_baud(text: str) -> int:
+    """'auto' → BAUD_AUTO, 숫자 → 그 baud. 잘못된 값은 ValueError."""
+    text = text.strip().lower()
+    if text == "auto":
+        return BAUD_AUTO
+    baud = int(text)
+    if baud <= 0:
+        raise ValueError(f"invalid baud: {text}")
+    return baud
+
+
+def _cache_path() -> str:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "firmware_uploader", "baud.json")
+
+
+def _load_cache() -> Dict[str, int]:
+    try:
+        with open(_cache_path(), "r") as f:
+            data = json.load(f)
+        return {str(k): int(v) for k, v in data.items()}
+    except Exception:
+        return {}
+
+
+def cached_baud(port: str) -> Optional[int]:
+    """port에서 마지막으로 성공한 baud. 없으면 None."""
+    return _load_cache().get(port)
+
+
+def remember_baud(port: str, baud: int) -> None:
+    """성공한 baud를 기록한다. 캐시 쓰기 실패는 무시 (협상 결과에 영향 없음)."""
+    with _cache_lock:
+        data = _load_cache()
+        if data.get(port) == baud:
+            return
+        data[port] = int(baud)
+        path = _cache_path()
+        tmp = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp = tempfile.mkstemp(prefix="baud.", suffix=".tmp",
+                                       dir=os.path.dirname(path))
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f, indent=2, sort_keys=True)
+            os.replace(tmp, path)
+        except OSError:
+            if tmp is not None:
+                try:
+                    os.unlink(tmp)
+                except OSError:
+                    pass
+
+
+def candidate_order(port: str, candidates: Sequence[int] = BAUD_CANDIDATES) -> List[int]:
+    """캐시된 baud를 맨 앞에 두고 나머지는 주어진(내림차순) 순서대로."""
+    order = list(candidates)
+    cached = cached_baud(port)
+    if cached in order:
+        order.remove(cached)
+        order.insert(0, cached)
+    return order
+
+
+def negotiate(port: str, try_rate: Callable[[int], bool],
+              reset: Optional[Callable[[], None]] = None,
+              candidates: Sequence[int] = BAUD_CANDIDATES) -> Optional[int]:
+    """
+    후보 baud를 순서대로 시도해 처음 성공한 baud를 반환 (전부 실패 시 None).
+      try_rate(baud) : 포트를 baud로 바꾸고 SYNC + 테스트 트랜잭션 → 성공 여부
+      reset()        : 부트로더 재진입. 두 번째 후보부터 매 시도 전에 호출.
+                       None이면 autobaud를 다시 받을 수 없으므로 첫 후보만 시도.
+    첫 시도는 호출 시점에 부트로더가 막 리셋된(아직 autobaud 전) 상태라고 가정한다.
+    """
+    order = candidate_order(port, candidates)
+    for i, baud in enumerate(order):
+        if i > 0:
+            if reset is None:
+                break
+            reset()
+        if try_rate(baud):
+            remember_baud(port, baud)
+            return baud
+    return None
@@ -0,0 +1,989 @@
+# core/bootloader.py
+#
+# STM32 시스템 부트로더(AN3155) 프로토콜 엔진. Qt 없음.
+#
+# 예전에는 같은 프로토콜이 GUI 워커(core/serial_communication.SerialWorker,
+# 모듈 로드 시 PySide6 import)와 headless_runner.BootloaderSerial에 두 벌
+# 있었다. 이제 둘 다 이 Bootloader 위의 얇은 어댑터다:
+#
+#   SerialWorker       Qt 시그널/슬롯 ↔ Bootloader (reporter → RingLog + flash_prog)
+#   BootloaderSerial   콘솔 reporter + stdin 스트림 + --resume 안내
+#
+# 라이브러리로 쓸 때:
+#
+#   from core.bootloader import flash_image
+#   ok, msg = flash_image("/dev/ttyS0", "app.bin")        # 이미 부트로더 모드인 타깃
+#
+#   for ev in iter_flash(Bootloader("/dev/ttyS0"), "app.bin"):   # 제너레이터 진행률
+#       ...
+#
+# import만으로는 장치를 열지 않고 Qt/pyserial도 부르지 않는다. pyserial은
+# 포트를 열 때(open_serial), GPIO/delta/스트림/준비 모듈은 그 기능을 쓸 때
+# 처음 import 한다.
+#
+# 전송로(transport)는 바꿔 끼울 수 있다: (port, baud, timeout) → pyserial과
+# 같은 메서드(write/flush/read/reset_input_buffer, timeout/baudrate 속성,
+# 가능하면 fileno)를 가진 객체를 돌려주는 함수. 기본은 8E1 pyserial.
+#
+# 진행 출력은 Reporter(info/ok/warn/progress/progress_end) 콜백으로 받거나,
+# iter_flash()로 FlashEvent를 차례로 받는다.
+#
+# readout()은 플래시 범위를 파일로 덤프하고 (core/readout.py), flash(backup=...)는
+# erase 전에 지워질 범위를 같은 방식으로 먼저 떠 둔다 (롤백 이미지).
+#
+# flash는 write 뒤에 verify 단계를 둔다 (core/verify.py, 기본 fast): 결과와
+# 시간은 last_flash["verify"]. 불일치면 flash 실패.
+import os
+import queue
+import struct
+import threading
+import time
+from typing import Callable, Iterator, NamedTuple, Optional, Sequence, Tuple
+
+from core.ack_reader import ACK_CANCELLED, ACK_NACK, ACK_OK, ACK_TIMEOUT, AckReader
+from core.baud import DEFAULT_BAUD
+from core.cancel import CancelToken, Cancelled
+from core.flash_layout import (ERASE_AUTO, ERASE_MASS, ERASE_MODES, EXT_ERASE_MAX_PAGES,
+                               MASS_ERASE_PAYLOAD, ErasePlan, ext_erase_payload,
+                               layout_for_pid, plan_erase_spans)
+from core.frame_engine import WriteFrameEngine
+from core.journal import FlashJournal
+from core.metrics import FlashMetrics
+from core.verify import VERIFY_FAST, VERIFY_FULL, VERIFY_MODES, VERIFY_OFF
+
+# ---- 부트로더 프로토콜 상수 ----
+CMD_ACK       = b"\x79"
+CMD_NACK      = b"\x1F"
+CMD_SYNC      = b"\x7F"
+CMD_GET       = b"\x00\xFF"
+CMD_GET_ID    = b"\x02\xFD"
+CMD_READ      = b"\x11\xEE"
+CMD_EXT_ERASE = b"\x44\xBB"
+CMD_WRITE     = b"\x31\xCE"
+CMD_GET_CHECKSUM = b"\xA1\x5E"   # 일부 부트로더만 (Get 목록으로 확인)
+
+DEFAULT_BASE_ADDR = 0x08000000
+ERASE_TIMEOUT_S   = 20.0
+
+# flash()가 (False, FLASH_CANCELLED)를 돌려주면 cancel()로 멈춘 것 (실패와 구분)
+FLASH_CANCELLED = "cancelled"
+
+
+def open_serial(port: str, baud: int, timeout: float):
+    """기본 전송로: 8E1 pyserial 포트 (pyserial은 여기서 처음 import)."""
+    import serial
+    ser = serial.Serial(
+        port=port,
+        baudrate=baud,
+        timeout=timeout,               # per-read
+        bytesize=serial.EIGHTBITS,
+        parity=serial.PARITY_EVEN,     # 8E1
+        stopbits=serial.STOPBITS_ONE,
+        xonxoff=False, rtscts=False, dsrdtr=False,
+    )
+    try:
+        ser.setDTR(False); ser.setRTS(False)
+        ser.reset_input_buffer(); ser.reset_output_buffer()
+    except Exception:
+        pass
+    return ser
+
+
+Transport = Callable[[str, int, float], object]
+
+
+class Reporter:
+    """진행 출력 대상. 기본 구현은 아무것도 하지 않는다 (조용한 라이브러리 호출)."""
+
+    def info(self, msg: str) -> None:
+        pass
+
+    def ok(self, msg: str) -> None:
+        self.info(msg)
+
+    def warn(self, msg: str) -> None:
+        self.info(msg)
+
+    def progress(self, label: str, done: int, total: int) -> None:
+        """total=0이면 전체 크기를 모름 (스트림)."""
+
+    def progress_end(self) -> None:
+        pass
+
+
+class Bootloader:
+    """포트 하나의 부트로더 세션. 스레드 하나에서만 쓴다 (cancel()만 예외)."""
+
+    def __init__(self, port: str, baud: int = DEFAULT_BAUD, timeout: float = 0.2,
+                 erase_mode: str = ERASE_AUTO, skip_erased: bool = True,
+                 delta: bool = False, pipelined: bool = False,
+                 reporter: Optional[Reporter] = None, transport: Transport = open_serial,
+                 verify: str = VERIFY_FAST, cancel_token: Optional[CancelToken] = None):
+        if erase_mode not in ERASE_MODES:
+            raise ValueError(f"unknown erase mode: {erase_mode}")
+        if verify not in VERIFY_MODES:
+            raise ValueError(f"unknown verify mode: {verify}")
+        self._port = port
+        self._baud = baud
+        self._timeout = timeout
+        self._erase_mode = erase_mode
+        self._skip_erased = skip_erased   # 0xFF 블록 생략/꼬리 trim
+        self._delta = delta               # readback 비교 후 바뀐 섹터만 flash
+        self._pipelined = pipelined       # write 세 프레임을 한 번에 송신 (frame_engine 참고)
+        self._verify = verify             # write 후 verify 모드 (core/verify.py)
+        self._commands: Optional[bytes] = None   # Get(0x00) 명령 목록 (포트 세션마다)
+        self._transport = transport
+        self._ser = None
+        self._acks = None
+        self._pins = None                 # enter_and_sync에 준 핀 맵 (취소 후 재진입용)
+        self._erasing = False             # EXT_ERASE ACK 대기 중
+        self.reporter = reporter or Reporter()
+        # 호출자가 토큰을 주면 그것을 쓴다 (flash_daemon: 작업 토큰 하나 = pipe 하나,
+        # 닫는 것도 호출자). 없으면 세션 수명 동안 하나를 만든다.
+        self.cancel_token = cancel_token or CancelToken()
+        self.last_flash: dict = {}        # 마지막 flash 통계 (요약/JSON 출력용)
+        self.last_readout: dict = {}      # 마지막 readout/backup 결과
+        # 단계 시간/ACK 왕복/재시도 (core/metrics.py). flash/readout 한 번마다 새 객체:
+        # 끝난 뒤 처음 기록하는 곳(_fresh_metrics)에서 바꾸므로 그 앞의 open/SYNC도
+        # 다음 flash 쪽에 들어간다. 어댑터는 self.metrics를 매번 다시 읽어야 한다.
+        self.metrics = FlashMetrics(port)
+        self._metrics_done = False
+
+    # ---------- 상태 ----------
+    @property
+    def port(self) -> str:
+        return self._port
+
+    @property
+    def baud(self) -> int:
+        return self._baud
+
+    @property
+    def erase_mode(self) -> str:
+        return self._erase_mode
+
+    @property
+    def verify_mode(self) -> str:
+        return self._verify
+
+    @property
+    def ser(self):
+        """열린 전송로 (없으면 None). 원시 명령을 보내는 어댑터용."""
+        return self._ser
+
+    @property
+    def is_open(self) -> bool:
+        return bool(self._ser and self._ser.is_open)
+
+    # ---------- 포트 ----------
+    def open(self) -> bool:
+        self._fresh_metrics()
+        if self.is_open:
+            return True
+        t0 = time.monotonic()
+        try:
+            self._ser = self._transport(self._port, self._baud, self._timeout)
+            self._acks = AckReader(self._ser)
+            time.sleep(0.03)
+            self.metrics.add_phase("port_open", time.monotonic() - t0)
+            return True
+        except Exception as e:
+            self.reporter.warn(f"[serial] open error: {e}")
+            self._ser = None
+            return False
+
+    def close(self) -> None:
+        try:
+            if self._ser and self._ser.is_open:
+                self._ser.close()
+        finally:
+            self._ser = None
+            self._commands = None
+
+    def cancel(self, reason: str = "cancelled by user") -> None:
+        """진행 중인 flash를 멈춘다. 어느 스레드에서 불러도 된다 (core/cancel.py)."""
+        self.cancel_token.cancel(reason)
+
+    def _fresh_metrics(self) -> None:
+        """직전 flash/readout이 끝났으면 새 FlashMetrics로 (합산이 세션 내내 쌓이지 않게)."""
+        if self._metrics_done:
+            self.metrics = FlashMetrics(self._port)
+            self._metrics_done = False
+
+    # ---------- 프로토콜 기본 ----------
+    def _wait_ack(self, timeout_s: float) -> bool:
+        """ACK면 True. NACK은 즉시 False, 노이즈는 무시 (core/ack_reader.py)."""
+        if not self.is_open:
+            return False
+        return self._acks.wait_ack(timeout_s)
+
+    def sync(self, window_s: float = 5.0) -> bool:
+        """window 동안 0x7F 반복 송신하며 ACK 대기."""
+        if not self.is_open:
+            return False
+        self._fresh_metrics()
+        t0 = time.monotonic()
+        deadline = t0 + window_s
+        with self.metrics.phase("sync"):
+            while time.monotonic() < deadline:
+                self.cancel_token.check()   # flash 중 재 SYNC도 취소 가능
+                self._ser.write(CMD_SYNC); self._ser.flush()
+                # 이미 sync된 부트로더는 0x7F를 모르는 명령으로 보고 NACK → 살아있음
+                if self._acks.wait(0.25) != ACK_TIMEOUT:
+                    self.metrics.note_sync(time.monotonic() - t0)
+                    return True
+                time.sleep(0.03)
+        return False
+
+    def enter_and_sync(self, pins=None, deadline_s: Optional[float] = None,
+                       log: Optional[Callable[[str], None]] = None) -> bool:
+        """
+        포트를 먼저 연 뒤 진입 시퀀스를 돌리고 NRST 해제 직후부터 SYNC
+        (core/entry.py). SYNC까지 되면 True. GPIO 실패는 OSError 그대로,
+        포트를 못 열거나 응답이 없으면 False (GPIO 시퀀스는 실행됨).
+        """
+        import core.control_gpio as gpio
+        from core.entry import ENTRY_DEADLINE_S, enter_and_sync
+
+        self._pins = pins
+        if not self.open():
+            gpio.run_sequence("enter", gpio.enter_bootloader_steps(), pins, log)
+            return False
+        with self.metrics.phase("enter"):
+            res = enter_and_sync(self._ser, self._acks, pins,
+                                 ENTRY_DEADLINE_S if deadline_s is None else deadline_s, log)
+        if not res.synced:
+            self.reporter.warn(f"no SYNC response after reset ({res.attempts} sent)")
+            return False
+        self._commands = res.commands   # 경계 확인에 쓴 Get 결과 (get_commands 캐시)
+        self.metrics.note_entry(res.ack_s)
+        self.reporter.info(f"NRST release → first ACK {res.ack_s * 1000:.1f}ms "
+                           f"({res.attempts} SYNC sent, sequence {res.seq.total_ms:.1f}ms)")
+        return True
+
+    def negotiate_baud(self, candidates: Optional[Sequence[int]] = None,
+                       reset: Optional[Callable[[], object]] = None) -> Optional[int]:
+        """
+        후보 baud를 순서대로 SYNC + Get ID로 확인해 처음 통과한 baud로 세션을 연다.
+        reset: 후보 사이 부트로더 재진입 함수 (autobaud는 리셋당 한 번뿐).
+        """
+        from core.baud import BAUD_CANDIDATES, negotiate
+
+        if not self.open():
+            return None
+
+        def try_rate(baud: int) -> bool:
+            self._ser.baudrate = baud
+            self._ser.reset_input_buffer()
+            self.reporter.info(f"Trying {baud} bps...")
+            # 이미 sync된 부트로더는 0x7F에 NACK을 주므로 판정은 Get ID로 한다.
+            self.sync(1.0)
+            return self.get_id() is not None
+
+        baud = negotiate(self._port, try_rate, reset, candidates or BAUD_CANDIDATES)
+        if baud is None:
+            self._ser.baudrate = self._baud
+            return None
+        self._baud = baud
+        return baud
+
+    def get_id(self) -> Optional[int]:
+        """Get ID(0x02) → PID. 실패 시 None."""
+        if not self.is_open:
+            return None
+        self._ser.reset_input_buffer()
+        self._ser.write(CMD_GET_ID); self._ser.flush()
+        if not self._wait_ack(0.8):
+            return None
+        n = self._acks.read_exact(1, 0.5)
+        if not n:
+            return None
+        pid = self._acks.read_exact(n[0] + 1, 0.5)
+        if len(pid) != n[0] + 1:
+            return None
+        if not self._wait_ack(0.8):
+            return None
+        return int.from_bytes(pid, "big")
+
+    def get_commands(self) -> bytes:
+        """Get(0x00) → 부트로더가 지원하는 명령 코드들 (세션마다 한 번). 실패 시 b""."""
+        if self._commands is not None or not self.is_open:
+            return self._commands or b""
+        self._commands = b""
+        self._ser.reset_input_buffer()
+        self._ser.write(CMD_GET); self._ser.flush()
+        if self._wait_ack(0.8):
+            n = self._acks.read_exact(1, 0.5)
+            if n:
+                body = self._acks.read_exact(n[0] + 1, 0.5)   # 버전 + 명령들
+                if len(body) == n[0] + 1 and self._wait_ack(0.8):
+                    self._commands = body[1:]
+        return self._commands
+
+    def get_checksum(self, addr: int, size: int) -> Optional[int]:
+        """
+        Get Checksum(0xA1): 타깃이 계산한 [addr, addr+size) CRC (STM32 CRC 유닛
+        기본값, core/verify.py). 명령이 없거나 실패하면 None.
+        """
+        from core.verify import CRC_INIT, CRC_POLY
+
+        if CMD_GET_CHECKSUM[0] not in self.get_commands():
+            return None
+        self._ser.write(CMD_GET_CHECKSUM); self._ser.flush()
+        ok = self._wait_ack(0.8)
+        for v in (addr, size, CRC_POLY, CRC_INIT):
+            if not ok:
+                break
+            b = struct.pack(">I", v)
+            self._ser.write(b + bytes([b[0] ^ b[1] ^ b[2] ^ b[3]])); self._ser.flush()
+            ok = self._wait_ack(0.8)
+        if ok:
+            r = self._acks.read_exact(5, 1.0)   # CRC 4B(BE) + XOR
+            if len(r) == 5 and r[0] ^ r[1] ^ r[2] ^ r[3] == r[4]:
+                return int.from_bytes(r[:4], "big")
+        # 도중에 끊겼으면 부트로더가 아직 인자 프레임을 기다리고 있을 수 있다.
+        # 명령 대기로 돌려놓지 못하면 None만 돌려주고 뒤의 readback이 읽기 실패로 끝난다.
+        time.sleep(0.05)
+        self._ser.reset_input_buffer()
+        if not self._resync():
+            self.reporter.warn("Get Checksum failed and bootloader did not resync")
+        return None
+
+    def _resync(self, tries: int = 8) -> bool:
+        """
+        세션 도중 프레임이 어긋난 뒤 명령 대기 상태로. 명령 대기 중인 부트로더는
+        0x7F에 NACK을 주고, 인자 프레임 도중이면 0x7F가 그 프레임을 채워 체크섬
+        불일치 NACK으로 끝난다 → NACK을 받을 때까지 한 바이트씩 보낸다.
+        """
+        for _ in range(tries):
+            self.cancel_token.check()
+            self._ser.write(CMD_SYNC); self._ser.flush()
+            if self._acks.wait(0.25) == ACK_NACK:
+                self._ser.reset_input_buffer()
+                return True
+        return False
+
+    def read_memory(self, addr: int, n: int) -> Optional[bytes]:
+        """Read Memory(0x11) n바이트(1..256). 1회 재시도, 실패 시 None."""
+        if not self.is_open:
+            return None
+        ab = struct.pack(">I", addr)
+        addr_frame = ab + bytes([ab[0] ^ ab[1] ^ ab[2] ^ ab[3]])
+        for _ in range(2):
+            self._ser.write(CMD_READ); self._ser.flush()
+            if self._wait_ack(0.8):
+                self._ser.write(addr_frame); self._ser.flush()
+                if self._wait_ack(0.8):
+                    self._ser.write(bytes([n - 1, (n - 1) ^ 0xFF])); self._ser.flush()
+                    if self._wait_ack(0.8):
+                        data = self._acks.read_exact(n, 0.5)
+                        if len(data) == n:
+                            return data
+            self._ser.reset_input_buffer()
+            time.sleep(0.05)
+        return None
+
+    # ---------- Readout: Read Memory 벌크 덤프 ----------
+    def readout(self, path: str, addr: int = DEFAULT_BASE_ADDR, size: Optional[int] = None,
+                resume: bool = False) -> Tuple[bool, str]:
+        """
+        [addr, addr+size)를 path로 덤프 (core/readout.py). size가 None이면 Get ID로
+        찾은 플래시 끝까지. resume=True면 같은 범위/PID의 중단된 덤프를 이어 읽는다.
+        """
+        self.last_readout = {}
+        self._fresh_metrics()
+        return self._guarded(self._readout, path, addr, size, resume)
+
+    def _readout(self, path: str, addr: int, size: Optional[int],
+                 resume: bool) -> Tuple[bool, str]:
+        if not self.open():
+            return False, "cannot open port"
+        pid = self._identify()
+        if size is None:
+            layout = layout_for_pid(pid)
+            if layout is None:
+                return False, "flash size unknown for this PID (give a size)"
+            if not layout.base <= addr < layout.end:
+                return False, (f"address 0x{addr:08X} outside {layout.name} flash "
+                               f"(0x{layout.base:08X}..0x{layout.end:08X})")
+            size = layout.end - addr
+        return self._dump(path, addr, size, pid, resume, "Reading")
+
+    def _dump(self, path: str, addr: int, size: int, pid: Optional[int], resume: bool,
+              label: str) -> Tuple[bool, str]:
+        """readout/backup 공통. 결과는 last_readout, 실패하면 resumable."""
+        from core.readout import ReadFrameEngine, ReadoutError, dump
+
+        out = self.reporter
+        out.info(f"{label}: 0x{addr:08X}..0x{addr + size:08X} ({size:,} bytes) → {path}")
+        self.last_readout = {"path": path, "addr": addr, "size": size, "bytes_read": 0}
+        engine = ReadFrameEngine(self._ser, self._acks, pipelined=self._pipelined)
+
+        def retry(a: int, why: str) -> None:
+            out.warn(f"{why} → retry read @0x{a:08X}")
+
+        try:
+            with self.metrics.phase("readout"):
+                res = dump(engine, path, addr, size, pid=pid, resume=resume,
+                           progress=lambda d, t: out.progress(label, d, t),
+                           check=self.cancel_token.check, on_retry=retry)
+        except ReadoutError as e:
+            out.progress_end()
+            self.last_readout.update(resumable=True, done=e.done)
+            return False, str(e)
+        except OSError as e:
+            out.progress_end()
+            return False, f"cannot write {path}: {e}"
+        out.progress_end()
+        if res.resumed_from:
+            out.info(f"{label}: resumed at +0x{res.resumed_from:X}")
+        rate = res.bytes_read / res.seconds if res.seconds else 0.0
+        out.ok(f"{label}: {res.bytes_read:,} bytes in {res.seconds:.2f}s "
+               f"({rate / 1024:.1f} KB/s" + (f", {res.retries} retries)" if res.retries else ")"))
+        self.last_readout.update(bytes_read=res.bytes_read, resumed_from=res.resumed_from,
+                                 retries=res.retries, seconds=round(res.seconds, 3))
+        return True, ""
+
+    def _try_ext_erase(self, payload: bytes, erase_timeout_s: float) -> bool:
+        self._ser.reset_input_buffer()
+        self._ser.write(CMD_EXT_ERASE); self._ser.flush()
+        if not self._wait_ack(0.8):
+            return False
+        self._ser.write(payload); self._ser.flush()
+        # erase는 배치당 수 초 — 취소를 기다리지 않도록 토큰 fd도 함께 대기
+        self._erasing = True
+        r = self._acks.wait(erase_timeout_s, cancel=self.cancel_token)
+        if r == ACK_CANCELLED:
+            raise Cancelled(self.cancel_token.reason)
+        self._erasing = False
+        return r == ACK_OK
+
+    def _erase(self, payload: bytes, erase_timeout_s: float) -> str:
+        """Extended Erase 한 번 (실패 시 re-SYNC 후 1회 재시도). 성공 "", 실패 메시지."""
+        self.cancel_token.check()
+        if self._try_ext_erase(payload, erase_timeout_s):
+            return ""
+        self.reporter.warn("EXT_ERASE failed → re-SYNC and retry")
+        if not self.sync(5.0):
+            return "Bootloader SYNC failed (no ACK)"
+        if not self._try_ext_erase(payload, erase_timeout_s):
+            return "Erase NACK/timeout"
+        return ""
+
+    def _write_retry(self, addr: int, send) -> bool:
+        """send()로 블록 한 번 + 실패 시 1회 재시도."""
+        for attempt in range(2):
+            if attempt:
+                self.metrics.note_retry(addr)
+                self.reporter.warn(f"{self._acks.last} → retry @0x{addr:08X}")
+            if send():
+                return True
+            # NACK이면 부트로더는 이미 명령 대기로 돌아왔으므로 바로 재시도
+            if self._acks.last != ACK_NACK:
+                time.sleep(0.05)
+            self._ser.reset_input_buffer()
+        return False
+
+    def _identify(self) -> Optional[int]:
+        with self.metrics.phase("get_id"):
+            pid = self.get_id()
+        if pid is None:
+            self.reporter.warn("GET_ID failed → SYNC then retry")
+            if self.sync(5.0):
+                with self.metrics.phase("get_id"):
+                    pid = self.get_id()
+        self.reporter.info(f"PID = {'unknown' if pid is None else f'0x{pid:03X}'}")
+        return pid
+
+    def _delta_progress(self, done: int, total: int) -> None:
+        """delta readback 진행 콜백. Read Memory 트랜잭션 사이라 여기서 취소해도 안전."""
+        self.cancel_token.check()
+        self.reporter.progress("Comparing", done, total)
+
+    # ---------- 취소 ----------
+    def _guarded(self, run, *args) -> Tuple[bool, str]:
+        """
+        flash 공통 틀: 포트 타임아웃은 원래 값으로 돌아오고, 취소되면 포트/타깃을
+        정해진 상태로 돌린다. 토큰은 들어올 때 지우지 않는다 — 호출 직전(마지막
+        단계 사이 확인 뒤)에 온 cancel도 첫 취소 지점에서 멈춰야 한다. 지난 실행의
+        cancel은 끝날 때 지운다.
+        """
+        self._erasing = False
+        try:
+            return run(*args)
+        except Cancelled as e:
+            self.reporter.progress_end()
+            self.reporter.warn(f"cancelled: {e}")
+            self._after_cancel()
+            return False, FLASH_CANCELLED
+        finally:
+            if self.is_open:
+                self._ser.timeout = self._timeout
+            # 이 실행에 대한 cancel은 여기까지 (다음 SYNC/협상/flash에 남지 않게)
+            self.cancel_token.reset()
+            self._metrics_done = True   # 이 실행의 계측은 여기까지 (어댑터가 읽고 내보냄)
+
+    def _after_cancel(self) -> None:
+        """
+        취소 뒤 포트/타깃을 정해진 상태로:
+          - 포트는 열린 채, 입력 버퍼 비움 (타임아웃은 _guarded가 복구)
+          - write/readback 사이 취소: 부트로더는 명령 대기 (핀 그대로:
+            FW_UPDATE HIGH, BOOT0 HIGH, NRST 해제)
+          - erase 도중 취소: 부트로더가 아직 erase 중이라 늦은 ACK가 다음 명령과
+            엉킨다 → 진입 시퀀스(BOOT0 HIGH + NRST 펄스) + SYNC로 새로 시작.
+            중단된 erase 배치는 저널에 안 남았으므로 resume 시 다시 지운다.
+        GPIO 실패는 last_flash["gpio_error"]에 남긴다.
+        """
+        if not self.is_open:
+            return
+        if self._erasing:
+            self._erasing = False
+            self.reporter.warn("cancel during erase → re-enter bootloader")
+            from core.entry import enter_and_sync
+            try:
+                res = enter_and_sync(self._ser, self._acks, self._pins, log=self.reporter.info)
+                if not res.synced:
+                    self.reporter.warn("no SYNC after cancel reset")
+            except OSError as e:
+                self.reporter.warn(f"reset after cancel failed: {e}")
+                self.last_flash["gpio_error"] = str(e)
+        try:
+            self._ser.reset_input_buffer()
+        except Exception:
+            pass
+
+    # ---------- Flash: erase → write (GO 생략) ----------
+    def flash(self, image_path: str, base_addr: int = DEFAULT_BASE_ADDR,
+              erase_timeout_s: float = ERASE_TIMEOUT_S,
+              resume: bool = False, backup: str = "") -> Tuple[bool, str]:
+        """
+        BIN/HEX/ELF 파일을 Erase + Write. (ok, 실패 사유)를 돌려준다.
+        resume=True면 포트 저널(core/journal.py)이 같은 이미지/타깃일 때 남은
+        섹터만 지우고 마지막 ACK 다음 블록부터 쓴다.
+        backup이 있으면 erase 전에 지워질 범위를 그 파일로 덤프한다 (_backup_span).
+        덤프가 실패하면 아무것도 지우지 않고 실패한다.
+        """
+        self.last_flash = {"image_bytes": 0, "written_bytes": 0}
+        self._fresh_metrics()
+        return self._guarded(self._flash, image_path, base_addr, erase_timeout_s, resume,
+                             backup)
+
+    @staticmethod
+    def _backup_span(plan: ErasePlan, pid: Optional[int], image) -> Optional[Tuple[int, int]]:
+        """
+        backup 범위: 플래시 시작부터 지워질 마지막 섹터 끝까지 (그대로 base 주소에
+        다시 구울 수 있는 연속 BIN). mass erase는 플래시 전체, 레이아웃을 모르면
+        이미지가 덮는 범위. 지울 것이 없으면 None.
+        """
+        layout = plan.layout or layout_for_pid(pid)
+        if layout is None:
+            return image.start, image.end - image.start
+        if plan.mass:
+            return layout.base, layout.size
+        if not plan.pages:
+            return None
+        start, size = layout.sector_span(max(plan.pages))
+        return layout.base, start + size - layout.base
+
+    def _flash(self, image_path: str, base_addr: int, erase_timeout_s: float,
+               resume: bool, backup: str = "") -> Tuple[bool, str]:
+        from core.prep import prepare_async, prepare_file
+
+        out = self.reporter
+        if not os.path.isfile(image_path):
+            return False, "BIN file not found"
+
+        # BIN/HEX/ELF → 세그먼트. erase 범위를 정하려면 주소가 먼저 필요하다.
+        # write 준비(plan/frame 표)는 plan_cache 적중이면 즉시, 아니면 erase
+        # 대기와 겹치도록 백그라운드로. delta는 비교 후 dirty 범위로 다시 준비.
+        try:
+            prep = prepare_file(image_path, base_addr, self._skip_erased)
+        except (ValueError, OSError) as e:
+            return False, f"cannot load image: {e}"
+        image = prep.image
+        out.info(f"Image: {image.describe()}" + (" (cached plan)" if prep.cached else ""))
+        self.last_flash["image_bytes"] = image.size
+        self.metrics.image_bytes = image.size
+
+        if not self.open():
+            return False, "cannot open port"
+        if (self._ser.timeout or 0) < 0.5:
+            self._ser.timeout = 0.5   # 읽기 타임아웃이 너무 짧으면 조금 늘림
+
+        # --- Erase plan (mass면 PID 생략, delta는 레이아웃 필요, resume은 PID로 타깃 확인) ---
+        self.cancel_token.check()
+        pid = None
+        identified = self._delta or self._erase_mode != ERASE_MASS or resume or bool(backup)
+        if identified:
+            pid = self._identify()
+        try:
+            if self._delta:
+                from core.delta import plan_delta
+                layout = layout_for_pid(pid)
+                if layout is None:
+                    raise ValueError("delta flash needs a known flash layout")
+                out.info("Delta: reading back current flash...")
+                with self.metrics.phase("delta"):
+                    dplan = plan_delta(image.data, image.start, layout, self.read_memory,
+                                       progress=self._delta_progress, segments=image.layout())
+                out.progress_end()
+                out.info(f"Delta: {dplan.describe()}")
+                plan = ErasePlan(layout, dplan.dirty)
+                prep = prepare_async(image, base_addr, self._skip_erased, dplan.dirty_spans())
+            else:
+                plan = plan_erase_spans(pid, image.spans(), self._erase_mode)
+        except Cancelled:
+            raise
+        except (ValueError, RuntimeError, OSError) as e:
+            return False, str(e)
+
+        # --- Resume 지점 ---
+        # delta는 매번 타깃과 비교해 계획이 달라지므로 저널을 쓰지 않는다
+        journal = None if self._delta else FlashJournal(self._port)
+        rp = None
+        if resume:
+            rp = journal.resume_point(prep.key, pid) if journal else None
+            if rp is None:
+                out.info("Resume: no matching journal (image/target differ) → full flash")
+            else:
+                at = "" if rp.last_acked is None else f", last ACK @0x{rp.last_acked:08X}"
+                out.info(f"Resume: erase {'done' if rp.erase_done else 'partial'}, "
+                         f"block {rp.next_block}{at}")
+        self.last_flash["resumed"] = rp is not None
+
+        # --- Backup (erase 전, 지워질 범위) ---
+        # 재개면 이미 일부 지워졌으므로 떠도 원래 이미지가 아니다. 덤프는 항상
+        # 처음부터: 같은 범위의 예전 사이드카는 다른 시점(다른 이미지)의 내용이다.
+        if backup:
+            span = None if rp is not None else self._backup_span(plan, pid, image)
+            if span is None:
+                out.info("Backup: skipped (" + ("resume" if rp is not None
+                                                else "nothing to erase") + ")")
+            else:
+                ok, msg = self._dump(backup, span[0], span[1], pid, False, "Backup")
+                if not ok:
+                    return False, f"backup failed: {msg}"
+                self.last_flash["backup"] = backup
+
+        # --- Erase ---
+        if rp is not None and rp.erase_done:
+            out.info("Erase: skipped (journal)")
+            self.last_flash["erase"] = "skipped (resume)"
+        else:
+            if rp is not None and not plan.mass:
+                done = set(rp.erased)
+                plan = ErasePlan(plan.layout, [p for p in plan.pages if p not in done])
+            out.info(f"Erase: {plan.describe()}...")
+            self.last_flash["erase"] = plan.describe()
+            if journal:
+                journal.begin(prep.key, pid, None if plan.mass else plan.pages,
+                              erased=rp.erased if rp else ())
+            with self.metrics.phase("erase"):
+                for n, payload in enumerate(plan.payloads()):
+                    err = self._erase(payload, erase_timeout_s)
+                    if err:
+                        return False, err
+                    if journal and not plan.mass:
+                        journal.erased(plan.pages[n * EXT_ERASE_MAX_PAGES:(n + 1) * EXT_ERASE_MAX_PAGES])
+            if journal:
+                journal.erase_complete()
+            out.ok("Erase OK")
+
+        # --- Write (256B, 블록당 1회 재시도, 0xFF 생략) ---
+        t_wait = time.monotonic()
+        try:
+            with self.metrics.phase("prep_wait"):
+                prepared = prep.result()
+        except Exception as e:
+            return False, f"image prep failed: {e}"
+        out.info(f"Prep ready ({prepared.prep_s:.3f}s in background, "
+                 f"waited {time.monotonic() - t_wait:.3f}s after erase)")
+        fw, wplan, table = prepared.fw, prepared.plan, prepared.table
+        out.info(f"Write plan: {wplan.describe()}")
+        to_write = wplan.write_bytes
+        first = rp.next_block if rp is not None and rp.next_block <= len(wplan.blocks) else 0
+        written = sum(length for _a, _o, length in wplan.blocks[:first])
+
+        # 프레임 헤더/checksum은 준비 단계에서 일괄 계산됐고,
+        # 루프는 프레임 버퍼 재사용 + memoryview 블록으로 송신만 한다
+        engine = WriteFrameEngine(self._ser, self._wait_ack, pipelined=self._pipelined,
+                                  metrics=self.metrics)
+        fw_view = memoryview(fw)
+        cancel = self.cancel_token
+
+        # 저널: 실패/예외로 빠져나가면 next_block = 실패한 블록 (그 앞은 모두 ACK)
+        next_block = first
+        last_acked = wplan.blocks[first - 1].addr if first else None
+        if journal:
+            journal.writing()
+        try:
+            with self.metrics.phase("write"):
+                for i in range(first, len(wplan.blocks)):
+                    if cancel.cancelled:   # 프레임 사이에서만 (core/cancel.py)
+                        raise Cancelled(cancel.reason)
+                    addr, off, length = wplan.blocks[i]
+                    block = fw_view[off:off + length]
+                    if not self._write_retry(addr, lambda: engine.write_prepared(table, i, block)):
+                        out.progress_end()
+                        self.last_flash["resumable"] = journal is not None
+                        return False, f"write block failed @0x{addr:08X}"
+                    next_block, last_acked = i + 1, addr
+                    written += length
+                    self.last_flash["written_bytes"] = written
+                    self.metrics.written_bytes = written
+                    out.progress("Writing", written, to_write)
+        finally:
+            if journal:
+                if next_block >= len(wplan.blocks):
+                    journal.clear()
+                else:
+                    journal.interrupted(next_block, last_acked)
+
+        out.progress_end()
+        out.info(f"Skipped {wplan.skipped_frames} frames / {wplan.skipped_bytes:,} bytes")
+        self.last_flash.update(skipped_bytes=wplan.skipped_bytes,
+                               skipped_frames=wplan.skipped_frames)
+        self.metrics.skipped_bytes = wplan.skipped_bytes
+        bps = self.metrics.bytes_per_s
+        if bps:
+            out.info(f"Write {written:,} bytes in {self.metrics.phases['write']:.2f}s "
+                     f"({bps / 1024:.1f} KB/s)")
+
+        # --- Verify (readback / 섹터 CRC) ---
+        if self._verify != VERIFY_OFF:
+            err = self._verify_image(image, plan.layout or layout_for_pid(pid),
+                                     can_identify=not identified)
+            if err:
+                return False, err
+        return True, ""
+
+    def _verify_image(self, image, layout, can_identify: bool = False) -> str:
+        """
+        write 뒤 image 전체를 타깃과 비교. 결과는 last_flash["verify"]. 성공 "".
+        fast인데 부트로더에 Get Checksum(0xA1)이 없으면 full readback으로 돌리고
+        모드에 그 사실을 남긴다. 섹터 레이아웃은 CRC를 쓸 때만 필요하므로 아직
+        Get ID를 안 했으면(can_identify) 그때 한다.
+        """
+        from core.readout import ReadFrameEngine, ReadoutError
+        from core.verify import verify
+
+        out = self.reporter
+        mode = label = self._verify
+        if mode == VERIFY_FAST:
+            if CMD_GET_CHECKSUM[0] not in self.get_commands():
+                mode, label = VERIFY_FULL, f"{VERIFY_FULL} (0xA1 unsupported)"
+                out.warn("Verify: bootloader has no Get Checksum (0xA1) → full readback")
+            elif layout is None and can_identify:
+                layout = layout_for_pid(self._identify())
+        out.info(f"Verify ({label})...")
+        engine = ReadFrameEngine(self._ser, self._acks, pipelined=self._pipelined)
+
+        def retry(a: int, why: str) -> None:
+            out.warn(f"{why} → retry read @0x{a:08X}")
+
+        try:
+            with self.metrics.phase("verify"):
+                res = verify(engine, image.data, image.layout(), mode, layout=layout,
+                             crc_fn=self.get_checksum if mode == VERIFY_FAST else None,
+                             progress=lambda d, t: out.progress("Verifying", d, t),
+                             check=self.cancel_token.check, on_retry=retry)
+        except ReadoutError as e:
+            out.progress_end()
+            self.last_flash["verify"] = {"mode": label, "ok": False, "error": str(e)}
+            return f"verify: {e}"
+        out.progress_end()
+        res = res._replace(mode=label)
+        self.last_flash["verify"] = res.to_dict()
+        if not res.ok:
+            return f"verify failed: {res.describe()}"
+        out.ok(f"Verify OK: {res.describe()}")
+        return ""
+
+    # ---------- 스트림 flash (파이프/stdin) ----------
+    def _stream_erase(self, pages, erase_timeout_s: float) -> bool:
+        with self.metrics.phase("erase"):
+            return not self._erase(ext_erase_payload(pages), erase_timeout_s)
+
+    def flash_stream(self, stream, base_addr: int = DEFAULT_BASE_ADDR,
+                     erase_timeout_s: float = ERASE_TIMEOUT_S) -> Tuple[bool, str]:
+        """
+        파이프/stdin BIN을 읽으면서 flash (core/stream.py). 메모리는 블록 버퍼
+        하나뿐. 섹터는 그 섹터에 처음 쓰기 직전에 지운다 (레이아웃을 모르거나
+        mass erase 모드면 시작 전에 mass erase). 전체 크기를 모르므로 진행률은
+        total=0으로 바이트 수만 알린다.
+        """
+        self.last_flash = {"image_bytes": 0, "written_bytes": 0}
+        if self._delta:
+            return False, "delta flash needs a seekable image file"
+        self._fresh_metrics()
+        return self._guarded(self._flash_stream, stream, base_addr, erase_timeout_s)
+
+    def _flash_stream(self, stream, base_addr: int, erase_timeout_s: float) -> Tuple[bool, str]:
+        from core.stream import BlockStream, LazyEraser
+        from core.write_plan import trim_erased
+
+        out = self.reporter
+        if not self.open():
+            return False, "cannot open port"
+        if (self._ser.timeout or 0) < 0.5:
+            self._ser.timeout = 0.5
+
+        layout = None
+        if self._erase_mode != ERASE_MASS:
+            layout = layout_for_pid(self._identify())
+        if layout is None:
+            out.info("Erase: mass erase...")
+            self.last_flash["erase"] = "mass erase"
+            with self.metrics.phase("erase"):
+                err = self._erase(MASS_ERASE_PAYLOAD, erase_timeout_s)
+            if err:
+                return False, err
+            out.ok("Erase OK")
+            eraser = None
+        else:
+            out.info(f"Erase: {layout.name} sectors on demand while streaming")
+            eraser = LazyEraser(layout, lambda pages: self._stream_erase(pages, erase_timeout_s))
+
+        engine = WriteFrameEngine(self._ser, self._wait_ack, pipelined=self._pipelined,
+                                  metrics=self.metrics)
+        blocks = BlockStream(stream, base_addr)
+        cancel = self.cancel_token
+        written = skipped = 0
+        # write 시간 = 루프 시간 - 루프 안의 erase 시간
+        t_loop = time.monotonic()
+        erase_before = self.metrics.phases.get("erase", 0.0)
+        try:
+            for addr, data in blocks:
+                if cancel.cancelled:
+                    raise Cancelled(cancel.reason)
+                # 0xFF 블록도 그 섹터는 지워야 한다 (이전 내용이 남지 않게)
+                if eraser is not None:
+                    bad = eraser.ensure(addr, len(data))
+                    if bad is not None:
+                        raise RuntimeError(f"Erase NACK/timeout (page {bad})")
+                length = trim_erased(data) if self._skip_erased else len(data)
+                skipped += len(data) - length
+                if length == 0:
+                    continue
+                block = data[:length]
+                if not self._write_retry(addr, lambda: engine.write_block(addr, block)):
+                    raise RuntimeError(f"write block failed @0x{addr:08X}")
+                written += length
+                self.last_flash["written_bytes"] = written
+                self.metrics.written_bytes = written
+                out.progress("Streaming", written, 0)
+        except Cancelled:
+            raise
+        except (RuntimeError, ValueError, OSError) as e:
+            out.progress_end()
+            self.last_flash["image_bytes"] = blocks.read_bytes
+            return False, str(e)
+        finally:
+            self.metrics.add_phase("write", time.monotonic() - t_loop
+                                   - (self.metrics.phases.get("erase", 0.0) - erase_before))
+            if eraser is not None:
+                self.last_flash["erase"] = (f"sector erase {layout.name}: "
+                                            f"{len(eraser.erased)} pages on demand")
+
+        out.progress_end()
+        if blocks.read_bytes == 0:
+            return False, "BIN is empty"
+        self.last_flash.update(image_bytes=blocks.read_bytes, skipped_bytes=skipped)
+        self.metrics.image_bytes = blocks.read_bytes
+        self.metrics.skipped_bytes = skipped
+        out.info(f"Streamed {blocks.read_bytes:,} bytes, skipped {skipped:,} bytes")
+        if self._verify != VERIFY_OFF:
+            # 스트림은 이미지를 남기지 않으므로 비교할 원본이 없다
+            out.info("Verify: skipped (stream)")
+            self.last_flash["verify"] = {"mode": self._verify, "ok": None,
+                                         "skipped": "stream"}
+        return True, ""
+
+
+# ---------------- 제너레이터 진행률 ----------------
+
+class FlashEvent(NamedTuple):
+    """
+    iter_flash가 내는 이벤트.
+      kind  "info" / "ok" / "warn" / "progress" / "progress_end" / "done"
+      text  메시지 (progress는 label, done이면 실패 사유)
+    """
+    kind: str
+    text: str = ""
+    done: int = 0
+    total: int = 0
+    ok: Optional[bool] = None
+
+
+class _QueueReporter(Reporter):
+    def __init__(self, q: "queue.Queue[FlashEvent]"):
+        self._q = q
+
+    def info(self, msg: str) -> None:
+        self._q.put(FlashEvent("info", msg))
+
+    def ok(self, msg: str) -> None:
+        self._q.put(FlashEvent("ok", msg))
+
+    def warn(self, msg: str) -> None:
+        self._q.put(FlashEvent("warn", msg))
+
+    def progress(self, label: str, done: int, total: int) -> None:
+        self._q.put(FlashEvent("progress", label, done, total))
+
+    def progress_end(self) -> None:
+        self._q.put(FlashEvent("progress_end"))
+
+
+def iter_flash(bl: Bootloader, image_path: str, **flash_kw) -> Iterator[FlashEvent]:
+    """
+    bl.flash를 스레드에서 돌리며 FlashEvent를 차례로 낸다. 마지막은
+    FlashEvent("done", msg, ok=...). 도중에 제너레이터를 닫으면(break 등)
+    flash를 취소하고 끝날 때까지 기다린다.
+    """
+    q: "queue.Queue[FlashEvent]" = queue.Queue()
+    saved = bl.reporter
+    bl.reporter = _QueueReporter(q)
+
+    def run():
+        ok, msg = False, "internal error"
+        try:
+            ok, msg = bl.flash(image_path, **flash_kw)
+        finally:
+            q.put(FlashEvent("done", msg, ok=ok))
+
+    t = threading.Thread(target=run, name="flash", daemon=True)
+    t.start()
+    try:
+        while True:
+            ev = q.get()
+            yield ev
+            if ev.kind == "done":
+                return
+    finally:
+        if t.is_alive():
+            bl.cancel("iterator closed")
+            t.join()
+        bl.reporter = saved
+
+
+# ---------------- 한 줄 사용 ----------------
+
+def flash_image(port: str, image_path: str, *, baud: int = DEFAULT_BAUD,
+                base_addr: int = DEFAULT_BASE_ADDR, erase_timeout_s: float = ERASE_TIMEOUT_S,
+                reporter: Optional[Reporter] = None, transport: Transport = open_serial,
+                sync_window_s: float = 5.0, **opts) -> Tuple[bool, str]:
+    """
+    이미 부트로더 모드인 타깃 하나를 SYNC → flash 하고 포트를 닫는다.
+    GPIO(진입/종료 시퀀스)는 건드리지 않는다. opts는 Bootloader 인자
+    (erase_mode, skip_erased, delta, pipelined, verify).
+    """
+    bl = Bootloader(port, baud, reporter=reporter, transport=transport, **opts)
+    try:
+        if not bl.open():
+            return False, "cannot open port"
+        if not bl.sync(sync_window_s):
+            return False, "Bootloader SYNC failed (no ACK)"
+        return bl.flash(image_path, base_addr, erase_timeout_s)
+    finally:
+        bl.close()
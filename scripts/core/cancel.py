@@ -0,0 +1,92 @@
+# core/cancel.py
+#
+# flash 취소 토큰.
+#
+# 워커의 flash 루프는 QThread 안에서 블로킹으로 돌기 때문에 큐 연결 시그널로는
+# 멈출 수 없다 (루프가 끝나야 다음 슬롯이 실행된다). 그래서 GUI 스레드가 워커
+# 객체의 토큰을 직접 건드린다: threading.Event 하나 + 깨우기용 pipe.
+#
+#   프레임 사이   write 루프는 블록마다 cancelled를 본다. 프레임 도중(CMD ACK 후
+#                 ADDR 대기 등)에는 멈추지 않는다 — 부트로더가 남은 바이트를
+#                 기다리는 상태로 남아 다음 명령이 주소/데이터로 먹힌다.
+#                 따라서 취소 지연은 진행 중인 프레임 하나의 남은 시간 이하다.
+#   긴 대기       erase ACK(최대 수십 초)처럼 한 번의 대기가 긴 곳은
+#                 AckReader.wait(cancel=...)가 pipe fd도 함께 poll 하므로 cancel()
+#                 즉시 깨어난다. 부트로더는 erase를 계속하므로 호출자가 타깃을
+#                 리셋해 상태를 정한다 (core/bootloader.Bootloader._after_cancel).
+#
+# close()는 다른 스레드의 cancel()과 겹칠 수 있다 (데몬: 작업이 끝나는 중에 온
+# 클라이언트 cancel). fd를 None으로 바꾸는 것과 닫는 것을 cancel()의 write와 같은
+# 락 안에서 해, 닫힌 뒤 재사용된 fd 번호(다른 포트의 tty 등)에 쓰는 일이 없게 한다.
+import os
+import threading
+from typing import Optional
+
+
+class Cancelled(RuntimeError):
+    """취소 토큰이 켜진 상태에서 취소 지점에 도달함."""
+
+
+class CancelToken:
+    """스레드 간 취소 플래그. cancel()은 어느 스레드에서 불러도 된다."""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()   # _wfd 쓰기 ↔ close()
+        self.reason = ""
+        self._rfd: Optional[int] = None
+        self._wfd: Optional[int] = None
+        try:
+            self._rfd, self._wfd = os.pipe()
+            os.set_blocking(self._rfd, False)
+            os.set_blocking(self._wfd, False)
+        except (OSError, AttributeError):
+            self._rfd = self._wfd = None   # poll 없는 플랫폼: 프레임 사이 확인만
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str = "cancelled by user") -> None:
+        if self._event.is_set():
+            return
+        self.reason = reason
+        self._event.set()
+        with self._lock:
+            if self._wfd is not None:
+                try:
+                    os.write(self._wfd, b"\x01")
+                except OSError:
+                    pass
+
+    def check(self) -> None:
+        """취소됐으면 Cancelled."""
+        if self._event.is_set():
+            raise Cancelled(self.reason)
+
+    def fileno(self) -> Optional[int]:
+        """cancel() 시 읽기 가능해지는 fd (없으면 None)."""
+        return self._rfd
+
+    def reset(self) -> None:
+        """새 작업 시작 전에. 남은 깨우기 바이트도 비운다."""
+        self._event.clear()
+        self.reason = ""
+        if self._rfd is not None:
+            try:
+                while os.read(self._rfd, 64):
+                    pass
+            except OSError:
+                pass
+
+    def close(self) -> None:
+        """pipe를 닫는다. 그 뒤의 cancel()은 플래그만 켠다."""
+        with self._lock:
+            fds = (self._rfd, self._wfd)
+            self._rfd = self._wfd = None
+            for fd in fds:
+                if fd is not None:
+                    try:
+                        os.close(fd)
+                    except OSError:
+                        pass
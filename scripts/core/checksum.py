@@ -0,0 +1,51 @@
+# core/checksum.py
+#
+# 부트로더 프레임 XOR checksum을 바이트 단위 파이썬 루프 없이 계산한다.
+#
+# 바이트열을 little-endian 정수 하나로 보고 절반씩 접어(x ^= x >> bits)
+# 내려가면, 최하위 바이트에 전체 XOR이 남는다. 연산은 전부 C 레벨 big-int
+# shift/xor 라서 바이트당 바이트코드가 돌지 않는다.
+#
+# lane_xor는 같은 접기를 이미지 전체에 한 번에 적용한다. 접기 단계마다
+# 하위 절반은 같은 lane 안의 (앞 단계에서 오염되지 않은) 비트만 읽으므로
+# lane 경계 마스크 없이도 각 lane의 최하위 바이트가 그 lane의 XOR이 된다.
+# 결과에서 lane 간격으로 바이트를 뽑으면 블록별 checksum 표가 된다.
+
+
+def _fold_bits(nbytes: int) -> int:
+    bits = 8
+    while bits < 8 * nbytes:
+        bits <<= 1
+    return bits
+
+
+def xor_reduce(data) -> int:
+    """data(bytes/bytearray/memoryview)의 모든 바이트 XOR."""
+    if not data:
+        return 0
+    x = int.from_bytes(data, "little")
+    bits = _fold_bits(len(data))
+    while bits > 8:
+        bits >>= 1
+        x ^= x >> bits
+    return x & 0xFF
+
+
+def lane_xor(data, lane: int) -> bytes:
+    """
+    data를 lane 바이트씩 자른 각 구간의 XOR을 bytes로 반환 (구간 수만큼).
+    마지막 구간이 짧으면 0 패딩(XOR 항등원)으로 취급한다.
+    lane은 2의 거듭제곱이어야 한다.
+    """
+    if lane <= 0 or lane & (lane - 1):
+        raise ValueError(f"lane must be a power of two: {lane}")
+    n = len(data)
+    if n == 0:
+        return b""
+    lanes = (n + lane - 1) // lane
+    x = int.from_bytes(data, "little")
+    bits = 8 * lane
+    while bits > 8:
+        bits >>= 1
+        x ^= x >> bits
+    return x.to_bytes(lanes * lane, "little")[::lane]
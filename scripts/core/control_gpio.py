@@ -19,10 +19,21 @@
 #       SoC LOW  → STM32 NRST HIGH (정상)
 #       SoC HIGH → STM32 NRST LOW  (reset assert)
 #     따라서 nrst_pulse는 SoC 기준 LOW→HIGH→LOW 시퀀스.
+#
+# 쓰기 경로 / 타이밍:
+#   brightness 파일은 LED별로 한 번 열어 fd를 유지하고 os.pwrite(fd, b"1", 0)로
+#   쓴다 (예전에는 매번 open/write/close — sysfs open 지연이 펄스 폭에 더해졌다).
+#   펄스/대기는 time.monotonic_ns 마감 기준으로 재고, 마지막 _SPIN_NS 구간은
+#   sleep 대신 busy-wait 해서 스케줄러 깨어남 지연을 흡수한다. 펄스 함수는
+#   실제로 잰 폭(ms)을 돌려준다.
+#
+# 부트로더 진입/종료 같은 여러 핀 시퀀스는 파일 끝의 선언적 단계 목록
+# (SetPin / Pulse / WaitUntil)과 run_sequence로 실행한다. 단계별 실제 소요
+# 시간을 로그로 남긴다.
 import os
 import time
 import threading
-from typing import Optional, Dict, Tuple
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
 
 LED_FW_UPDATE = "/sys/class/leds/led_rgb_r"
 LED_BOOT0     = "/sys/class/leds/gpio4-c6"
@@ -42,20 +53,91 @@ _CHIP_LINE_TO_LED: Dict[Tuple[str, int], str] = {
     (NRST_GPIO_CHIP,       NRST_GPIO_LINE):       LED_NRST,
 }
 
-_lock = threading.RLock()
+# 라인(LED 경로)별 락. 예전에는 전역 락 하나였으나, 멀티 타깃 모드에서
+# 서로 다른 보드의 핀까지 직렬화되지 않도록 경로 단위로 나눈다.
+_locks: Dict[str, threading.RLock] = {}
+_locks_guard = threading.Lock()
+
+
+def _led_lock(led_dir: str) -> threading.RLock:
+    with _locks_guard:
+        lk = _locks.get(led_dir)
+        if lk is None:
+            lk = _locks[led_dir] = threading.RLock()
+        return lk
 
 
 def _brightness_path(led_dir: str) -> str:
     return os.path.join(led_dir, "brightness")
 
 
+# LED 경로 → 열어 둔 brightness fd (쓰기 전용). cleanup()에서 닫는다.
+_fds: Dict[str, int] = {}
+
+# 대기 마지막 구간은 busy-wait (sleep 깨어남 지연은 보통 50µs~1ms)
+_SPIN_NS = 1_000_000
+
+
+def _brightness_fd(led_dir: str) -> int:
+    """호출자가 _led_lock(led_dir)을 잡고 있어야 한다. 권한 없으면 PermissionError."""
+    fd = _fds.get(led_dir)
+    if fd is None:
+        fd = os.open(_brightness_path(led_dir), os.O_WRONLY | os.O_CLOEXEC)
+        _fds[led_dir] = fd
+    return fd
+
+
+def _close_fd(led_dir: str) -> None:
+    fd = _fds.pop(led_dir, None)
+    if fd is not None:
+        try:
+            os.close(fd)
+        except OSError:
+            pass
+
+
 def _write_brightness(led_dir: str, val: int) -> None:
     if val not in (0, 1):
         raise ValueError(f"brightness must be 0 or 1, got {val}")
-    bp = _brightness_path(led_dir)
-    # 짧고 직접적인 sysfs write. 권한 없으면 PermissionError.
-    with open(bp, "w") as f:
-        f.write("1" if val else "0")
+    data = b"1" if val else b"0"
+    with _led_lock(led_dir):
+        try:
+            os.pwrite(_brightness_fd(led_dir), data, 0)
+        except (PermissionError, FileNotFoundError):
+            raise
+        except OSError:
+            # 드라이버 rebind 등으로 fd가 무효해졌으면 한 번 다시 연다
+            _close_fd(led_dir)
+            os.pwrite(_brightness_fd(led_dir), data, 0)
+
+
+def _wait_until_ns(deadline_ns: int) -> None:
+    """monotonic_ns 마감까지 대기. 마지막 _SPIN_NS는 spin."""
+    while True:
+        remain = deadline_ns - time.monotonic_ns()
+        if remain <= 0:
+            return
+        if remain > _SPIN_NS:
+            time.sleep((remain - _SPIN_NS) / 1e9)
+
+
+def hold(seconds: float) -> None:
+    """시퀀스 단계 사이 대기. time.sleep보다 오차가 작다 (수 µs)."""
+    _wait_until_ns(time.monotonic_ns() + int(seconds * 1e9))
+
+
+def _pulse(led_dir: str, width_ms: float) -> float:
+    """
+    led_dir을 1로 width_ms 유지한 뒤 0. 잰 폭(ms)을 반환한다:
+    assert write 완료 → release write 완료 (두 write 사이 다른 스레드 개입 없음).
+    """
+    with _led_lock(led_dir):
+        _write_brightness(led_dir, 1)
+        t0 = time.monotonic_ns()
+        _wait_until_ns(t0 + int(width_ms * 1e6))
+        _write_brightness(led_dir, 0)
+        t1 = time.monotonic_ns()
+    return (t1 - t0) / 1e6
 
 
 def _read_brightness(led_dir: str) -> int:
@@ -77,14 +159,14 @@ def _resolve_led(chip_name: str, line_num: int) -> str:
 def set_gpio(chip_name: str, line_num: int, value: int) -> None:
     """지정 라인의 brightness를 0/1로 설정한다."""
     led = _resolve_led(chip_name, line_num)
-    with _lock:
+    with _led_lock(led):
         _write_brightness(led, int(value))
 
 
 def get_gpio_value(chip_name: str, line_num: int, *, as_input: bool = False) -> int:
     """현재 brightness 값을 읽는다 (= 커널이 출력 중인 라인 레벨)."""
     led = _resolve_led(chip_name, line_num)
-    with _lock:
+    with _led_lock(led):
         return _read_brightness(led)
 
 
@@ -100,8 +182,10 @@ def get_cached_or_none(chip_name: str, line_num: int) -> Optional[int]:
 
 
 def cleanup() -> None:
-    """sysfs는 영구 자원이 없으므로 할 일 없음."""
-    return
+    """열어 둔 brightness fd를 닫는다 (라인 레벨은 그대로 유지된다)."""
+    for led in list(_fds):
+        with _led_lock(led):
+            _close_fd(led)
 
 
 # ---------------- 편의 함수 ----------------
@@ -143,7 +227,7 @@ def nrst_cached() -> Optional[int]:
     return get_cached_or_none(NRST_GPIO_CHIP, NRST_GPIO_LINE)
 
 
-def nrst_pulse(low_ms: int = 100) -> None:
+def nrst_pulse(low_ms: int = 100) -> float:
     """
     NRST 펄스. 이 보드는 SoC ↔ STM32 NRST 사이에 인버터가 있어
     SoC 레벨에서는 다음과 같다:
@@ -151,10 +235,20 @@ def nrst_pulse(low_ms: int = 100) -> None:
       - reset assert 시:    SoC HIGH → STM32 NRST LOW  (asserted)
     따라서 펄스는 LOW(default) → HIGH(low_ms ms) → LOW(default) 순.
     파라미터 이름은 외부 호환을 위해 low_ms 유지 (실제 의미: assert 유지 시간).
+    잰 assert 폭(ms)을 반환한다.
     """
-    set_gpio(NRST_GPIO_CHIP, NRST_GPIO_LINE, 1)   # assert reset (SoC HIGH = inverter LOW)
-    time.sleep(low_ms / 1000.0)
-    set_gpio(NRST_GPIO_CHIP, NRST_GPIO_LINE, 0)   # release reset (SoC LOW = inverter HIGH)
+    # assert (SoC HIGH = inverter LOW) → release (SoC LOW = inverter HIGH)
+    return _pulse(_resolve_led(NRST_GPIO_CHIP, NRST_GPIO_LINE), low_ms)
+
+
+def bootloader_reset(low_ms: int = 100, settle_s: float = 0.05) -> float:
+    """
+    BOOT0 = HIGH 상태로 NRST 펄스 → ROM 부트로더 재진입.
+    autobaud는 리셋 후 첫 0x7F로만 잡히므로 baud 협상에서 후보를 바꿀 때 사용.
+    FW_UPDATE(PMIC EN)는 건드리지 않는다 — 호출 전에 이미 HIGH여야 한다.
+    잰 NRST 폭(ms) 반환.
+    """
+    return DEFAULT_PINS.bootloader_reset(low_ms=low_ms, settle_s=settle_s)
 
 
 def fw_update_release() -> None:
@@ -176,7 +270,266 @@ def init_safe() -> None:
       BOOT0     = 0 (normal boot)
     """
     set_gpio(POWER_HOLD_GPIO_CHIP, POWER_HOLD_GPIO_LINE, 1)
-    time.sleep(0.02)
+    hold(0.02)
     set_gpio(NRST_GPIO_CHIP, NRST_GPIO_LINE, 0)
-    time.sleep(0.005)
+    hold(0.005)
     set_gpio(BOOT0_GPIO_CHIP, BOOT0_GPIO_LINE, 0)
+
+
+# ---------------- 멀티 타깃: 보드별 핀 맵 ----------------
+
+def _led_dir(name_or_path: str) -> str:
+    """'gpio4-c6' 같은 LED 이름은 /sys/class/leds 아래로, 절대경로는 그대로."""
+    if os.path.isabs(name_or_path):
+        return name_or_path
+    return os.path.join("/sys/class/leds", name_or_path)
+
+
+class PinMap:
+    """
+    캐리어보드 하나의 FW_UPDATE / BOOT0 / NRST LED 경로 묶음.
+    모듈 함수들은 기본 보드(DEFAULT_PINS)용이고, 멀티 타깃 모드는 보드마다
+    PinMap을 만들어 같은 시퀀스를 독립적으로(경로별 락만 잡고) 수행한다.
+    """
+
+    def __init__(self, fw_update: str = LED_FW_UPDATE, boot0: str = LED_BOOT0,
+                 nrst: str = LED_NRST):
+        self.fw_update = _led_dir(fw_update)
+        self.boot0 = _led_dir(boot0)
+        self.nrst = _led_dir(nrst)
+
+    @classmethod
+    def parse(cls, spec: str) -> "PinMap":
+        """'FW_UPDATE,BOOT0,NRST' (LED 이름 또는 경로) → PinMap."""
+        parts = [p.strip() for p in spec.split(",")]
+        if len(parts) != 3 or not all(parts):
+            raise ValueError(f"pin map must be FW_UPDATE,BOOT0,NRST: {spec!r}")
+        return cls(*parts)
+
+    def __repr__(self) -> str:
+        return (f"PinMap({os.path.basename(self.fw_update)}, "
+                f"{os.path.basename(self.boot0)}, {os.path.basename(self.nrst)})")
+
+    def _set(self, led: str, v: int) -> None:
+        _write_brightness(led, int(v))
+
+    def open(self) -> None:
+        """
+        세 핀의 brightness fd를 미리 연다 (라인 레벨은 건드리지 않는다).
+        상주 프로세스가 권한/경로 오류를 첫 작업 전에 알 수 있게. 실패는 OSError.
+        """
+        for led in (self.fw_update, self.boot0, self.nrst):
+            with _led_lock(led):
+                _brightness_fd(led)
+
+    def led(self, pin: str) -> str:
+        """시퀀스 핀 이름(PIN_*) → LED 경로."""
+        try:
+            return {PIN_FW_UPDATE: self.fw_update, PIN_BOOT0: self.boot0,
+                    PIN_NRST: self.nrst}[pin]
+        except KeyError:
+            raise ValueError(f"unknown pin: {pin}") from None
+
+    def power_hold_set(self, v: int) -> None:
+        """FW_UPDATE = PMIC EN. v=0이면 해당 캐리어보드 전원이 꺼진다."""
+        self._set(self.fw_update, v)
+
+    def boot0_set(self, v: int) -> None:
+        self._set(self.boot0, v)
+
+    def nrst_pulse(self, low_ms: int = 100) -> float:
+        """nrst_pulse()와 같은 SoC 기준 LOW→HIGH→LOW (인버터 경유). 잰 폭(ms) 반환."""
+        return _pulse(self.nrst, low_ms)
+
+    def bootloader_reset(self, low_ms: int = 100, settle_s: float = 0.05) -> float:
+        steps = [SetPin(PIN_BOOT0, 1), Pulse(PIN_NRST, low_ms),
+                 WaitUntil("bootloader ready", None, min_s=settle_s)]
+        return run_sequence("reset", steps, self).pulse_ms
+
+    def enter_bootloader(self, ready: Optional[Callable[[], bool]] = None,
+                         log: Optional[Callable[[str], None]] = None) -> float:
+        """enter_bootloader_steps 실행 (headless step1과 같은 시퀀스). NRST 폭(ms) 반환."""
+        return run_sequence("enter", enter_bootloader_steps(ready), self, log).pulse_ms
+
+    def exit_bootloader(self, ready: Optional[Callable[[], bool]] = None,
+                        log: Optional[Callable[[str], None]] = None) -> float:
+        """exit_bootloader_steps 실행 (headless step5와 같은 시퀀스). NRST 폭(ms) 반환."""
+        return run_sequence("exit", exit_bootloader_steps(ready), self, log).pulse_ms
+
+
+DEFAULT_PINS = PinMap()
+
+
+# ---------------- 선언적 시퀀스 ----------------
+#
+# 시퀀스 = 단계 목록. 같은 진입/종료 순서를 headless/GUI/멀티 타깃이 각자
+# 손으로 쓰지 않도록 여기 한 곳에 둔다.
+#
+#   SetPin(pin, value, settle_s)   라인 설정 후 settle_s 고정 대기
+#   Pulse(pin, width_ms, settle_s) 1 → width_ms → 0 (NRST는 인버터 경유 assert)
+#   WaitUntil(label, ready, min_s, deadline_s)
+#       min_s 대기 후 ready()가 True일 때까지 poll. deadline_s(단계 시작 기준)를
+#       넘기면 required면 SequenceTimeout, 아니면 경고만 남기고 계속.
+#       ready가 None이면 min_s 고정 대기.
+#
+# 대기값은 하한이다: 확인할 신호가 없는 PMIC/BOOT0 settle만 고정 대기로 남고,
+# 리셋 이후는 ready(예: 부트로더 SYNC 응답, 앱 배너) 확인 즉시 다음으로 간다.
+# ready를 줄 수 없는 호출자는 예전의 보수적인 고정 대기를 그대로 받는다.
+
+PIN_FW_UPDATE = "fw_update"
+PIN_BOOT0     = "boot0"
+PIN_NRST      = "nrst"
+
+NRST_PULSE_MS = 100
+
+# 리셋 해제 후 ROM 부트로더가 0x7F를 받기까지의 하한 / ready 없을 때 고정 대기
+BOOTLOADER_MIN_S   = 0.005
+BOOTLOADER_FIXED_S = 0.05
+# 앱 부팅 확인 하한 / 고정 대기 (GUI Exit는 keep-alive 인계까지 0.5s)
+APP_MIN_S          = 0.005
+APP_FIXED_S        = 0.05
+APP_KEEPALIVE_S    = 0.5
+
+
+class SetPin(NamedTuple):
+    pin: str
+    value: int
+    settle_s: float = 0.0
+
+
+class Pulse(NamedTuple):
+    pin: str
+    width_ms: float = NRST_PULSE_MS
+    settle_s: float = 0.0
+
+
+class WaitUntil(NamedTuple):
+    label: str
+    ready: Optional[Callable[[], bool]] = None
+    min_s: float = 0.0
+    deadline_s: float = 1.0
+    poll_s: float = 0.002
+    required: bool = True
+
+
+class SequenceTimeout(RuntimeError):
+    """required WaitUntil 단계가 deadline 안에 준비되지 않음."""
+
+
+class StepLog(NamedTuple):
+    step: str
+    elapsed_ms: float
+    detail: str = ""
+
+
+class SequenceResult:
+    """run_sequence 결과: 단계별 실제 소요 시간과 잰 펄스 폭."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.steps: List[StepLog] = []
+        self.pulse_ms: Optional[float] = None   # 마지막 Pulse 단계의 잰 폭
+        self.ready_ms: Optional[float] = None   # 마지막 WaitUntil이 ready()를 확인한 시점
+
+    @property
+    def total_ms(self) -> float:
+        return sum(st.elapsed_ms for st in self.steps)
+
+
+def enter_bootloader_steps(ready: Optional[Callable[[], bool]] = None,
+                           deadline_s: float = 1.0, poll_s: float = 0.002,
+                           required: bool = True) -> List:
+    """
+    ROM 부트로더 진입. FW_UPDATE(PMIC keep-alive 인계)가 반드시 먼저.
+    ready: 부트로더 응답 확인 (예: SYNC ACK/NACK). 없으면 고정 대기.
+    ready가 스스로 응답을 기다리면 poll_s=0 (core/entry.SyncProbe).
+    """
+    return [
+        SetPin(PIN_FW_UPDATE, 1, settle_s=0.05),
+        SetPin(PIN_BOOT0, 1, settle_s=0.01),
+        Pulse(PIN_NRST, NRST_PULSE_MS),
+        WaitUntil("bootloader ready", ready,
+                  min_s=BOOTLOADER_MIN_S if ready else BOOTLOADER_FIXED_S,
+                  deadline_s=deadline_s, poll_s=poll_s, required=required),
+    ]
+
+
+def exit_bootloader_steps(ready: Optional[Callable[[], bool]] = None,
+                          deadline_s: float = 2.0, release_power: bool = False) -> List:
+    """
+    앱 펌웨어 부팅: BOOT0=0 → NRST 펄스 → (앱 확인).
+    ready: 앱 부팅 확인 (예: 배너 수신). 없으면 고정 대기.
+    release_power: GUI Exit처럼 끝에 FW_UPDATE를 release (fw_update_release 참고).
+    """
+    steps = [
+        SetPin(PIN_BOOT0, 0, settle_s=0.01),
+        Pulse(PIN_NRST, NRST_PULSE_MS),
+        WaitUntil("app running", ready,
+                  min_s=APP_MIN_S if ready else APP_FIXED_S,
+                  deadline_s=deadline_s, required=False),
+    ]
+    if release_power:
+        # 앱이 자체 keep-alive를 잡을 시간. 확인할 신호가 없어 고정 하한.
+        steps += [WaitUntil("app keep-alive", None, min_s=APP_KEEPALIVE_S),
+                  SetPin(PIN_FW_UPDATE, 1)]
+    return steps
+
+
+def _describe(step) -> str:
+    if isinstance(step, SetPin):
+        return f"{step.pin}={step.value}"
+    if isinstance(step, Pulse):
+        return f"{step.pin} pulse {step.width_ms:g}ms"
+    return f"wait {step.label}"
+
+
+def run_sequence(name: str, steps: Sequence, pins: Optional["PinMap"] = None,
+                 log: Optional[Callable[[str], None]] = None) -> SequenceResult:
+    """
+    steps를 순서대로 실행한다. 각 단계는 settle/대기까지 포함한 실제 소요
+    시간을 log("[gpio:<name>] ...")로 남긴다. 핀 쓰기 실패는 OSError 그대로,
+    required WaitUntil 초과는 SequenceTimeout.
+    """
+    pins = pins or DEFAULT_PINS
+    res = SequenceResult(name)
+    for step in steps:
+        t0 = time.monotonic_ns()
+        detail = ""
+        if isinstance(step, SetPin):
+            _write_brightness(pins.led(step.pin), int(step.value))
+            hold(step.settle_s)
+        elif isinstance(step, Pulse):
+            res.pulse_ms = _pulse(pins.led(step.pin), step.width_ms)
+            detail = f"measured {res.pulse_ms:.3f}ms"
+            hold(step.settle_s)
+        elif isinstance(step, WaitUntil):
+            detail = _wait_until(step, t0)
+            if detail.startswith("ready"):
+                res.ready_ms = (time.monotonic_ns() - t0) / 1e6
+        else:
+            raise TypeError(f"unknown sequence step: {step!r}")
+        st = StepLog(_describe(step), (time.monotonic_ns() - t0) / 1e6, detail)
+        res.steps.append(st)
+        if log:
+            log(f"[gpio:{name}] {st.step}: {st.elapsed_ms:.3f}ms"
+                + (f" ({detail})" if detail else ""))
+        if detail.startswith("timeout") and step.required:
+            raise SequenceTimeout(f"{name}: {step.label} not ready within {step.deadline_s:g}s")
+    return res
+
+
+def _wait_until(step: WaitUntil, t0_ns: int) -> str:
+    """WaitUntil 한 단계. 결과 설명 문자열 ("ready" / "fixed" / "timeout ...")."""
+    _wait_until_ns(t0_ns + int(step.min_s * 1e9))
+    if step.ready is None:
+        return "fixed"
+    deadline = t0_ns + int(step.deadline_s * 1e9)
+    tries = 0
+    while True:
+        tries += 1
+        if step.ready():
+            return f"ready after {tries} probe{'s' if tries > 1 else ''}"
+        if time.monotonic_ns() >= deadline:
+            return f"timeout after {tries} probes"
+        if step.poll_s:
+            hold(step.poll_s)
@@ -0,0 +1,104 @@
+# core/delta.py
+#
+# Delta flash: 현재 플래시 내용을 Read Memory(0x11)로 읽어 새 이미지와
+# 섹터 단위로 비교하고, 달라진 섹터만 erase + write 한다.
+#
+# ROM 부트로더에는 범용 CRC 명령이 없으므로 비교는 256B readback으로 한다.
+# 섹터 안에서 첫 불일치가 나오면 그 섹터의 나머지는 읽지 않는다 (어차피 dirty).
+# 따라서 비용은 "변경 없는 섹터의 read"가 대부분이며, erase/write 시간에 비해
+# 훨씬 작다.
+#
+# 비교 범위는 이미지가 덮는 주소뿐이다. 섹터 중 이미지 밖 꼬리는 비교하지
+# 않으며, dirty 섹터로 erase되면 0xFF가 된다 (일반 sector erase와 동일).
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from core.flash_layout import FlashLayout
+
+READ_CHUNK = 256   # Read Memory 최대 길이
+
+# read_fn(addr, n) -> bytes (n바이트) 또는 실패 시 None
+ReadFn = Callable[[int, int], Optional[bytes]]
+# progress(done_bytes, total_bytes)
+ProgressFn = Callable[[int, int], None]
+
+
+class DeltaPlan:
+    """비교 결과: dirty 섹터 번호와 통계."""
+
+    def __init__(self, layout: FlashLayout, sectors: Sequence[int],
+                 dirty: Sequence[int], read_bytes: int):
+        self.layout = layout
+        self.sectors = list(sectors)   # 이미지가 걸치는 전체 섹터
+        self.dirty = list(dirty)       # 다시 써야 하는 섹터
+        self.read_bytes = read_bytes
+
+    @property
+    def clean(self) -> bool:
+        return not self.dirty
+
+    def dirty_spans(self) -> List[Tuple[int, int]]:
+        """dirty 섹터 → [(start_addr, size), ...]."""
+        return [self.layout.sector_span(i) for i in self.dirty]
+
+    def describe(self) -> str:
+        return (f"{len(self.dirty)}/{len(self.sectors)} sectors differ "
+                f"(read back {self.read_bytes:,} bytes)")
+
+
+def plan_delta(fw: bytes, base_addr: int, layout: FlashLayout, read_fn: ReadFn,
+               chunk: int = 256, progress: Optional[ProgressFn] = None,
+               segments: Optional[Sequence[Tuple[int, int, int]]] = None) -> DeltaPlan:
+    """
+    fw와 타깃 플래시를 섹터 단위로 비교한다.
+    chunk는 write 프레임 크기와 같게 둔다: write 블록이 섹터 경계를 걸치면
+    양쪽 섹터를 함께 dirty로 올려, 지우지 않은 영역에 쓰는 일이 없게 한다.
+    segments(core/image.FirmwareImage.layout())가 있으면 base_addr 대신 그
+    (addr, offset, length) 구간들만 비교한다.
+    read 실패 시 RuntimeError.
+    """
+    if segments is None:
+        segments = [(base_addr, 0, len(fw))]
+    total = sum(n for _a, _o, n in segments)
+    view = memoryview(fw)
+    dirty = set()
+    read_bytes = 0
+    sectors = set()
+    done = 0
+
+    for seg_addr, seg_off, seg_len in segments:
+        end = seg_addr + seg_len
+        seg_sectors = layout.sectors_for_range(seg_addr, seg_len)
+        sectors.update(seg_sectors)
+        for idx in seg_sectors:
+            s_start, s_size = layout.sector_span(idx)
+            lo = max(s_start, seg_addr)
+            hi = min(s_start + s_size, end)
+            addr = lo
+            while addr < hi:
+                n = min(READ_CHUNK, hi - addr)
+                got = read_fn(addr, n)
+                if got is None or len(got) != n:
+                    raise RuntimeError(f"read back failed @0x{addr:08X}")
+                read_bytes += n
+                off = seg_off + addr - seg_addr
+                if got != view[off:off + n]:
+                    dirty.add(idx)
+                    break
+                addr += n
+            if progress:
+                progress(done + hi - seg_addr, total)
+        done += seg_len
+
+    # write 블록이 걸치는 섹터는 함께 dirty로 (섹터 경계와 chunk가 어긋난 경우)
+    changed = True
+    while changed:
+        changed = False
+        for seg_addr, _off, seg_len in segments:
+            for rel in range(0, seg_len, chunk):
+                touched = layout.sectors_for_range(seg_addr + rel, min(chunk, seg_len - rel))
+                if len(touched) > 1 and dirty.intersection(touched) \
+                        and not dirty.issuperset(touched):
+                    dirty.update(touched)
+                    changed = True
+
+    return DeltaPlan(layout, sorted(sectors), sorted(dirty), read_bytes)
@@ -0,0 +1,128 @@
+# core/entry.py
+#
+# 부트로더 진입 + SYNC를 한 번에.
+#
+# 예전 흐름은 진입 시퀀스(NRST 펄스 후 고정 대기)가 끝난 뒤 따로 Connect
+# 단계에서 포트를 열고 0x7F를 ~280ms 간격(0.25s ACK 대기 + 0.03s)으로 보냈다.
+# 리셋 해제 후 부트로더는 수 ms 안에 0x7F를 받을 수 있으므로, 그 사이가 보드
+# 한 대당 고스란히 죽은 시간이었다.
+#
+# 여기서는 포트를 리셋 전에 열어 두고, 진입 시퀀스의 WaitUntil 단계에서
+# 리셋 해제 직후부터 SYNC를 보낸다 (core/control_gpio.enter_bootloader_steps).
+# ACK 대기 창은 SYNC_WINDOW_START_S에서 시작해 응답이 없을 때마다
+# SYNC_WINDOW_DECAY 배로 좁혀 SYNC_WINDOW_MIN_S까지 내려간다: 부트로더가 아직
+# 안 떠서 0x7F를 흘린 경우, 다음 0x7F가 빨리 나갈수록 준비 직후에 잡힌다.
+# 창보다 늦게 온 ACK 뒤에 다음 0x7F가 NACK을 받아도 "살아 있음"으로 충분하다.
+#
+# 대신 창이 포트 왕복(USB-UART 수 ms)보다 짧아지면 첫 응답 전에 0x7F가 여러 개
+# 나가 있다. 그중 홀수 개가 명령 첫 바이트로 먹히면 부트로더는 보수 바이트를
+# 기다리는 중이라 다음 명령(mass erase면 바로 Extended Erase)이 어긋난다.
+# 그래서 첫 응답 뒤에 Get(0x00)을 한 번 끝까지 주고받아 명령 경계를 확인한다:
+# 깨끗한 ACK + 목록 + ACK가 아니면 한 바이트를 더 보내 짝을 맞추고 다시 Get.
+# 받은 명령 목록은 돌려주므로 세션의 Get 캐시로 쓸 수 있다.
+#
+# 리셋 해제 → 첫 ACK/NACK 시간(time-to-first-ACK)을 돌려주고 계측에 남긴다.
+import time
+from typing import Callable, NamedTuple, Optional
+
+import core.control_gpio as gpio
+from core.ack_reader import ACK_OK, ACK_TIMEOUT
+
+CMD_SYNC = b"\x7F"
+CMD_GET  = b"\x00\xFF"
+
+SYNC_WINDOW_START_S = 0.01
+SYNC_WINDOW_MIN_S   = 0.001
+SYNC_WINDOW_DECAY   = 0.7
+ENTRY_DEADLINE_S    = 2.0
+
+RESYNC_TRIES = 4
+RESYNC_ACK_S = 0.2
+
+
+class SyncProbe:
+    """enter 시퀀스의 ready(): 0x7F 한 번 보내고 현재 창 동안 ACK/NACK 대기."""
+
+    def __init__(self, ser, acks):
+        self._ser = ser
+        self._acks = acks
+        self.window_s = SYNC_WINDOW_START_S
+        self.attempts = 0
+        self.response: Optional[str] = None
+
+    def __call__(self) -> bool:
+        self.attempts += 1
+        self._ser.write(CMD_SYNC); self._ser.flush()
+        r = self._acks.wait(self.window_s)
+        if r != ACK_TIMEOUT:
+            self.response = r
+            return True
+        self.window_s = max(SYNC_WINDOW_MIN_S, self.window_s * SYNC_WINDOW_DECAY)
+        return False
+
+
+class EntryResult(NamedTuple):
+    ack_s: Optional[float]          # 리셋 해제 → 첫 ACK/NACK. None = 응답 없음
+    attempts: int                   # 보낸 0x7F 수
+    seq: "gpio.SequenceResult"
+    commands: bytes = b""           # 경계 확인 Get(0x00)이 돌려준 명령 코드들
+
+    @property
+    def synced(self) -> bool:
+        return self.ack_s is not None
+
+
+def _get_commands(ser, acks) -> Optional[bytes]:
+    """Get(0x00) 한 번이 ACK + 목록 + ACK로 깨끗하게 끝나면 명령 코드들, 아니면 None."""
+    ser.reset_input_buffer()
+    ser.write(CMD_GET); ser.flush()
+    if acks.wait(RESYNC_ACK_S) != ACK_OK:
+        return None
+    n = acks.read_exact(1, RESYNC_ACK_S)
+    if not n:
+        return None
+    body = acks.read_exact(n[0] + 1, RESYNC_ACK_S)   # 버전 + 명령들
+    if len(body) != n[0] + 1 or acks.wait(RESYNC_ACK_S) != ACK_OK:
+        return None
+    return body[1:]
+
+
+def resync(ser, acks, tries: int = RESYNC_TRIES) -> Optional[bytes]:
+    """
+    첫 SYNC 응답 뒤 명령 경계 맞추기. Get이 실패하면 (부트로더가 바이트 하나를
+    쥐고 있을 수 있음) 0x7F 하나로 짝을 맞추고 다시. 성공하면 명령 코드들.
+    """
+    for _ in range(tries):
+        cmds = _get_commands(ser, acks)
+        if cmds is not None:
+            return cmds
+        time.sleep(0.01)
+        ser.reset_input_buffer()
+        ser.write(CMD_SYNC); ser.flush()
+        acks.wait(RESYNC_ACK_S)
+    return None
+
+
+def enter_and_sync(ser, acks, pins: Optional["gpio.PinMap"] = None,
+                   deadline_s: float = ENTRY_DEADLINE_S,
+                   log: Optional[Callable[[str], None]] = None) -> EntryResult:
+    """
+    열린 포트(ser, acks=AckReader)로 진입 시퀀스를 돌리며 리셋 해제 직후 SYNC.
+    GPIO 쓰기 실패는 OSError 그대로. 응답이 없거나 그 뒤 명령 경계를 못 맞추면
+    ack_s=None (호출자가 일반 sync로 폴백).
+    """
+    ser.reset_input_buffer()
+    probe = SyncProbe(ser, acks)
+    steps = gpio.enter_bootloader_steps(probe, deadline_s=deadline_s, poll_s=0.0,
+                                        required=False)
+    seq = gpio.run_sequence("enter", steps, pins, log)
+    if probe.response is None:
+        return EntryResult(None, probe.attempts, seq)
+    # 늦게 온 ACK/NACK은 resync가 버리고, 남은 0x7F가 쥔 바이트는 짝을 맞춘다
+    time.sleep(SYNC_WINDOW_MIN_S)
+    cmds = resync(ser, acks)
+    if cmds is None:
+        if log is not None:
+            log("SYNC: no clean Get response after first ACK")
+        return EntryResult(None, probe.attempts, seq)
+    return EntryResult(seq.ready_ms / 1000.0, probe.attempts, seq, cmds)
@@ -0,0 +1,188 @@
+# core/flash_layout.py
+#
+# STM32 플래시 섹터/페이지 레이아웃과 erase 계획.
+#
+# 기존 flash 경로는 항상 Extended Erase(0x44) + 0xFFFF(global mass erase)를
+# 보냈다. 40KB 앱을 1MB 파트에 올려도 칩 전체 erase 시간을 매번 치른다.
+# 여기서는 Get ID(0x02)로 읽은 PID로 레이아웃을 찾고, 이미지 주소 범위가
+# 걸치는 섹터/페이지 번호만 Extended Erase로 보낸다.
+#
+# 레이아웃 출처: AN2606 (bootloader PID), 각 RM의 flash module organization.
+# 같은 PID라도 플래시 용량이 작은 파생 품번이 있으나, 이미지 범위에 걸치는
+# 섹터만 지우므로 표는 해당 PID의 최대 용량 기준으로 둔다.
+#
+# Extended Erase 페이로드 (AN3155):
+#   N(2B, BE, = 페이지 수 - 1) + 페이지 번호들(각 2B, BE) + XOR checksum(1B)
+#   N = 0xFFFF 이면 global mass erase (checksum 0x00).
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+ERASE_AUTO   = "auto"     # 레이아웃을 알면 sector, 모르면 mass
+ERASE_SECTOR = "sector"   # 레이아웃을 모르면 실패
+ERASE_MASS   = "mass"     # 기존 동작 (global mass erase)
+ERASE_MODES  = (ERASE_AUTO, ERASE_SECTOR, ERASE_MASS)
+
+MASS_ERASE_PAYLOAD = b"\xFF\xFF\x00"
+
+# 한 번의 Extended Erase에 싣는 최대 페이지 수.
+# 부트로더 수신 버퍼와 erase ACK 타임아웃을 고려해 나눠 보낸다.
+EXT_ERASE_MAX_PAGES = 64
+
+_KB = 1024
+
+
+class FlashLayout:
+    """(섹터 크기, 개수) 구간 목록으로 정의한 플래시 배치."""
+
+    def __init__(self, name: str, regions: Sequence[Tuple[int, int]],
+                 base: int = 0x08000000):
+        self.name = name
+        self.base = base
+        self.sectors: List[Tuple[int, int]] = []   # (start_addr, size)
+        addr = base
+        for size, count in regions:
+            for _ in range(count):
+                self.sectors.append((addr, size))
+                addr += size
+        self.end = addr
+
+    @property
+    def size(self) -> int:
+        return self.end - self.base
+
+    def sector_index(self, addr: int) -> int:
+        """addr이 속한 섹터 번호. 범위 밖이면 ValueError."""
+        if not (self.base <= addr < self.end):
+            raise ValueError(
+                f"address 0x{addr:08X} outside {self.name} flash "
+                f"(0x{self.base:08X}..0x{self.end:08X})"
+            )
+        for idx, (start, size) in enumerate(self.sectors):
+            if start <= addr < start + size:
+                return idx
+        raise ValueError(f"address 0x{addr:08X} not mapped")  # 도달 불가
+
+    def sectors_for_range(self, start: int, length: int) -> List[int]:
+        """[start, start+length) 범위가 걸치는 섹터 번호 목록 (오름차순)."""
+        if length <= 0:
+            return []
+        first = self.sector_index(start)
+        last = self.sector_index(start + length - 1)
+        return list(range(first, last + 1))
+
+    def sector_span(self, idx: int) -> Tuple[int, int]:
+        """섹터 번호 → (start_addr, size)."""
+        return self.sectors[idx]
+
+
+# PID → 레이아웃. 모르는 PID는 ERASE_AUTO에서 mass erase로 폴백한다.
+_F4_1M = ((16 * _KB, 4), (64 * _KB, 1), (128 * _KB, 7))
+
+LAYOUTS_BY_PID: Dict[int, FlashLayout] = {
+    0x410: FlashLayout("STM32F10x medium-density", ((1 * _KB, 128),)),
+    0x414: FlashLayout("STM32F10x high-density",   ((2 * _KB, 256),)),
+    0x440: FlashLayout("STM32F05x/F030x8",         ((1 * _KB, 64),)),
+    0x448: FlashLayout("STM32F07x",                ((2 * _KB, 64),)),
+    0x413: FlashLayout("STM32F405/407/415/417",    _F4_1M),
+    0x419: FlashLayout("STM32F42x/43x",            _F4_1M + _F4_1M),
+    0x423: FlashLayout("STM32F401xB/C",            ((16 * _KB, 4), (64 * _KB, 1), (128 * _KB, 1))),
+    0x433: FlashLayout("STM32F401xD/E",            ((16 * _KB, 4), (64 * _KB, 1), (128 * _KB, 3))),
+    0x431: FlashLayout("STM32F411xx",              ((16 * _KB, 4), (64 * _KB, 1), (128 * _KB, 3))),
+    0x460: FlashLayout("STM32G07x/G08x",           ((2 * _KB, 64),)),
+    0x468: FlashLayout("STM32G431/441",            ((2 * _KB, 64),)),
+    0x435: FlashLayout("STM32L43x/44x",            ((2 * _KB, 128),)),
+    0x415: FlashLayout("STM32L47x/48x",            ((2 * _KB, 512),)),
+}
+
+
+def layout_for_pid(pid: Optional[int]) -> Optional[FlashLayout]:
+    if pid is None:
+        return None
+    return LAYOUTS_BY_PID.get(pid)
+
+
+def ext_erase_payload(pages: Sequence[int]) -> bytes:
+    """페이지 번호 목록 → Extended Erase 두 번째 프레임 (N + pages + checksum)."""
+    if not pages:
+        raise ValueError("empty page list")
+    if len(pages) > 0xFFF0:
+        raise ValueError(f"too many pages: {len(pages)}")
+    frame = bytearray((len(pages) - 1).to_bytes(2, "big"))
+    for p in pages:
+        frame += int(p).to_bytes(2, "big")
+    chk = 0
+    for b in frame:
+        chk ^= b
+    frame.append(chk)
+    return bytes(frame)
+
+
+class ErasePlan:
+    """erase 단계에서 보낼 페이로드 묶음."""
+
+    def __init__(self, layout: Optional[FlashLayout], pages: Sequence[int]):
+        self.layout = layout
+        self.pages = list(pages)
+
+    @property
+    def mass(self) -> bool:
+        return self.layout is None
+
+    @property
+    def erase_bytes(self) -> int:
+        """지워지는 바이트 수. mass erase는 레이아웃을 모르면 0."""
+        if self.layout is None:
+            return 0
+        return sum(self.layout.sector_span(p)[1] for p in self.pages)
+
+    def payloads(self) -> Iterator[bytes]:
+        if self.mass:
+            yield MASS_ERASE_PAYLOAD
+            return
+        for i in range(0, len(self.pages), EXT_ERASE_MAX_PAGES):
+            yield ext_erase_payload(self.pages[i:i + EXT_ERASE_MAX_PAGES])
+
+    def describe(self) -> str:
+        if self.mass:
+            return "mass erase"
+        if not self.pages:
+            return "no erase (nothing to change)"
+        first, last = self.pages[0], self.pages[-1]
+        if last - first + 1 == len(self.pages):
+            pages = f"{first}..{last}"
+        else:   # 세그먼트 이미지: 사이 섹터는 건드리지 않음
+            pages = ",".join(str(p) for p in self.pages[:8])
+            if len(self.pages) > 8:
+                pages += ",..."
+        return (f"sector erase {self.layout.name}: pages {pages} "
+                f"({len(self.pages)} pages, {self.erase_bytes:,} bytes)")
+
+
+def plan_erase(pid: Optional[int], base_addr: int, length: int,
+               mode: str = ERASE_AUTO) -> ErasePlan:
+    """
+    이미지 주소 범위 [base_addr, base_addr+length)를 타깃 레이아웃에 매핑한다.
+      - ERASE_MASS   : 항상 mass erase
+      - ERASE_AUTO   : PID 레이아웃을 알면 sector erase, 모르면 mass erase
+      - ERASE_SECTOR : 레이아웃을 모르면 ValueError
+    이미지가 레이아웃 범위를 벗어나면 ValueError.
+    """
+    return plan_erase_spans(pid, [(base_addr, length)], mode)
+
+
+def plan_erase_spans(pid: Optional[int], spans: Sequence[Tuple[int, int]],
+                     mode: str = ERASE_AUTO) -> ErasePlan:
+    """plan_erase의 세그먼트 이미지 버전: [(addr, length), ...]가 걸치는 섹터만."""
+    if mode not in ERASE_MODES:
+        raise ValueError(f"unknown erase mode: {mode}")
+    if mode == ERASE_MASS:
+        return ErasePlan(None, [])
+    layout = layout_for_pid(pid)
+    if layout is None:
+        if mode == ERASE_SECTOR:
+            pid_s = "unknown" if pid is None else f"0x{pid:03X}"
+            raise ValueError(f"no flash layout for PID {pid_s}")
+        return ErasePlan(None, [])
+    pages = set()
+    for addr, length in spans:
+        pages.update(layout.sectors_for_range(addr, length))
+    return ErasePlan(layout, sorted(pages))
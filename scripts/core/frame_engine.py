@@ -0,0 +1,221 @@
+# core/frame_engine.py
+#
+# Write Memory(0x31) 프레임 엔진.
+#
+# 기존 write_block은 블록마다 write()+flush()를 세 번 하고, struct.pack /
+# bytes([chk]) / lb + data + bytes([csum]) / fw[a:b] 슬라이스로 매번 새
+# bytes를 만들었다. 여기서는 세 프레임을 재사용 bytearray 하나에 미리 배치하고
+# memoryview 슬라이스로 보낸다:
+#
+#   [0:2]      CMD  0x31 0xCE
+#   [2:7]      ADDR 4B(BE) + XOR
+#   [7]        N-1
+#   [8:8+N]    DATA
+#   [8+N]      XOR(N-1, DATA)
+#
+# - flush()(tcdrain)는 하지 않는다. 곧바로 ACK를 기다리므로 송신 완료 대기는
+#   의미 없는 syscall이다.
+# - POSIX 포트는 fd에 os.write로 memoryview를 그대로 넘긴다 (pyserial write는
+#   memoryview를 bytes로 복사한다). fd를 못 얻으면 ser.write로 폴백.
+# - pipelined=True면 세 프레임을 한 번의 write로 보내고 ACK 3개를 연달아 받는다.
+#   부트로더가 ACK 송신 중 다음 바이트를 놓치지 않는 타깃(USART FIFO/DMA 수신)
+#   에서만 켤 것. 기본은 프레임마다 ACK를 확인하는 표준 순서.
+#
+# FrameTable은 이미지 전체의 주소 프레임 / 길이 바이트 / 데이터 checksum을
+# write 전에 한 번에 계산해 둔다 (checksum은 core/checksum.lane_xor 일괄 접기).
+# write 루프는 표에서 꺼내 버퍼에 복사만 하므로 바이트당 파이썬 연산이 없다.
+#
+# metrics(core/metrics.FlashMetrics)를 주면 단계별 송신 → ACK 왕복을 기록한다.
+import os
+import select
+import time
+from typing import Callable, Dict, Optional
+
+from core.checksum import lane_xor, xor_reduce
+from core.write_plan import WRITE_CHUNK, WritePlan
+
+_OFF_ADDR = 2
+_OFF_LEN  = 7
+_OFF_DATA = 8
+
+_FF = b"\xFF" * WRITE_CHUNK     # trim된 꼬리 비교용
+
+ACK_TIMEOUT_CMD_S  = 0.8
+ACK_TIMEOUT_ADDR_S = 0.8
+ACK_TIMEOUT_DATA_S = 1.5
+SEND_TIMEOUT_S     = 1.0
+
+
+def _fileno(ser) -> Optional[int]:
+    try:
+        return ser.fileno()
+    except Exception:
+        return None
+
+
+def send_view(ser, fd: Optional[int], view: memoryview) -> None:
+    """view를 복사 없이 fd로 (부분 write면 나머지를 이어서). fd가 없으면 ser.write."""
+    if fd is None:
+        ser.write(view)
+        return
+    deadline = time.monotonic() + SEND_TIMEOUT_S
+    while True:
+        try:
+            sent = os.write(fd, view)
+        except BlockingIOError:
+            sent = 0
+        if sent == len(view):
+            return
+        view = view[sent:]   # 부분 write일 때만
+        remain = deadline - time.monotonic()
+        if remain <= 0:
+            raise TimeoutError("serial write timeout")
+        select.select([], [fd], [], remain)
+
+
+class FrameTable:
+    """WritePlan 블록별 사전 계산 프레임: addr 5B, N-1, data checksum."""
+
+    def __init__(self, plan: WritePlan, addr_frames: bytes, lens: bytes, csums: bytes):
+        self.plan = plan
+        self.addr_frames = addr_frames   # 블록 i → [5i:5i+5]
+        self.lens = lens                 # 블록 i → N-1
+        self.csums = csums               # 블록 i → XOR(N-1, DATA)
+
+    def __len__(self) -> int:
+        return len(self.lens)
+
+
+def build_frame_table(fw, plan: WritePlan) -> FrameTable:
+    """
+    plan의 모든 블록 프레임 헤더/트레일러를 한 번에 만든다.
+    블록은 plan.chunk 경계에서 시작하므로, 이미지 전체 lane XOR 한 번으로
+    블록별 XOR을 얻고, 0xFF trim으로 빠진 꼬리는 개수 홀짝으로 보정한다
+    (0xFF를 짝수 번 XOR하면 0, 홀수 번이면 0xFF). 꼬리가 0xFF가 아니면 (세그먼트
+    끝이 lane 중간이라 다음 세그먼트 데이터가 이어지는 경우) 그 블록만 직접 계산한다.
+    chunk가 2의 거듭제곱이 아니면 블록마다 xor_reduce로 계산한다.
+    """
+    chunk = plan.chunk
+    total = len(fw)
+    view = memoryview(fw)
+    lanes = lane_xor(view, chunk) if chunk & (chunk - 1) == 0 else None
+
+    addr_frames = bytearray(5 * len(plan.blocks))
+    lens = bytearray(len(plan.blocks))
+    csums = bytearray(len(plan.blocks))
+    for i, (addr, off, length) in enumerate(plan.blocks):
+        ab = addr.to_bytes(4, "big")
+        j = 5 * i
+        addr_frames[j:j + 4] = ab
+        addr_frames[j + 4] = ab[0] ^ ab[1] ^ ab[2] ^ ab[3]
+        tail = min(chunk, total - off) - length
+        if lanes is not None and off % chunk == 0 \
+                and view[off + length:off + length + tail] == _FF[:tail]:
+            x = lanes[off // chunk]
+            if tail & 1:
+                x ^= 0xFF
+        else:
+            x = xor_reduce(view[off:off + length])
+        lens[i] = length - 1
+        csums[i] = (length - 1) ^ x
+    return FrameTable(plan, bytes(addr_frames), bytes(lens), bytes(csums))
+
+
+class WriteFrameEngine:
+    """한 포트에 묶인 Write Memory 송신기. 블록마다 새 버퍼를 만들지 않는다."""
+
+    def __init__(self, ser, wait_ack: Callable[[float], bool], pipelined: bool = False,
+                 metrics=None):
+        self._ser = ser
+        self._wait_ack = wait_ack
+        self._pipelined = pipelined
+        self._metrics = metrics
+        self._fd = _fileno(ser)
+        self._buf = bytearray(_OFF_DATA + WRITE_CHUNK + 1)
+        self._buf[0] = 0x31
+        self._buf[1] = 0xCE
+        self._view = memoryview(self._buf)
+        self._cmd_frame = self._view[0:_OFF_ADDR]
+        self._addr_frame = self._view[_OFF_ADDR:_OFF_LEN]
+        # 길이별 데이터 프레임/전체 프레임 뷰 (대부분 256 하나만 생긴다)
+        self._data_frames: Dict[int, memoryview] = {}
+        self._full_frames: Dict[int, memoryview] = {}
+
+    def load(self, addr: int, data) -> int:
+        """addr/data로 버퍼를 채운다. data는 bytes/memoryview (1..256B). 데이터 길이 반환."""
+        n = len(data)
+        if not 0 < n <= WRITE_CHUNK:
+            raise ValueError(f"invalid block length: {n}")
+        buf = self._buf
+        a0 = (addr >> 24) & 0xFF
+        a1 = (addr >> 16) & 0xFF
+        a2 = (addr >> 8) & 0xFF
+        a3 = addr & 0xFF
+        buf[2] = a0; buf[3] = a1; buf[4] = a2; buf[5] = a3
+        buf[6] = a0 ^ a1 ^ a2 ^ a3
+        buf[_OFF_LEN] = n - 1
+        buf[_OFF_DATA:_OFF_DATA + n] = data
+        buf[_OFF_DATA + n] = (n - 1) ^ xor_reduce(data)
+        return n
+
+    def load_prepared(self, table: FrameTable, i: int, data) -> int:
+        """사전 계산된 표의 i번째 블록으로 버퍼를 채운다 (checksum 계산 없음)."""
+        n = len(data)
+        buf = self._buf
+        j = 5 * i
+        buf[_OFF_ADDR:_OFF_LEN] = table.addr_frames[j:j + 5]
+        buf[_OFF_LEN] = table.lens[i]
+        buf[_OFF_DATA:_OFF_DATA + n] = data
+        buf[_OFF_DATA + n] = table.csums[i]
+        return n
+
+    def _data_frame(self, n: int) -> memoryview:
+        v = self._data_frames.get(n)
+        if v is None:
+            v = self._data_frames[n] = self._view[_OFF_LEN:_OFF_DATA + n + 1]
+        return v
+
+    def _full_frame(self, n: int) -> memoryview:
+        v = self._full_frames.get(n)
+        if v is None:
+            v = self._full_frames[n] = self._view[0:_OFF_DATA + n + 1]
+        return v
+
+    def _send(self, view: memoryview) -> None:
+        send_view(self._ser, self._fd, view)
+
+    def write_block(self, addr: int, data) -> bool:
+        """Write Memory 1블록 (CMD → ADDR → DATA, 각 ACK). 실패 시 False."""
+        return self._transmit(self.load(addr, data))
+
+    def write_prepared(self, table: FrameTable, i: int, data) -> bool:
+        """표의 i번째 블록 송신. data는 해당 블록 이미지 뷰."""
+        return self._transmit(self.load_prepared(table, i, data))
+
+    def _ack(self, stage: str, timeout_s: float, t0: float) -> bool:
+        ok = self._wait_ack(timeout_s)
+        if ok and self._metrics is not None:
+            self._metrics.observe_ack(stage, time.monotonic() - t0)
+        return ok
+
+    def _transmit(self, n: int) -> bool:
+        try:
+            if self._pipelined:
+                t0 = time.monotonic()
+                self._send(self._full_frame(n))
+                return (self._ack("cmd", ACK_TIMEOUT_CMD_S, t0)
+                        and self._ack("addr", ACK_TIMEOUT_ADDR_S, t0)
+                        and self._ack("data", ACK_TIMEOUT_DATA_S, t0))
+            t0 = time.monotonic()
+            self._send(self._cmd_frame)
+            if not self._ack("cmd", ACK_TIMEOUT_CMD_S, t0):
+                return False
+            t0 = time.monotonic()
+            self._send(self._addr_frame)
+            if not self._ack("addr", ACK_TIMEOUT_ADDR_S, t0):
+                return False
+            t0 = time.monotonic()
+            self._send(self._data_frame(n))
+            return self._ack("data", ACK_TIMEOUT_DATA_S, t0)
+        except OSError:
+            return False
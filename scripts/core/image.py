@@ -0,0 +1,246 @@
+# core/image.py
+#
+# 펌웨어 이미지 로더: BIN / Intel HEX / ELF → 절대 주소 세그먼트 목록.
+#
+# BIN은 base_addr부터 연속된 한 덩어리지만, HEX/ELF는 주소가 들어 있어
+# 빈 구간을 가질 수 있다 (예: 부트로더 + 플래시 끝 설정 페이지). 패딩된 BIN을
+# 만들지 않고 세그먼트만 erase/write 하도록, 로더는 다음을 돌려준다:
+#
+#   FirmwareImage.segments : [Segment(addr, data), ...]  (주소 오름차순, 겹침 없음)
+#   FirmwareImage.data     : 세그먼트를 WRITE_CHUNK 경계에 맞춰 이어 붙인 버퍼
+#   FirmwareImage.layout() : [(addr, offset, length), ...]  세그먼트 ↔ data 위치
+#
+# data 안에서 세그먼트 시작을 chunk 경계에 두므로 frame 표의 lane XOR 일괄
+# 계산(core/frame_engine.build_frame_table)이 그대로 적용된다. 세그먼트 사이
+# 빈칸은 0xFF로 채우며, 실제로 보내지는 않는다.
+#
+# 부트로더 write는 4바이트 정렬을 요구하므로 세그먼트 양 끝을 4바이트로
+# 넓혀 0xFF로 채우고, 넓힌 뒤 맞닿거나 겹치는 세그먼트는 하나로 합친다.
+import mmap
+import os
+import struct
+from typing import Dict, List, NamedTuple, Sequence, Tuple
+
+from core.write_plan import WRITE_ALIGN, WRITE_CHUNK
+
+IMAGE_EXTS = (".bin", ".hex", ".elf")
+
+ELF_MAGIC = b"\x7fELF"
+_PT_LOAD = 1
+
+
+class Segment(NamedTuple):
+    addr: int      # 절대 시작 주소
+    data: bytes
+
+
+class FirmwareImage:
+    """주소가 붙은 세그먼트 묶음 + write용 연속 버퍼."""
+
+    def __init__(self, segments: Sequence[Segment], fmt: str = "bin"):
+        self.fmt = fmt
+        self.segments = _normalize(segments)
+        if not self.segments:
+            raise ValueError("image has no data")
+        self._offsets: List[int] = []
+        buf = bytearray()
+        for seg in self.segments:
+            pad = -len(buf) % WRITE_CHUNK
+            buf += b"\xFF" * pad
+            self._offsets.append(len(buf))
+            buf += seg.data
+        self.data = bytes(buf)
+
+    @classmethod
+    def from_layout(cls, fmt: str, layout: Sequence[Tuple[int, int, int]],
+                    data) -> "FirmwareImage":
+        """
+        이미 배치된 버퍼(core/plan_cache의 mmap 등)로 이미지를 만든다. 복사 없음.
+        layout은 layout()과 같은 (addr, offset, length) 목록.
+        """
+        self = cls.__new__(cls)
+        self.fmt = fmt
+        view = memoryview(data)
+        self.segments = [Segment(a, view[o:o + n]) for a, o, n in layout]
+        self._offsets = [o for _a, o, _n in layout]
+        self.data = data
+        return self
+
+    @property
+    def start(self) -> int:
+        return self.segments[0].addr
+
+    @property
+    def end(self) -> int:
+        last = self.segments[-1]
+        return last.addr + len(last.data)
+
+    @property
+    def size(self) -> int:
+        """세그먼트 바이트 합 (빈 구간 제외)."""
+        return sum(len(s.data) for s in self.segments)
+
+    def spans(self) -> List[Tuple[int, int]]:
+        """[(addr, length), ...] — erase 범위."""
+        return [(s.addr, len(s.data)) for s in self.segments]
+
+    def layout(self) -> List[Tuple[int, int, int]]:
+        """[(addr, offset in data, length), ...]."""
+        return [(s.addr, off, len(s.data)) for s, off in zip(self.segments, self._offsets)]
+
+    def describe(self) -> str:
+        if len(self.segments) == 1:
+            return (f"{self.fmt.upper()} {self.size:,} bytes "
+                    f"@ 0x{self.start:08X}..0x{self.end:08X}")
+        return (f"{self.fmt.upper()} {len(self.segments)} segments, {self.size:,} bytes "
+                f"in 0x{self.start:08X}..0x{self.end:08X}")
+
+
+def _normalize(segments: Sequence[Segment]) -> List[Segment]:
+    """정렬 + 4바이트 정렬 패딩 + 인접 병합. 데이터가 겹치면 ValueError."""
+    segs = sorted((s for s in segments if s.data), key=lambda s: s.addr)
+    for a, b in zip(segs, segs[1:]):
+        if b.addr < a.addr + len(a.data):
+            raise ValueError(f"overlapping data at 0x{b.addr:08X}")
+    out: List[Tuple[int, bytearray]] = []
+    for addr, data in segs:
+        lo = addr - addr % WRITE_ALIGN
+        hi = addr + len(data)
+        hi += -hi % WRITE_ALIGN
+        if out and lo <= out[-1][0] + len(out[-1][1]):
+            start, buf = out[-1]
+            del buf[addr - start:]                       # 앞 세그먼트의 정렬 패딩
+            buf += b"\xFF" * (addr - start - len(buf))   # 또는 빈칸 채움
+            buf += data
+        else:
+            out.append((lo, bytearray(b"\xFF" * (addr - lo)) + data))
+        start, buf = out[-1]
+        buf += b"\xFF" * (hi - start - len(buf))
+    return [Segment(addr, bytes(buf)) for addr, buf in out]
+
+
+# ---------------- 로더 ----------------
+
+def load_bin(path: str, base_addr: int) -> FirmwareImage:
+    """
+    BIN은 파일을 mmap 해서 그대로 쓴다 (read()로 전체를 복사하지 않음).
+    주소/길이가 4바이트 정렬이 아니면 패딩이 필요하므로 읽어서 복사한다.
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size and not base_addr % WRITE_ALIGN and not size % WRITE_ALIGN:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            return FirmwareImage.from_layout("bin", [(base_addr, 0, size)], mm)
+        return FirmwareImage([Segment(base_addr, f.read())], "bin")
+
+
+def parse_hex(text: str) -> List[Segment]:
+    """Intel HEX 텍스트 → 세그먼트 (연속 레코드는 합침). 형식 오류는 ValueError."""
+    chunks: Dict[int, bytearray] = {}   # 시작 주소 → 연속 데이터
+    cur_start = cur_end = None
+    upper = 0
+    for lineno, line in enumerate(text.splitlines(), 1):
+        line = line.strip()
+        if not line:
+            continue
+        if line[0] != ":":
+            raise ValueError(f"line {lineno}: missing ':'")
+        try:
+            rec = bytes.fromhex(line[1:])
+        except ValueError:
+            raise ValueError(f"line {lineno}: bad hex digits") from None
+        if len(rec) < 5 or len(rec) != rec[0] + 5:
+            raise ValueError(f"line {lineno}: bad record length")
+        if sum(rec) & 0xFF:
+            raise ValueError(f"line {lineno}: checksum mismatch")
+        n, off, rtype, payload = rec[0], (rec[1] << 8) | rec[2], rec[3], rec[4:4 + rec[0]]
+        if rtype == 0x00:
+            addr = upper + off
+            if addr == cur_end:
+                chunks[cur_start] += payload
+            else:
+                if addr in chunks:
+                    raise ValueError(f"line {lineno}: duplicate address 0x{addr:08X}")
+                cur_start = addr
+                chunks[addr] = bytearray(payload)
+            cur_end = cur_start + len(chunks[cur_start])
+        elif rtype == 0x01:
+            break
+        elif rtype == 0x02 and n == 2:
+            upper = ((payload[0] << 8) | payload[1]) << 4
+        elif rtype == 0x04 and n == 2:
+            upper = ((payload[0] << 8) | payload[1]) << 16
+        elif rtype in (0x03, 0x05):
+            pass   # 시작 주소: flash에는 무관
+        else:
+            raise ValueError(f"line {lineno}: unsupported record type 0x{rtype:02X}")
+    return [Segment(a, bytes(d)) for a, d in chunks.items()]
+
+
+def load_hex(path: str) -> FirmwareImage:
+    with open(path, "r", encoding="ascii", errors="replace") as f:
+        return FirmwareImage(parse_hex(f.read()), "hex")
+
+
+def parse_elf(blob: bytes) -> List[Segment]:
+    """
+    ELF PT_LOAD 세그먼트 → 세그먼트 (파일에 내용이 있는 부분만).
+    주소는 물리 주소(p_paddr, LMA)를 쓴다: .data 초기값은 RAM이 아니라
+    플래시에 놓여야 하기 때문. .bss(p_filesz=0)는 건너뛴다.
+    """
+    if blob[:4] != ELF_MAGIC or len(blob) < 0x34:
+        raise ValueError("not an ELF file")
+    cls, enc = blob[4], blob[5]
+    if cls not in (1, 2) or enc not in (1, 2):
+        raise ValueError("unsupported ELF class/encoding")
+    e = "<" if enc == 1 else ">"
+    if cls == 1:
+        phoff, = struct.unpack_from(e + "I", blob, 0x1C)
+        phentsize, phnum = struct.unpack_from(e + "HH", blob, 0x2A)
+        ph_fmt = e + "IIIIII"       # type, offset, vaddr, paddr, filesz, memsz
+    else:
+        phoff, = struct.unpack_from(e + "Q", blob, 0x20)
+        phentsize, phnum = struct.unpack_from(e + "HH", blob, 0x36)
+        ph_fmt = e + "IIQQQQQ"      # type, flags, offset, vaddr, paddr, filesz, memsz
+    segs = []
+    for i in range(phnum):
+        base = phoff + i * phentsize
+        if base + struct.calcsize(ph_fmt) > len(blob):
+            raise ValueError("truncated program header table")
+        f = struct.unpack_from(ph_fmt, blob, base)
+        if cls == 1:
+            p_type, p_offset, _vaddr, p_paddr, p_filesz, _memsz = f
+        else:
+            p_type, _flags, p_offset, _vaddr, p_paddr, p_filesz, _memsz = f
+        if p_type != _PT_LOAD or p_filesz == 0:
+            continue
+        if p_offset + p_filesz > len(blob):
+            raise ValueError(f"segment {i} runs past end of file")
+        segs.append(Segment(p_paddr, blob[p_offset:p_offset + p_filesz]))
+    return segs
+
+
+def load_elf(path: str) -> FirmwareImage:
+    with open(path, "rb") as f:
+        return FirmwareImage(parse_elf(f.read()), "elf")
+
+
+def image_format(path: str) -> str:
+    """확장자로 'bin'/'hex'/'elf'. 모르는 확장자는 ValueError."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in IMAGE_EXTS:
+        raise ValueError(f"unsupported image type: {ext or path}")
+    return ext[1:]
+
+
+def load_firmware(path: str, base_addr: int) -> FirmwareImage:
+    """
+    경로의 이미지를 읽는다. base_addr는 BIN에만 쓰이고,
+    HEX/ELF는 파일에 적힌 절대 주소를 따른다.
+    """
+    fmt = image_format(path)
+    if fmt == "hex":
+        return load_hex(path)
+    if fmt == "elf":
+        return load_elf(path)
+    return load_bin(path, base_addr)
@@ -0,0 +1,134 @@
+# core/journal.py
+#
+# Flash 재개(resume) 저널.
+#
+# 블록 write가 두 번 실패하면 flash는 중단되고, 예전에는 처음부터 erase +
+# 전체 write를 다시 해야 했다. 포트별 저널에 다음을 남겨, 다음 실행(--resume)이
+# 재 SYNC 후 이어서 쓰게 한다:
+#
+#   key         이미지 + 계획 파라미터 키 (core/plan_cache.plan_key, 이미지 SHA-256 포함)
+#   pid         타깃 PID (다른 칩이면 재개하지 않음)
+#   erase       "mass" 또는 지울 페이지 목록, erased = 이미 지운 페이지
+#   erase_done  erase 완료 여부
+#   state       erasing → erased → writing → interrupted
+#   next_block  write plan에서 다음에 쓸 블록 번호 (그 앞은 모두 ACK 받음)
+#   last_acked  마지막으로 ACK 받은 블록 주소
+#
+# "writing"은 진행 위치를 모르는 상태다 (프로세스가 강제 종료됨). 이미 쓴
+# 워드를 다시 program 하면 STM32는 오류를 내므로 이 상태는 재개하지 않는다.
+# 실패/예외로 빠져나올 때만 정확한 위치와 함께 "interrupted"로 바꾼다.
+#
+# 같은 포트에 새 보드를 꽂고 --resume 하면 erase가 생략되어 잘못 구워진다.
+# 그래서 재개는 자동이 아니라 명시적으로만 한다.
+import json
+import os
+import time
+from typing import List, NamedTuple, Optional, Sequence
+
+ERASE_MASS_TAG = "mass"
+
+STATE_ERASING     = "erasing"
+STATE_ERASED      = "erased"
+STATE_WRITING     = "writing"
+STATE_INTERRUPTED = "interrupted"
+
+
+def journal_dir() -> str:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "firmware_uploader", "journal")
+
+
+class ResumePoint(NamedTuple):
+    erase_done: bool
+    erased: List[int]          # 이미 지운 페이지 (mass면 빈 목록)
+    next_block: int            # 0이면 write는 처음부터
+    last_acked: Optional[int]
+
+
+class FlashJournal:
+    """포트 하나의 저널 파일 (<포트 이름>.json)."""
+
+    def __init__(self, port: str):
+        self.path = os.path.join(journal_dir(), os.path.basename(port) + ".json")
+        self._data: dict = {}
+
+    # ---------- 읽기 ----------
+    def load(self) -> Optional[dict]:
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def resumable(self) -> bool:
+        """이미지/타깃 확인 전, 재개할 만한 저널이 남아 있는지 (GUI 안내용)."""
+        d = self.load()
+        return bool(d) and d.get("state") in (STATE_ERASING, STATE_ERASED, STATE_INTERRUPTED)
+
+    def resume_point(self, key: bytes, pid: Optional[int]) -> Optional[ResumePoint]:
+        """같은 이미지/타깃이고 재개 가능한 상태면 ResumePoint, 아니면 None."""
+        d = self.load()
+        if not d or d.get("key") != key.hex() or d.get("pid") != pid:
+            return None
+        state = d.get("state")
+        if state == STATE_WRITING:
+            return None   # 위치를 모름 — 위 설명 참고
+        if state not in (STATE_ERASING, STATE_ERASED, STATE_INTERRUPTED):
+            return None
+        self._data = d
+        erase_done = bool(d.get("erase_done"))
+        return ResumePoint(
+            erase_done=erase_done,
+            erased=[int(p) for p in d.get("erased", [])],
+            next_block=int(d.get("next_block", 0)) if erase_done else 0,
+            last_acked=d.get("last_acked"),
+        )
+
+    # ---------- 기록 ----------
+    def begin(self, key: bytes, pid: Optional[int], erase_pages: Optional[Sequence[int]],
+              erased: Sequence[int] = ()) -> None:
+        """erase 시작. erase_pages=None이면 mass erase."""
+        self._data = {
+            "key": key.hex(), "pid": pid,
+            "erase": ERASE_MASS_TAG if erase_pages is None else list(erase_pages),
+            "erased": list(erased), "erase_done": False,
+            "state": STATE_ERASING, "next_block": 0, "last_acked": None,
+        }
+        self._save()
+
+    def erased(self, pages: Sequence[int]) -> None:
+        self._data["erased"] = sorted(set(self._data.get("erased", [])) | set(pages))
+        self._save()
+
+    def erase_complete(self) -> None:
+        self._data.update(erase_done=True, state=STATE_ERASED)
+        self._save()
+
+    def writing(self) -> None:
+        self._data["state"] = STATE_WRITING
+        self._save()
+
+    def interrupted(self, next_block: int, last_acked: Optional[int]) -> None:
+        """write 중단: next_block 앞의 블록은 모두 ACK를 받았다."""
+        self._data.update(state=STATE_INTERRUPTED, next_block=next_block,
+                          last_acked=last_acked)
+        self._save()
+
+    def clear(self) -> None:
+        self._data = {}
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def _save(self) -> None:
+        """원자적 교체. 실패는 무시 (flash 자체에는 영향 없음)."""
+        self._data["updated"] = time.time()
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(self._data, f, indent=2)
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
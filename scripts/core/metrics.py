@@ -0,0 +1,222 @@
+# core/metrics.py
+#
+# flash 한 번의 계측: 어디서 시간이 쓰였는지 보드별로 남긴다.
+#
+#   phases      port_open / sync / get_id / delta / erase / prep_wait / write (초)
+#   sync_ack_s  SYNC(0x7F) 첫 송신 → 첫 ACK/NACK 까지
+#   reset_ack_s 진입 시퀀스 NRST 해제 → 첫 ACK/NACK (core/entry.py, 진입+SYNC 통합 시)
+#   ack_latency write 프레임 단계별(cmd/addr/data) 송신 → ACK 왕복 히스토그램
+#   retries     주소별 재시도 횟수
+#   bytes       image / written / skipped, write 구간 유효 bytes/s
+#
+# 출력은 JSON(dict)과 Prometheus text format (node_exporter textfile collector
+# 등에서 그대로 읽을 수 있게). GUI 워커와 headless 양쪽이 같은 객체를 쓴다.
+#
+# 프레임당 비용은 monotonic() 두 번 + 버킷 탐색(bisect) 하나 — 계측을 켜도
+# 프레임 왕복(수백 µs~ms)에 비해 무시할 만하다.
+import bisect
+import json
+import os
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence
+
+# ACK 왕복 히스토그램 상한 (초). 마지막 +Inf는 암묵적.
+ACK_BUCKETS_S = (0.0002, 0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0)
+
+ACK_STAGES = ("cmd", "addr", "data")
+
+
+class Histogram:
+    """누적 버킷 히스토그램 (Prometheus histogram과 같은 의미)."""
+
+    def __init__(self, bounds: Sequence[float] = ACK_BUCKETS_S):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)   # 마지막 = +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, v: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, v)] += 1
+        self.count += 1
+        self.sum += v
+        if v > self.max:
+            self.max = v
+
+    def quantile(self, q: float) -> Optional[float]:
+        """버킷 상한 기준 근사 분위수. 관측이 없으면 None."""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= rank:
+                return self.bounds[i] if i < len(self.bounds) else self.max
+        return self.max
+
+    def cumulative(self) -> List[int]:
+        out, acc = [], 0
+        for c in self.counts:
+            acc += c
+            out.append(acc)
+        return out
+
+    def to_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "sum_s": round(self.sum, 6),
+            "mean_s": round(self.sum / self.count, 6) if self.count else None,
+            "p50_s": self.quantile(0.5),
+            "p99_s": self.quantile(0.99),
+            "max_s": round(self.max, 6),
+            "buckets": {("+Inf" if i == len(self.bounds) else f"{b:g}"): n
+                        for i, (b, n) in enumerate(zip(self.bounds + (None,), self.cumulative()))},
+        }
+
+
+class FlashMetrics:
+    """
+    flash/readout 한 번의 계측 (그 앞의 포트 열기/SYNC 포함). Bootloader가 실행마다
+    새로 만들고, BootloaderSerial / SerialWorker는 bl.metrics로 현재 것을 읽는다.
+    """
+
+    def __init__(self, port: str = ""):
+        self.port = port
+        self.baud = 0
+        self.phases: Dict[str, float] = {}
+        self.sync_ack_s: Optional[float] = None
+        self.reset_ack_s: Optional[float] = None
+        self.ack_latency = {s: Histogram() for s in ACK_STAGES}
+        self.retries: Dict[int, int] = {}
+        self.image_bytes = 0
+        self.written_bytes = 0
+        self.skipped_bytes = 0
+        self.ok: Optional[bool] = None
+
+    # ---------- 기록 ----------
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """with 블록 시간을 phases[name]에 더한다 (재시도로 여러 번 들어와도 합산)."""
+        t0 = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add_phase(name, time.monotonic() - t0)
+
+    def add_phase(self, name: str, seconds: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def observe_ack(self, stage: str, seconds: float) -> None:
+        self.ack_latency[stage].observe(seconds)
+
+    def note_sync(self, seconds: float) -> None:
+        """첫 SYNC 응답까지 시간. 세션 중 가장 최근 값을 남긴다."""
+        self.sync_ack_s = seconds
+
+    def note_entry(self, seconds: float) -> None:
+        """NRST 해제 → 첫 SYNC 응답 (time-to-first-ACK)."""
+        self.reset_ack_s = seconds
+
+    def note_retry(self, addr: int) -> None:
+        self.retries[addr] = self.retries.get(addr, 0) + 1
+
+    # ---------- 파생 값 ----------
+    @property
+    def bytes_per_s(self) -> Optional[float]:
+        t = self.phases.get("write")
+        return self.written_bytes / t if t else None
+
+    # ---------- 출력 ----------
+    def to_dict(self) -> dict:
+        bps = self.bytes_per_s
+        return {
+            "port": self.port,
+            "baud": self.baud,
+            "ok": self.ok,
+            "phases_s": {k: round(v, 6) for k, v in self.phases.items()},
+            "sync_ack_s": None if self.sync_ack_s is None else round(self.sync_ack_s, 6),
+            "reset_ack_s": None if self.reset_ack_s is None else round(self.reset_ack_s, 6),
+            "ack_latency": {s: h.to_dict() for s, h in self.ack_latency.items()},
+            "retries": {f"0x{a:08X}": n for a, n in sorted(self.retries.items())},
+            "retries_total": sum(self.retries.values()),
+            "image_bytes": self.image_bytes,
+            "written_bytes": self.written_bytes,
+            "skipped_bytes": self.skipped_bytes,
+            "bytes_per_s": None if bps is None else round(bps, 1),
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self, prefix: str = "fw_uploader") -> str:
+        """Prometheus text exposition format (0.0.4)."""
+        lbl = f'port="{_escape(self.port)}"'
+        out: List[str] = []
+
+        def metric(name, mtype, help_text, samples):
+            out.append(f"# HELP {prefix}_{name} {help_text}")
+            out.append(f"# TYPE {prefix}_{name} {mtype}")
+            for suffix, labels, value in samples:
+                out.append(f"{prefix}_{name}{suffix}{{{labels}}} {_num(value)}")
+
+        metric("phase_seconds", "gauge", "Wall time per flash phase.",
+               [("", f'{lbl},phase="{p}"', v) for p, v in self.phases.items()])
+        if self.sync_ack_s is not None:
+            metric("sync_ack_seconds", "gauge", "SYNC first send to first ACK/NACK.",
+                   [("", lbl, self.sync_ack_s)])
+        if self.reset_ack_s is not None:
+            metric("reset_ack_seconds", "gauge", "NRST release to first SYNC ACK/NACK.",
+                   [("", lbl, self.reset_ack_s)])
+        samples = []
+        for stage, h in self.ack_latency.items():
+            sl = f'{lbl},stage="{stage}"'
+            for b, n in zip(h.bounds + (None,), h.cumulative()):
+                le = "+Inf" if b is None else f"{b:g}"
+                samples.append(("_bucket", f'{sl},le="{le}"', n))
+            samples.append(("_sum", sl, h.sum))
+            samples.append(("_count", sl, h.count))
+        metric("ack_latency_seconds", "histogram",
+               "Write frame send to ACK round trip per stage.", samples)
+        metric("retries_total", "counter", "Write block retries.",
+               [("", lbl, sum(self.retries.values()))])
+        metric("bytes", "gauge", "Image/written/skipped bytes of the last flash.",
+               [("", f'{lbl},kind="image"', self.image_bytes),
+                ("", f'{lbl},kind="written"', self.written_bytes),
+                ("", f'{lbl},kind="skipped"', self.skipped_bytes)])
+        if self.bytes_per_s is not None:
+            metric("write_bytes_per_second", "gauge", "Effective write throughput.",
+                   [("", lbl, self.bytes_per_s)])
+        if self.ok is not None:
+            metric("success", "gauge", "1 if the last flash succeeded.",
+                   [("", lbl, int(self.ok))])
+        return "\n".join(out) + "\n"
+
+
+def _escape(v: str) -> str:
+    return v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _num(v) -> str:
+    if isinstance(v, float):
+        return repr(round(v, 9))
+    return str(v)
+
+
+def export(metrics: FlashMetrics, directory: str, stem: str = "") -> List[str]:
+    """
+    directory에 <stem>.json 과 <stem>.prom 을 쓴다 (원자적 교체).
+    stem 기본값은 포트 이름 (예: ttyS0). 쓴 경로 목록 반환.
+    """
+    stem = stem or os.path.basename(metrics.port) or "flash"
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for ext, text in ((".json", metrics.to_json() + "\n"), (".prom", metrics.to_prometheus())):
+        path = os.path.join(directory, stem + ext)
+        tmp = path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(text)
+        os.replace(tmp, path)
+        paths.append(path)
+    return paths
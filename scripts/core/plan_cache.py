@@ -0,0 +1,200 @@
+# core/plan_cache.py
+#
+# 준비된 flash 계획(이미지 세그먼트 + write plan + frame 표)의 디스크 캐시.
+#
+# 같은 릴리스를 수백 대에 굽는 경우, 매번 파일을 읽고(HEX/ELF는 파싱까지)
+# write plan과 프레임 checksum을 다시 계산할 이유가 없다. 키는 이미지 파일
+# 내용의 SHA-256 + 계획 파라미터(형식, base 주소, chunk, 0xFF 생략 여부)이고,
+# 항목 하나는 파일 하나다:
+#
+#   header   <4sHHII4sIIIII> magic, version, chunk, flags, _, fmt,
+#            n_segments, n_blocks, image_bytes, total_frames, data_len
+#   key      32B   (파일 이름과 같은 digest, 충돌/손상 확인용)
+#   segments n_segments × <III>  addr, offset, length
+#   blocks   n_blocks × <III>    addr, offset, length
+#   frames   5·n_blocks (addr+XOR) | n_blocks (N-1) | n_blocks (checksum)
+#   (0xFF 패딩으로 8바이트 정렬)
+#   data     data_len  (FirmwareImage.data 그대로)
+#
+# 읽을 때는 mmap 한 번으로 끝나고, 프레임 표와 이미지 데이터는 mmap 위의
+# memoryview를 그대로 쓴다 (복사 없음). 블록 목록만 struct로 풀어 WriteBlock을
+# 만든다.
+#
+# 크기 제한: 항목 합이 PLAN_CACHE_MAX_BYTES를 넘으면 가장 오래 쓰지 않은
+# 것부터 지운다 (LRU, 적중 시 mtime을 갱신). 캐시 실패는 항상 무시하고 일반
+# 준비 경로로 돌아간다 — flash 결과에 영향을 주지 않는다.
+#
+# erase 섹터 목록은 저장하지 않는다: 타깃 PID를 알아야 정해지고, 세그먼트
+# 범위에서 레이아웃으로 매핑하는 비용은 무시할 만하다.
+import hashlib
+import mmap
+import os
+import struct
+import threading
+from typing import List, Optional
+
+from core.frame_engine import FrameTable
+from core.image import FirmwareImage, image_format
+from core.write_plan import WRITE_CHUNK, WriteBlock, WritePlan
+
+PLAN_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+_MAGIC   = b"FUPC"
+_VERSION = 1
+_HEADER  = struct.Struct("<4sHHII4sIIIII")
+_TRIPLE  = struct.Struct("<III")
+_KEY_LEN = 32
+_SUFFIX  = ".plan"
+
+_FLAG_SKIP_ERASED = 0x1
+
+
+def cache_dir() -> str:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "firmware_uploader", "plans")
+
+
+def file_digest(path: str) -> bytes:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.digest()
+
+
+def plan_key(path: str, base_addr: int, chunk: int = WRITE_CHUNK,
+             skip_erased: bool = True) -> bytes:
+    """이미지 내용 + 계획 파라미터 → 32B 키. 읽기 실패는 OSError."""
+    h = hashlib.sha256(file_digest(path))
+    fmt = image_format(path)
+    # BIN만 base_addr에 따라 결과가 달라진다 (HEX/ELF는 파일의 절대 주소)
+    base = base_addr if fmt == "bin" else 0
+    h.update(f"{_VERSION}:{fmt}:{base:08X}:{chunk}:{int(skip_erased)}".encode())
+    return h.digest()
+
+
+def _entry_path(key: bytes) -> str:
+    return os.path.join(cache_dir(), key.hex() + _SUFFIX)
+
+
+class CachedPlan:
+    """캐시 항목을 mmap으로 연 결과."""
+
+    def __init__(self, image: FirmwareImage, plan: WritePlan, table: FrameTable):
+        self.image = image
+        self.plan = plan
+        self.table = table
+
+
+def load(key: bytes) -> Optional[CachedPlan]:
+    """적중이면 CachedPlan, 없거나 손상됐으면 None (손상 항목은 지운다)."""
+    path = _entry_path(key)
+    try:
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    try:
+        entry = _decode(mm, key)
+    except (ValueError, struct.error):
+        entry = None
+    if entry is None:
+        try:
+            mm.close()
+        except BufferError:
+            pass
+        _remove(path)
+        return None
+    try:
+        os.utime(path)   # LRU: 마지막 사용 시각
+    except OSError:
+        pass
+    return entry
+
+
+def _decode(mm, key: bytes) -> Optional[CachedPlan]:
+    (magic, version, chunk, _flags, _rsv, fmt, n_seg, n_blk,
+     image_bytes, total_frames, data_len) = _HEADER.unpack_from(mm, 0)
+    if magic != _MAGIC or version != _VERSION:
+        return None
+    pos = _HEADER.size
+    if mm[pos:pos + _KEY_LEN] != key:
+        return None
+    pos += _KEY_LEN
+    layout = [t for t in _TRIPLE.iter_unpack(mm[pos:pos + n_seg * _TRIPLE.size])]
+    pos += n_seg * _TRIPLE.size
+    blocks = [WriteBlock(*t) for t in _TRIPLE.iter_unpack(mm[pos:pos + n_blk * _TRIPLE.size])]
+    pos += n_blk * _TRIPLE.size
+    view = memoryview(mm)
+    addr_frames = view[pos:pos + 5 * n_blk]; pos += 5 * n_blk
+    lens = view[pos:pos + n_blk]; pos += n_blk
+    csums = view[pos:pos + n_blk]; pos += n_blk
+    pos += -pos % 8
+    if pos + data_len != len(mm):
+        return None
+    data = view[pos:pos + data_len]
+
+    image = FirmwareImage.from_layout(fmt.rstrip(b"\0").decode(), layout, data)
+    plan = WritePlan(blocks, image_bytes, total_frames, chunk)
+    return CachedPlan(image, plan, FrameTable(plan, addr_frames, lens, csums))
+
+
+def store(key: bytes, image: FirmwareImage, plan: WritePlan, table: FrameTable,
+          skip_erased: bool = True, max_bytes: int = PLAN_CACHE_MAX_BYTES) -> None:
+    """항목 기록 후 크기 제한 적용. 쓰기 실패는 무시."""
+    layout = image.layout()
+    out = bytearray(_HEADER.pack(
+        _MAGIC, _VERSION, plan.chunk, _FLAG_SKIP_ERASED if skip_erased else 0, 0,
+        image.fmt.encode()[:4], len(layout), len(plan.blocks),
+        plan.image_bytes, plan.total_frames, len(image.data)))
+    out += key
+    for t in layout:
+        out += _TRIPLE.pack(*t)
+    for b in plan.blocks:
+        out += _TRIPLE.pack(*b)
+    out += table.addr_frames
+    out += table.lens
+    out += table.csums
+    out += b"\xFF" * (-len(out) % 8)
+    out += image.data
+
+    path = _entry_path(key)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(out)
+        os.replace(tmp, path)
+    except OSError:
+        return
+    evict(max_bytes)
+
+
+def evict(max_bytes: int = PLAN_CACHE_MAX_BYTES) -> List[str]:
+    """항목 합이 max_bytes 이하가 될 때까지 오래된 것부터 지운다. 지운 경로 반환."""
+    entries = []
+    try:
+        with os.scandir(cache_dir()) as it:
+            for e in it:
+                if e.name.endswith(_SUFFIX):
+                    st = e.stat()
+                    entries.append((st.st_mtime, st.st_size, e.path))
+    except OSError:
+        return []
+    total = sum(size for _t, size, _p in entries)
+    removed = []
+    for _mtime, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if _remove(path):
+            total -= size
+            removed.append(path)
+    return removed
+
+
+def _remove(path: str) -> bool:
+    try:
+        os.remove(path)
+        return True
+    except OSError:
+        return False
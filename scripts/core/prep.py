@@ -0,0 +1,137 @@
+# core/prep.py
+#
+# Write 준비(이미지 로드 → write plan → frame table)를 백그라운드 스레드로
+# 돌려 erase ACK 대기와 겹친다.
+#
+# erase는 부트로더 쪽에서 수 초~20초 걸리고, 그동안 호스트는 read()에서
+# 블록(GIL 해제)돼 있다. 준비 작업을 그 시간에 끝내 두면 erase ACK가 오는
+# 즉시 첫 write 프레임을 보낼 수 있다.
+#
+# 파일 경로로 시작하면(prepare_file) 먼저 core/plan_cache를 본다. 같은 이미지 +
+# 같은 파라미터로 준비한 적이 있으면 mmap 한 번으로 끝나고 스레드도 띄우지 않는다.
+import threading
+import time
+from typing import Optional, Sequence, Tuple, Union
+
+from core import plan_cache
+from core.frame_engine import FrameTable, build_frame_table
+from core.image import FirmwareImage, Segment, load_firmware
+from core.write_plan import WritePlan, plan_segments
+
+Source = Union[str, bytes, FirmwareImage]
+
+
+def _as_image(source: Source, base_addr: int) -> FirmwareImage:
+    if isinstance(source, FirmwareImage):
+        return source
+    if isinstance(source, str):
+        return load_firmware(source, base_addr)
+    return FirmwareImage([Segment(base_addr, source)])
+
+
+class Prepared:
+    """준비 결과: 이미지, write plan, 사전 계산 프레임 표."""
+
+    def __init__(self, image: FirmwareImage, plan: WritePlan, table: FrameTable,
+                 prep_s: float, cached: bool = False):
+        self.image = image
+        self.fw = image.data   # plan 블록 offset이 가리키는 버퍼
+        self.plan = plan
+        self.table = table
+        self.prep_s = prep_s   # 준비에 걸린 시간 (백그라운드)
+        self.cached = cached   # plan_cache 적중
+
+
+class PrepJob:
+    """prepare_async가 돌려주는 핸들. result()에서 준비 완료를 기다린다."""
+
+    def __init__(self, source: Source, base_addr: int, skip_erased: bool,
+                 spans: Optional[Sequence[Tuple[int, int]]],
+                 cache_key: Optional[bytes] = None):
+        self._source = source
+        self._base_addr = base_addr
+        self._skip_erased = skip_erased
+        self._spans = spans
+        self._cache_key = cache_key   # 있으면 준비 결과를 plan_cache에 저장
+        self._result: Optional[Prepared] = None
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._run, name="flash-prep", daemon=True)
+        # 이미지가 이미 메모리에 있으면 바로 보인다 (erase 범위 계산용)
+        self.image = source if isinstance(source, FirmwareImage) else None
+        self.key: Optional[bytes] = None   # prepare_file이 채움
+
+    @classmethod
+    def ready(cls, prepared: Prepared) -> "PrepJob":
+        """이미 준비된 결과(캐시 적중)를 감싼 완료 상태 핸들."""
+        job = cls(prepared.image, 0, True, None)
+        job._result = prepared
+        return job
+
+    def _run(self):
+        t0 = time.monotonic()
+        try:
+            image = _as_image(self._source, self._base_addr)
+            plan = plan_segments(image.data, image.layout(), skip_erased=self._skip_erased)
+            if self._spans is not None:
+                plan = plan.within(self._spans)
+            table = build_frame_table(image.data, plan)
+            self._result = Prepared(image, plan, table, time.monotonic() - t0)
+            if self._cache_key is not None:
+                plan_cache.store(self._cache_key, image, plan, table, self._skip_erased)
+        except BaseException as e:   # 호출 스레드에서 다시 올린다
+            self._error = e
+
+    def start(self) -> "PrepJob":
+        self._thread.start()
+        return self
+
+    @property
+    def cached(self) -> bool:
+        """plan_cache 적중으로 준비 없이 끝났는지."""
+        return self._result is not None and self._result.cached
+
+    def done(self) -> bool:
+        return self._result is not None or not self._thread.is_alive()
+
+    def result(self, timeout: Optional[float] = None) -> Prepared:
+        """준비 완료까지 대기. 실패했으면 그 예외, 시간 초과면 TimeoutError."""
+        if self._result is not None:   # 캐시 저장이 아직 돌고 있어도 기다리지 않는다
+            return self._result
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            raise TimeoutError("image preparation still running")
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+
+def prepare_async(source: Source, base_addr: int, skip_erased: bool = True,
+                  spans: Optional[Sequence[Tuple[int, int]]] = None) -> PrepJob:
+    """
+    source(이미지 경로, 이미 읽은 BIN bytes 또는 FirmwareImage)의 write 준비를
+    백그라운드로 시작한다. base_addr는 BIN에만 쓰인다.
+    spans가 있으면 그 범위(delta dirty 섹터)와 겹치는 블록만 남긴다.
+    """
+    return PrepJob(source, base_addr, skip_erased, spans).start()
+
+
+def prepare_file(path: str, base_addr: int, skip_erased: bool = True,
+                 use_cache: bool = True) -> PrepJob:
+    """
+    이미지 파일의 write 준비. plan_cache 적중이면 완료된 핸들을 바로 돌려주고,
+    아니면 파일을 읽어(job.image) 백그라운드 준비 후 캐시에 저장한다.
+    job.key는 이미지 + 계획 파라미터 키 (resume 저널에서도 쓴다).
+    파일 읽기/형식 오류는 ValueError/OSError로 바로 올라온다.
+    """
+    t0 = time.monotonic()
+    key = plan_cache.plan_key(path, base_addr, skip_erased=skip_erased)
+    hit = plan_cache.load(key) if use_cache else None
+    if hit is not None:
+        job = PrepJob.ready(Prepared(hit.image, hit.plan, hit.table,
+                                     time.monotonic() - t0, cached=True))
+    else:
+        image = load_firmware(path, base_addr)
+        job = PrepJob(image, base_addr, skip_erased, None,
+                      cache_key=key if use_cache else None).start()
+    job.key = key
+    return job
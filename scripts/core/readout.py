@@ -0,0 +1,260 @@
+# core/readout.py
+#
+# 플래시 readout: Read Memory(0x11)로 주소 범위를 256B 프레임씩 읽어 파일로.
+# 현장 반품 보드 덤프, flash 전 롤백 이미지(backup)용.
+#
+#   ReadFrameEngine  CMD / ADDR / N 프레임 9바이트를 재사용 버퍼 하나에 배치하고
+#                    응답 데이터는 호출자가 준 memoryview에 바로 읽는다 (프레임마다
+#                    새 bytes 없음). pipelined=True면 세 프레임을 한 번에 보내고 ACK
+#                    3개 + 데이터를 이어 받는다 (frame_engine의 write와 같은 조건).
+#   dump()           프레임을 64 KiB 스테이징 버퍼에 모아 파일에 쓴다 (파일 write는
+#                    64 KiB마다 한 번). 프레임은 retries번까지 다시 읽는다.
+#
+# 재개: 출력 파일 옆 사이드카(<파일>.part.json)에 범위/PID/파일에 확정된 바이트 수를
+# 남긴다. 스테이징 버퍼를 비울 때마다, 그리고 실패/취소로 빠져나갈 때 갱신하고,
+# 다 읽으면 지운다. resume=True이고 사이드카가 같은 범위/PID면 파일을 확정된 길이로
+# 자른 뒤 그 다음 주소부터 읽는다. 강제 종료돼도 사이드카 값은 파일보다 짧을 뿐
+# 틀리지 않는다.
+#
+# RDP(읽기 보호)가 걸린 타깃은 Read Memory 명령 자체에 NACK을 준다 — 재시도 후에도
+# 그러면 오류에 그 가능성을 적는다.
+import json
+import os
+import time
+from typing import Callable, NamedTuple, Optional
+
+from core.ack_reader import ACK_NACK, ACK_OK
+from core.frame_engine import _fileno, send_view
+
+READ_CHUNK = 256               # Read Memory 최대 길이
+STAGE_BYTES = 64 * 1024        # 파일 write / 사이드카 갱신 단위
+READ_RETRIES = 2               # 프레임당 추가 시도
+
+ACK_TIMEOUT_S  = 0.8
+DATA_TIMEOUT_S = 1.0
+
+_SIDECAR = ".part.json"
+
+
+class ReadoutError(RuntimeError):
+    """readout 실패. done = 파일에 확정된 바이트 수 (resume 지점)."""
+
+    def __init__(self, msg: str, done: int):
+        super().__init__(msg)
+        self.done = done
+
+
+class ReadoutResult(NamedTuple):
+    bytes_read: int       # 이번 실행에서 읽은 바이트
+    resumed_from: int     # 재개 시작 오프셋 (0이면 처음부터)
+    retries: int
+    seconds: float
+
+
+class ReadFrameEngine:
+    """한 포트에 묶인 Read Memory 송신기 + 수신기."""
+
+    def __init__(self, ser, acks, pipelined: bool = False):
+        self._ser = ser
+        self._acks = acks
+        self._pipelined = pipelined
+        self._fd = _fileno(ser)
+        self._buf = bytearray(b"\x11\xEE" + bytes(7))
+        self._view = memoryview(self._buf)
+        self.last_error = ""
+
+    def _load(self, addr: int, n: int) -> None:
+        buf = self._buf
+        a0 = (addr >> 24) & 0xFF
+        a1 = (addr >> 16) & 0xFF
+        a2 = (addr >> 8) & 0xFF
+        a3 = addr & 0xFF
+        buf[2] = a0; buf[3] = a1; buf[4] = a2; buf[5] = a3
+        buf[6] = a0 ^ a1 ^ a2 ^ a3
+        buf[7] = n - 1
+        buf[8] = (n - 1) ^ 0xFF
+
+    def _ack(self, stage: str) -> bool:
+        r = self._acks.wait(ACK_TIMEOUT_S)
+        if r == ACK_OK:
+            return True
+        self.last_error = f"{stage} {'NACK' if r == ACK_NACK else 'timeout'}"
+        return False
+
+    def read_into(self, addr: int, out: memoryview) -> bool:
+        """out(1..256B)을 addr부터 채운다. 실패 시 False (사유는 last_error)."""
+        n = len(out)
+        if not 0 < n <= READ_CHUNK:
+            raise ValueError(f"invalid read length: {n}")
+        self._load(addr, n)
+        v = self._view
+        try:
+            if self._pipelined:
+                send_view(self._ser, self._fd, v)
+                if not (self._ack("cmd") and self._ack("addr") and self._ack("len")):
+                    return False
+            else:
+                send_view(self._ser, self._fd, v[0:2])
+                if not self._ack("cmd"):
+                    return False
+                send_view(self._ser, self._fd, v[2:7])
+                if not self._ack("addr"):
+                    return False
+                send_view(self._ser, self._fd, v[7:9])
+                if not self._ack("len"):
+                    return False
+            got = self._acks.read_into(out, DATA_TIMEOUT_S)
+        except OSError as e:
+            self.last_error = str(e)
+            return False
+        if got != n:
+            self.last_error = f"data short ({got}/{n})"
+            return False
+        return True
+
+    def read_retry(self, addr: int, out: memoryview, retries: int = READ_RETRIES,
+                   on_retry: Optional[Callable[[int, str], None]] = None) -> bool:
+        """read_into + 실패 시 retries번 더. on_retry(addr, 사유)는 재시도마다."""
+        for attempt in range(retries + 1):
+            if self.read_into(addr, out):
+                return True
+            self.recover()
+            if attempt < retries and on_retry is not None:
+                on_retry(addr, self.last_error)
+        return False
+
+    def recover(self) -> None:
+        """실패한 프레임 뒤: 늦게 온 바이트가 다음 응답에 섞이지 않게."""
+        time.sleep(0.05)
+        try:
+            self._ser.reset_input_buffer()
+        except Exception:
+            pass
+
+
+# ---------------- 사이드카 ----------------
+
+def sidecar_path(path: str) -> str:
+    return path + _SIDECAR
+
+
+def _load_sidecar(path: str) -> Optional[dict]:
+    try:
+        with open(sidecar_path(path), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_sidecar(path: str, addr: int, size: int, pid: Optional[int], done: int) -> None:
+    tmp = sidecar_path(path) + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"addr": addr, "size": size, "pid": pid, "done": done,
+                   "updated": time.time()}, f)
+    os.replace(tmp, sidecar_path(path))
+
+
+def resumable(path: str) -> bool:
+    """path에 대한 중단된 덤프(사이드카)가 남아 있는지."""
+    return _load_sidecar(path) is not None
+
+
+def backup_dir() -> str:
+    """flash 전 backup 기본 위치 ($XDG_DATA_HOME/firmware_uploader/backup)."""
+    base = os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share")
+    return os.path.join(base, "firmware_uploader", "backup")
+
+
+def default_backup_path(port: str, directory: Optional[str] = None) -> str:
+    """<directory>/<포트이름>-<YYYYmmdd-HHMMSS>.bin (디렉터리는 만들어 둔다)."""
+    directory = directory or backup_dir()
+    os.makedirs(directory, exist_ok=True)
+    name = os.path.basename(port) or "port"
+    return os.path.join(directory, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.bin")
+
+
+def resume_offset(path: str, addr: int, size: int, pid: Optional[int]) -> int:
+    """같은 범위/PID의 중단된 덤프가 있으면 이어 읽을 오프셋, 아니면 0."""
+    meta = _load_sidecar(path)
+    if not meta or meta.get("addr") != addr or meta.get("size") != size \
+            or meta.get("pid") != pid:
+        return 0
+    done = int(meta.get("done", 0))
+    try:
+        if os.path.getsize(path) < done:
+            return 0
+    except OSError:
+        return 0
+    return max(0, min(done, size))
+
+
+# ---------------- 덤프 ----------------
+
+def dump(engine: ReadFrameEngine, path: str, addr: int, size: int, *,
+         pid: Optional[int] = None, resume: bool = False, retries: int = READ_RETRIES,
+         progress: Optional[Callable[[int, int], None]] = None,
+         check: Optional[Callable[[], None]] = None,
+         on_retry: Optional[Callable[[int, str], None]] = None) -> ReadoutResult:
+    """
+    [addr, addr+size)를 path로. check()는 프레임 사이마다 불린다 (취소 지점 —
+    예외를 던지면 그때까지 읽은 것을 확정하고 사이드카를 남긴 뒤 그대로 전파).
+    실패하면 ReadoutError (done = 재개 지점).
+    """
+    if size <= 0:
+        raise ValueError("readout size must be > 0")
+    start = resume_offset(path, addr, size, pid) if resume else 0
+    stage = bytearray(min(STAGE_BYTES, size))
+    sv = memoryview(stage)
+    done = start      # 파일에 확정된 바이트
+    fill = 0          # 스테이징 버퍼에 읽어 둔 바이트
+    retried = 0
+    t0 = time.monotonic()
+
+    def retry(a: int, why: str) -> None:
+        nonlocal retried
+        retried += 1
+        if on_retry is not None:
+            on_retry(a, why)
+
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT, 0o644)
+    with os.fdopen(fd, "wb") as f:
+        f.truncate(done)
+        f.seek(done)
+        _save_sidecar(path, addr, size, pid, done)
+
+        def commit() -> None:
+            nonlocal done, fill
+            if fill:
+                f.write(sv[:fill])
+                f.flush()
+                done += fill
+                fill = 0
+            _save_sidecar(path, addr, size, pid, done)
+
+        try:
+            while done + fill < size:
+                if check is not None:
+                    check()
+                cur = addr + done + fill
+                n = min(READ_CHUNK, size - done - fill, len(stage) - fill)
+                out = sv[fill:fill + n]
+                if not engine.read_retry(cur, out, retries, retry):
+                    hint = " — read protection?" if engine.last_error == "cmd NACK" else ""
+                    raise ReadoutError(f"read failed @0x{cur:08X} ({engine.last_error}{hint})",
+                                       done + fill)
+                fill += n
+                if fill == len(stage):
+                    commit()
+                if progress is not None:
+                    progress(done + fill, size)
+            commit()
+        except BaseException as e:
+            commit()
+            if isinstance(e, ReadoutError):
+                e.done = done
+            raise
+    try:
+        os.unlink(sidecar_path(path))
+    except OSError:
+        pass
+    return ReadoutResult(size - start, start, retried, time.monotonic() - t0)
@@ -0,0 +1,105 @@
+# core/ringlog.py
+#
+# 워커용 레벨 로그 + 진행률 throttle.
+#
+# flash 루프는 256B 블록마다 진행 줄을 남기는데, 예전에는 그걸 print로 바로
+# stdout에 쓰고 flash_prog도 블록마다 emit 했다. 시리얼 콘솔 호스트에서는
+# stdout 자체가 느리고, emit은 매번 Qt 스레드 경계를 넘는다.
+#
+#   RingLog           (시각, 레벨, 형식, 인자)를 고정 크기 deque에 넣기만 한다.
+#                     문자열 포맷은 echo 대상(기본 INFO 이상)이거나 나중에
+#                     lines()/save()로 꺼낼 때만 한다. 블록별 DEBUG 줄은 echo
+#                     하지 않으므로 루프 비용은 append 하나다.
+#   ProgressThrottle  퍼센트가 바뀌었고 마지막으로 내보낸 뒤 1/max_hz 초가
+#                     지났을 때만 True. 100%는 간격과 무관하게 내보낸다.
+import sys
+import time
+from collections import deque
+from typing import Callable, List, Optional
+
+DEBUG = 10
+INFO  = 20
+WARN  = 30
+ERROR = 40
+
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARN: "WARN", ERROR: "ERROR"}
+
+# 1 MiB 이미지 = 4096 블록. 블록별 줄 + 재시도/단계 로그를 한 번의 flash 분량 이상 담는다.
+RINGLOG_CAPACITY = 32768
+PROGRESS_MAX_HZ  = 20
+
+
+def _stdout(text: str) -> None:
+    sys.stdout.write(text + "\n")
+
+
+class RingLog:
+    """고정 크기 레벨 로그. echo_level 이상만 sink(기본 stdout)로 바로 쓴다."""
+
+    def __init__(self, capacity: int = RINGLOG_CAPACITY, echo_level: int = INFO,
+                 sink: Optional[Callable[[str], None]] = None):
+        self._buf = deque(maxlen=capacity)
+        self.echo_level = echo_level
+        self._sink = sink or _stdout
+
+    def log(self, level: int, msg: str, *args) -> None:
+        """msg % args 는 필요할 때만 계산된다 (args가 없으면 msg 그대로)."""
+        self._buf.append((time.time(), level, msg, args))
+        if level >= self.echo_level:
+            self._sink(msg % args if args else msg)
+
+    def debug(self, msg: str, *args) -> None:
+        self.log(DEBUG, msg, *args)
+
+    def info(self, msg: str, *args) -> None:
+        self.log(INFO, msg, *args)
+
+    def warn(self, msg: str, *args) -> None:
+        self.log(WARN, msg, *args)
+
+    def error(self, msg: str, *args) -> None:
+        self.log(ERROR, msg, *args)
+
+    def lines(self, min_level: int = DEBUG) -> List[str]:
+        """버퍼 내용을 문자열로. 다른 스레드가 쓰는 중에도 호출 가능 (스냅샷)."""
+        out = []
+        for t, level, msg, args in list(self._buf):
+            if level < min_level:
+                continue
+            ts = time.strftime("%H:%M:%S", time.localtime(t)) + f".{int(t * 1000) % 1000:03d}"
+            out.append(f"{ts} {LEVEL_NAMES.get(level, level):5} {msg % args if args else msg}")
+        return out
+
+    def save(self, path: str, min_level: int = DEBUG) -> int:
+        """path에 lines()를 쓴다. 쓴 줄 수 반환. 쓰기 실패는 OSError."""
+        lines = self.lines(min_level)
+        with open(path, "w") as f:
+            f.write("\n".join(lines) + ("\n" if lines else ""))
+        return len(lines)
+
+    def clear(self) -> None:
+        self._buf.clear()
+
+
+class ProgressThrottle:
+    """진행률 갱신을 시간(max_hz)과 퍼센트 변화로 합친다."""
+
+    def __init__(self, max_hz: float = PROGRESS_MAX_HZ):
+        self._interval_ns = int(1e9 / max_hz)
+        self._last_pct: Optional[int] = None
+        self._last_ns = 0
+
+    def due(self, pct: int) -> bool:
+        """지금 pct를 내보내야 하면 True (내보낸 것으로 기록한다)."""
+        if pct == self._last_pct:
+            return False
+        now = time.monotonic_ns()
+        if pct < 100 and now - self._last_ns < self._interval_ns:
+            return False
+        self._last_pct = pct
+        self._last_ns = now
+        return True
+
+    def reset(self) -> None:
+        self._last_pct = None
+        self._last_ns = 0
@@ -1,79 +1,118 @@
-from PySide6.QtCore import QObject, Signal, Slot
-import serial, struct, time, os
+from PySide6.QtCore import QObject, Qt, Signal, Slot
+import time
+
+import core.control_gpio as gpio
+from core.bootloader import CMD_ACK, CMD_SYNC, FLASH_CANCELLED, Bootloader, Reporter
+from core.flash_layout import ERASE_AUTO
+from core.metrics import export as export_metrics
+from core.ringlog import DEBUG, INFO, ProgressThrottle, RingLog
+from core.verify import VERIFY_FAST
+
+
+class _WorkerReporter(Reporter):
+    """Bootloader 출력 → 워커 RingLog + flash_prog (≤ 20Hz, 퍼센트가 바뀔 때만)."""
+
+    def __init__(self, worker: "SerialWorker"):
+        self._w = worker
+        self._label = None
+
+    def info(self, msg: str):
+        self._w.log.info("[flash] %s", msg)
+
+    def warn(self, msg: str):
+        self._w.log.warn("[flash] %s", msg)
+
+    def progress(self, label: str, done: int, total: int):
+        if label != self._label:
+            self._label = label
+            self._w._prog.reset()   # delta 비교 진행률 다음 write 0%부터
+        percent = int(done * 100.0 / total) if total else 0
+        self._w.log.debug("[flash] %s %3d%% (%d/%d)", label, percent, done, total)
+        self._w._emit_progress(percent)
+
+    def progress_end(self):
+        self._label = None
 
-CMD_ACK       = b"\x79"
-CMD_NACK      = b"\x1F"
-CMD_SYNC      = b"\x7F"
-CMD_EXT_ERASE = b"\x44\xBB"
-CMD_WRITE     = b"\x31\xCE"
 
 class SerialWorker(QObject):
+    """
+    core/bootloader.Bootloader의 Qt 어댑터. 프로토콜은 전부 Bootloader에 있고,
+    여기서는 슬롯 → Bootloader 호출, 결과 → 시그널만 한다.
+    """
     cmd_done = Signal(bool, bytes)
     flash_prog = Signal(int)
     # ok=True: 전체 플래시 성공 (erase + write)
-    # ok=False: 단계 중 어디선가 실패 (msg에 사유)
+    # ok=False: 단계 중 어디선가 실패 (msg에 사유, 취소면 FLASH_CANCELLED)
     flash_done = Signal(bool, str)
-
-    def __init__(self, port: str, baud: int = 115200, timeout: float = 0.2):
+    # baud 협상 성공 시 채택된 baud
+    baud_selected = Signal(int)
+    # flash 종료 시 계측 결과 (core/metrics.FlashMetrics.to_json())
+    metrics_ready = Signal(str)
+    # enter_and_sync / 취소 후 재진입 중 GPIO 쓰기 실패 (사유)
+    gpio_error = Signal(str)
+    # readout 종료 (ok, 사유 — 취소면 FLASH_CANCELLED). 진행률은 flash_prog로
+    readout_done = Signal(bool, str)
+
+    def __init__(self, port: str, baud: int = 115200, timeout: float = 0.2,
+                 erase_mode: str = ERASE_AUTO, skip_erased: bool = True,
+                 delta: bool = False, pipelined: bool = False, metrics_dir: str = "",
+                 verbose: bool = False, verify: str = VERIFY_FAST):
         super().__init__()
+        # 레벨 로그 (core/ringlog.py). 블록별 진행 줄은 DEBUG로 버퍼에만 남고
+        # verbose일 때만 stdout에도 나간다. 전체 로그는 log.save(path)로.
+        self.log = RingLog(echo_level=DEBUG if verbose else INFO)
+        self._prog = ProgressThrottle()     # flash_prog emit ≤ 20Hz, 퍼센트가 바뀔 때만
+        self._bl = Bootloader(port, baud, timeout, erase_mode, skip_erased, delta, pipelined,
+                              reporter=_WorkerReporter(self), verify=verify)
         self._port = port
-        self._baud = baud
-        self._timeout = timeout
-        self._ser = None  # ★ 지속 연결 핸들
+        self.cancel_token = self._bl.cancel_token
+        self._metrics_dir = metrics_dir     # 있으면 flash마다 <포트>.json/.prom 저장
+        # 다음 flash_img의 erase 전 backup 파일 ("" = 안 함, core/readout.py).
+        # GUI 스레드가 요청 시그널을 보내기 전에 정한다 (큐 호출이 그 뒤에 실행됨).
+        self.backup_path = ""
+        # flash_img의 모든 종료 경로가 flash_done을 내므로 거기서 계측을 마감한다.
+        # queued: flash_img가 반환해 열린 phase가 모두 닫힌 뒤에 실행된다.
+        self.flash_done.connect(self._finish_metrics, Qt.QueuedConnection)
+
+    @property
+    def metrics(self):
+        """현재 flash의 단계 시간/ACK 왕복/재시도 (flash마다 새 객체 — Bootloader.metrics)."""
+        return self._bl.metrics
 
     # ---------- 내부 유틸 ----------
     def _open_port(self) -> bool:
-        if self._ser and self._ser.is_open:
-            return True
-        try:
-            self._ser = serial.Serial(
-                port=self._port,
-                baudrate=self._baud,
-                timeout=self._timeout,       # per-read
-                bytesize=serial.EIGHTBITS,
-                parity=serial.PARITY_EVEN,   # 8E1
-                stopbits=serial.STOPBITS_ONE,
-                xonxoff=False, rtscts=False, dsrdtr=False
-            )
+        return self._bl.open()
+
+    def _emit_progress(self, percent: int) -> None:
+        if self._prog.due(percent):
+            self.flash_prog.emit(percent)
+
+    def cancel(self, reason: str = "cancelled by user") -> None:
+        """
+        진행 중인 flash를 멈춘다. 어느 스레드에서 불러도 된다 (시그널 아님 —
+        이 스레드는 flash 루프에 막혀 있다). write는 진행 중인 프레임의 ACK 뒤,
+        erase ACK 대기는 즉시 멈추고 flash_done(False, FLASH_CANCELLED)를 낸다.
+        """
+        self._bl.cancel(reason)
+
+    @Slot(bool, str)
+    def _finish_metrics(self, ok: bool, _msg: str):
+        self.metrics.ok = ok
+        self.metrics.baud = self._bl.baud
+        m = self.metrics
+        self.log.info("[metrics] phases: " + ", ".join(f"{k}={v:.3f}s" for k, v in m.phases.items())
+                      + (f", {m.bytes_per_s / 1024:.1f} KB/s" if m.bytes_per_s else ""))
+        if self._metrics_dir:
             try:
-                self._ser.setDTR(False); self._ser.setRTS(False)
-                self._ser.reset_input_buffer(); self._ser.reset_output_buffer()
-            except Exception:
-                pass
-            time.sleep(0.03)
-            return True
-        except Exception as e:
-            print(f"[serial] open error: {e}")
-            self._ser = None
-            return False
-
-    def _wait_ack(self, timeout_s: float) -> bool:
-        """ACK만 찾고, NACK/노이즈는 무시하며 기다림"""
-        if not (self._ser and self._ser.is_open): return False
-        deadline = time.time() + timeout_s
-        while time.time() < deadline:
-            b = self._ser.read(1)
-            if b == CMD_ACK: return True
-            elif b:          continue
-        return False
-
-    def _sync_now(self, window_s: float = 5.0) -> bool:
-        """window 동안 0x7F 반복 송신하며 ACK 대기"""
-        if not (self._ser and self._ser.is_open): return False
-        deadline = time.time() + window_s
-        while time.time() < deadline:
-            self._ser.write(CMD_SYNC); self._ser.flush()
-            if self._wait_ack(0.25): return True
-            time.sleep(0.03)
-        return False
+                for path in export_metrics(m, self._metrics_dir):
+                    self.log.info(f"[metrics] → {path}")
+            except OSError as e:
+                self.log.error(f"[metrics] export failed: {e}")
+        self.metrics_ready.emit(m.to_json())
 
     @Slot()
     def close_port(self):
-        try:
-            if self._ser and self._ser.is_open:
-                self._ser.close()
-        finally:
-            self._ser = None
+        self._bl.close()
 
     # ---------- 핑(Handshake): 포트 유지 ----------
     @Slot(bytes, int, float)
@@ -82,112 +121,113 @@ class SerialWorker(QObject):
             if not self._open_port():
                 self.cmd_done.emit(False, b""); return
 
+            ser = self._bl.ser
             resp = bytearray()
+            t0 = time.monotonic()
             for _ in range(3):
-                self._ser.write(cmd); self._ser.flush()
+                ser.write(cmd); ser.flush()
                 deadline = time.time() + read_timeout_s
                 resp.clear()
                 while len(resp) < response_size and time.time() < deadline:
-                    chunk = self._ser.read(response_size - len(resp))
+                    chunk = ser.read(response_size - len(resp))
                     if chunk: resp.extend(chunk)
                 if len(resp) == response_size: break
                 time.sleep(0.05)
 
+            if cmd == CMD_SYNC and len(resp) == response_size:
+                self.metrics.note_sync(time.monotonic() - t0)
+                self.metrics.add_phase("sync", time.monotonic() - t0)
             self.cmd_done.emit(len(resp) == response_size, bytes(resp))
             # ★ 여기서 포트를 닫지 않습니다 (flash에서 재사용)
         except Exception:
             self.cmd_done.emit(False, b"")
 
+    # ---------- 진입 + SYNC: 리셋 전에 포트를 열고 해제 직후부터 SYNC ----------
+    @Slot()
+    def enter_and_sync(self):
+        """
+        진입 시퀀스를 이 스레드에서 돌리며 NRST 해제 직후 SYNC (core/entry.py).
+        결과는 connect_and_send와 같이 cmd_done으로 알린다.
+        """
+        try:
+            synced = self._bl.enter_and_sync(log=self.log.info)
+        except Exception as e:
+            self.log.error(f"[serial] enter error: {e}")
+            self.gpio_error.emit(str(e))
+            self.cmd_done.emit(False, b""); return
+        self.cmd_done.emit(synced, CMD_ACK if synced else b"")
+
+    # ---------- Baud 협상: 후보 baud 중 처음 통과한 것으로 세션 유지 ----------
+    @Slot()
+    def negotiate_baud(self):
+        """
+        BAUD_CANDIDATES를 SYNC + Get ID로 확인. 후보 사이에는 BOOT0=1 + NRST 펄스로
+        부트로더를 재진입한다 (autobaud는 리셋당 한 번). 결과는 cmd_done으로도
+        알려 기존 Connect 상태 표시를 그대로 쓴다.
+        """
+        try:
+            baud = self._bl.negotiate_baud(reset=gpio.bootloader_reset)
+            if baud is None:
+                self.cmd_done.emit(False, b""); return
+            self.log.info(f"[serial] baud selected: {baud}")
+            self.cmd_done.emit(True, CMD_ACK)
+            self.baud_selected.emit(baud)
+        except Exception as e:
+            self.log.error(f"[serial] negotiate error: {e}")
+            self.cmd_done.emit(False, b"")
+
     # ---------- Flash: erase → write (GO 생략) ----------
     @Slot(bytes, int, float)
     def flash_img(self, cmd: bytes, response_size: int = 0x08000000, read_timeout_s: float = 20.0):
-        bin_path = cmd.decode("utf-8", errors="ignore").strip()
-        base_addr = int(response_size)
-        erase_timeout_s = float(read_timeout_s)
-
-        print(f"[flash_img] start: bin='{bin_path}', base=0x{base_addr:08X}, erase_to={erase_timeout_s}s")
-        if not os.path.isfile(bin_path):
-            print("[flash_img] ERROR: BIN file not found.")
-            self.flash_done.emit(False, "BIN file not found"); return
-        fw = open(bin_path, "rb").read()
-        total = len(fw)
-        if total == 0:
-            print("[flash_img] ERROR: BIN is empty.")
-            self.flash_done.emit(False, "BIN is empty"); return
-        print(f"[flash_img] BIN size = {total} bytes")
-
-        if not self._open_port():
-            print("[flash_img] ERROR: cannot open port")
-            self.flash_done.emit(False, "cannot open port"); return
-
-        # 기존 읽기 타임아웃이 너무 짧으면 조금 늘려줌
-        old_timeout = self._ser.timeout
-        if (old_timeout or 0) < 0.5:
-            self._ser.timeout = 0.5
-
-        # 1) 먼저 바로 EXT_ERASE 시도 (세션이 살아있다면 ACK 나올 확률 높음)
-        def try_ext_erase() -> bool:
-            self._ser.reset_input_buffer()
-            self._ser.write(CMD_EXT_ERASE); self._ser.flush()
-            if not self._wait_ack(0.8):
-                return False
-            self._ser.write(b"\xFF\xFF\x00"); self._ser.flush()
-            return self._wait_ack(erase_timeout_s)
-
-        if not try_ext_erase():
-            print("[flash_img] EXT_ERASE first attempt failed → SYNC then retry")
-            # SYNC 재확인
-            if not self._sync_now(5.0):
-                print("[flash_img] ERROR: Bootloader SYNC failed (no ACK).")
-                self._ser.timeout = old_timeout
-                self.flash_done.emit(False, "Bootloader SYNC failed (no ACK)")
-                return
-            if not try_ext_erase():
-                print("[flash_img] ERROR: Erase NACK/timeout.")
-                self._ser.timeout = old_timeout
-                self.flash_done.emit(False, "Erase NACK/timeout")
-                return
-
-        print("[flash_img] Erase OK")
-
-        # 2) Write (256B, 블록당 1회 재시도)
-        CHUNK = 256
-        written = 0
-        addr = base_addr
-
-        def write_block(a: int, data: bytes) -> bool:
-            self._ser.write(CMD_WRITE); self._ser.flush()
-            if not self._wait_ack(0.8): return False
-
-            addr_bytes = struct.pack(">I", a)
-            addr_chk = addr_bytes[0] ^ addr_bytes[1] ^ addr_bytes[2] ^ addr_bytes[3]
-            self._ser.write(addr_bytes + bytes([addr_chk])); self._ser.flush()
-            if not self._wait_ack(0.8): return False
-
-            lbyte = bytes([len(data) - 1])
-            csum = lbyte[0]
-            for b in data: csum ^= b
-            self._ser.write(lbyte + data + bytes([csum])); self._ser.flush()
-            return self._wait_ack(1.5)
-
-        while written < total:
-            block = fw[written:written + CHUNK]
-            for attempt in range(2):
-                if write_block(addr, block):
-                    written += len(block); addr += len(block)
-                    percent = int(written * 100.0 / total)
-                    self.flash_prog.emit(percent)
-                    print(f"[flash_img] Progress {percent:3d}% ({written}/{total})")
-                    break
-                else:
-                    print(f"[flash_img] WARN: retry @0x{addr:08X} (attempt {attempt+2}/2)")
-                    time.sleep(0.05)
-            else:
-                print(f"[flash_img] ERROR: write block failed @0x{addr:08X}")
-                self._ser.timeout = old_timeout
-                self.flash_done.emit(False, f"write block failed @0x{addr:08X}")
-                return
-
-        self._ser.timeout = old_timeout
-        print("[flash_img] Write OK (erase+flash complete)")
-        self.flash_done.emit(True, "")
+        self._flash_img(cmd.decode("utf-8", errors="ignore").strip(),
+                        int(response_size), float(read_timeout_s), resume=False)
+
+    @Slot(bytes, int, float)
+    def resume_flash_img(self, cmd: bytes, response_size: int = 0x08000000, read_timeout_s: float = 20.0):
+        """flash_img와 같지만 포트 저널(core/journal.py)이 맞으면 이어서 쓴다."""
+        self._flash_img(cmd.decode("utf-8", errors="ignore").strip(),
+                        int(response_size), float(read_timeout_s), resume=True)
+
+    def _flash_img(self, bin_path: str, base_addr: int, erase_timeout_s: float, resume: bool):
+        self._prog.reset()
+        self.log.info(f"[flash_img] start: bin='{bin_path}', base=0x{base_addr:08X}, "
+              f"erase_to={erase_timeout_s}s{', resume' if resume else ''}")
+        ok, msg = self._bl.flash(bin_path, base_addr, erase_timeout_s, resume=resume,
+                                 backup=self.backup_path)
+        if self._bl.last_flash.get("backup"):
+            self.log.info(f"[flash_img] backup → {self._bl.last_flash['backup']}")
+        gpio_err = self._bl.last_flash.get("gpio_error")
+        if gpio_err:
+            self.gpio_error.emit(gpio_err)
+        if ok:
+            self.flash_prog.emit(100)   # throttle과 무관하게 마지막 값은 항상
+            verified = (self._bl.last_flash.get("verify") or {}).get("ok")
+            self.log.info(f"[flash_img] Write OK (erase+flash{'+verify' if verified else ''} "
+                          "complete)")
+        elif msg == FLASH_CANCELLED:
+            self.log.warn("[flash_img] cancelled")
+        else:
+            hint = " (resume from here)" if self._bl.last_flash.get("resumable") else ""
+            self.log.error(f"[flash_img] ERROR: {msg}{hint}")
+        self.flash_done.emit(ok, msg)
+
+    # ---------- Readout: 플래시 → 파일 ----------
+    @Slot(bytes, int, int, bool)
+    def readout(self, path: bytes, addr: int = 0x08000000, size: int = 0, resume: bool = False):
+        """
+        [addr, addr+size)를 path로 덤프 (size 0 = 플래시 끝까지). resume이면 같은
+        범위의 중단된 덤프를 이어 읽는다. 결과는 readout_done, cancel()로 멈출 수 있다.
+        """
+        out = path.decode("utf-8", errors="ignore").strip()
+        self._prog.reset()
+        self.log.info(f"[readout] start: '{out}', addr=0x{addr:08X}, "
+                      f"size={size or 'to end'}{', resume' if resume else ''}")
+        ok, msg = self._bl.readout(out, addr, size or None, resume=resume)
+        if ok:
+            self.flash_prog.emit(100)
+            self.log.info(f"[readout] OK: {self._bl.last_readout}")
+        elif msg == FLASH_CANCELLED:
+            self.log.warn("[readout] cancelled")
+        else:
+            self.log.error(f"[readout] ERROR: {msg}")
+        self.readout_done.emit(ok, msg)
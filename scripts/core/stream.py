@@ -0,0 +1,76 @@
+# core/stream.py
+#
+# 파이프/stdin에서 BIN을 블록 단위로 읽으며 flash 하기 위한 입력기.
+#
+# 압축 해제기나 아티팩트 다운로더 출력을 임시 파일 없이 바로 구울 수 있게,
+# 이미지 전체를 메모리에 두지 않고 WRITE_CHUNK 크기 버퍼 하나를 재사용한다.
+# 크기를 미리 모르므로 erase는 write 직전에 그 블록이 걸치는 섹터만 지운다
+# (레이아웃을 모르면 시작 전에 mass erase). 프레임 checksum도 블록마다 계산
+# 한다 — 사전 계산 표(core/frame_engine.FrameTable)와 plan_cache는 쓰지 않는다.
+#
+# 형식은 raw BIN만 받는다 (HEX/ELF는 주소 순서가 보장되지 않아 erase 전에
+# 전체를 봐야 한다).
+from typing import BinaryIO, Iterator, Optional, Set, Tuple
+
+from core.flash_layout import FlashLayout
+from core.write_plan import WRITE_CHUNK
+
+STDIN_PATH = "-"
+
+
+class BlockStream:
+    """fileobj에서 chunk 바이트씩 읽어 (addr, memoryview)를 낸다. 버퍼는 재사용."""
+
+    def __init__(self, fileobj: BinaryIO, base_addr: int, chunk: int = WRITE_CHUNK):
+        self._f = fileobj
+        self._addr = base_addr
+        self._buf = bytearray(chunk)
+        self._view = memoryview(self._buf)
+        self.read_bytes = 0
+
+    def _fill(self) -> int:
+        """버퍼를 가득(또는 EOF까지) 채운다. 파이프는 짧게 읽힐 수 있다."""
+        n = 0
+        size = len(self._buf)
+        while n < size:
+            got = self._f.readinto(self._view[n:])
+            if not got:
+                break
+            n += got
+        return n
+
+    def __iter__(self) -> Iterator[Tuple[int, memoryview]]:
+        """다음 반복 전에 돌려준 view를 다 써야 한다 (같은 버퍼를 덮어씀)."""
+        while True:
+            n = self._fill()
+            if n == 0:
+                return
+            addr = self._addr
+            self._addr += n
+            self.read_bytes += n
+            yield addr, self._view[:n]
+            if n < len(self._buf):
+                return
+
+
+class LazyEraser:
+    """write 직전에 아직 안 지운 섹터만 지운다. erase_fn(pages) -> bool."""
+
+    def __init__(self, layout: FlashLayout, erase_fn):
+        self._layout = layout
+        self._erase = erase_fn
+        self.erased: Set[int] = set()
+
+    def ensure(self, addr: int, length: int) -> Optional[int]:
+        """[addr, addr+length) 섹터를 지운다. 실패한 섹터 번호, 성공이면 None."""
+        for idx in self._layout.sectors_for_range(addr, length):
+            if idx in self.erased:
+                continue
+            if not self._erase([idx]):
+                return idx
+            self.erased.add(idx)
+        return None
+
+    @property
+    def erase_bytes(self) -> int:
+        return sum(self._layout.sector_span(i)[1] for i in self.erased)
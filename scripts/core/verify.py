@@ -0,0 +1,158 @@
+# core/verify.py
+#
+# write 후 verify: 쓴 이미지를 타깃에서 다시 읽어 확인한다. 예전에는 마지막
+# 블록의 ACK만 받으면 성공이었다.
+#
+#   full  이미지가 덮는 범위를 Read Memory(0x11)로 256B씩 읽어 메모리의 이미지와
+#         비교한다 (core/readout.ReadFrameEngine — 프레임 버퍼 하나를 재사용하고,
+#         pipelined 조건은 write와 같다).
+#   fast  섹터마다 CRC32를 양쪽에서 계산해 비교하고, 다른 섹터만 readback 한다.
+#         타깃 쪽 CRC는 부트로더 Get Checksum(0xA1) — Get(0x00) 명령 목록에 있을
+#         때만 쓴다. 없는 부트로더(대부분의 F0/F1/F4/G0 ROM)에서는 호출자
+#         (Bootloader._verify_image)가 미리 확인해 경고와 함께 full로 돌리고, 결과
+#         모드를 "full (0xA1 unsupported)"로 남긴다 — 비용은 full과 같다.
+#
+# 판정은 항상 바이트 비교로 끝난다: CRC가 같으면 그 섹터는 통과, 다르면 readback
+# 결과로 정한다. CRC 쪽이 어긋나도 잃는 것은 속도뿐이고, CRC는 달랐는데 데이터가
+# 같았으면 그 verify에서는 CRC를 더 묻지 않는다.
+#
+# 타깃 CRC는 STM32 CRC 유닛 기본값: 다항식 0x04C11DB7, 초기값 0xFFFFFFFF, 32비트
+# 워드(리틀엔디안) 단위, 반사/최종 XOR 없음. 호스트는 워드 안 바이트 순서와 비트
+# 순서를 뒤집어 zlib.crc32(같은 다항식의 반사형)로 계산한다 — 바이트당 파이썬
+# 연산 없음.
+#
+# 불일치는 프레임 주소로 MAX_REPORT개까지 남기고, 그만큼 찾으면 더 읽지 않는다.
+import time
+import zlib
+from typing import Callable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from core.flash_layout import FlashLayout
+from core.readout import READ_CHUNK, READ_RETRIES, ReadFrameEngine, ReadoutError
+
+VERIFY_OFF  = "off"
+VERIFY_FAST = "fast"
+VERIFY_FULL = "full"
+VERIFY_MODES = (VERIFY_OFF, VERIFY_FAST, VERIFY_FULL)
+
+CRC_POLY = 0x04C11DB7
+CRC_INIT = 0xFFFFFFFF
+
+FAST_SECTOR = 2048   # 레이아웃을 모를 때 fast 모드의 CRC 단위
+MAX_REPORT = 16      # 결과에 남길 불일치 프레임 수
+
+# crc_fn(addr, size) -> 타깃 CRC, 미지원/실패면 None
+CrcFn = Callable[[int, int], Optional[int]]
+
+_REV8 = bytes(int(f"{i:08b}"[::-1], 2) for i in range(256))
+
+
+def stm32_crc(data) -> int:
+    """STM32 CRC 유닛 기본 설정으로 data(길이 4의 배수)의 CRC."""
+    b = bytearray(data)
+    b[0::4], b[3::4] = b[3::4], b[0::4]
+    b[1::4], b[2::4] = b[2::4], b[1::4]
+    r = zlib.crc32(b.translate(_REV8)) ^ 0xFFFFFFFF
+    return int(f"{r:032b}"[::-1], 2)
+
+
+class VerifyResult(NamedTuple):
+    mode: str
+    ok: bool
+    checked_bytes: int          # 이미지 바이트 (불일치로 멈췄으면 거기까지)
+    read_bytes: int             # readback 한 바이트
+    crc_sectors: int            # CRC만으로 통과한 구간 수
+    mismatches: List[int]       # 다른 프레임 주소 (최대 MAX_REPORT)
+    seconds: float
+
+    def describe(self) -> str:
+        if not self.ok:
+            at = ", ".join(f"0x{a:08X}" for a in self.mismatches[:4])
+            more = "+" if len(self.mismatches) >= MAX_REPORT else ""
+            return f"{len(self.mismatches)}{more} frames differ (first @{at})"
+        crc = f", {self.crc_sectors} sectors by CRC" if self.crc_sectors else ""
+        return (f"{self.checked_bytes:,} bytes ({self.mode}, read back "
+                f"{self.read_bytes:,}{crc}) in {self.seconds:.2f}s")
+
+    def to_dict(self) -> dict:
+        return {"mode": self.mode, "ok": self.ok, "checked_bytes": self.checked_bytes,
+                "read_bytes": self.read_bytes, "crc_sectors": self.crc_sectors,
+                "mismatches": [f"0x{a:08X}" for a in self.mismatches],
+                "seconds": round(self.seconds, 3)}
+
+
+def _spans(segments: Sequence[Tuple[int, int, int]],
+           layout: Optional[FlashLayout]) -> Iterator[Tuple[int, int, int]]:
+    """(addr, offset, length) 세그먼트를 섹터 경계로 자른다 (fast 모드의 CRC 단위)."""
+    for seg_addr, seg_off, seg_len in segments:
+        end = seg_addr + seg_len
+        addr = seg_addr
+        while addr < end:
+            if layout is not None and layout.base <= addr < layout.end:
+                s_start, s_size = layout.sector_span(layout.sector_index(addr))
+                hi = min(s_start + s_size, end)
+            else:
+                hi = min((addr // FAST_SECTOR + 1) * FAST_SECTOR, end)
+            yield addr, seg_off + addr - seg_addr, hi - addr
+            addr = hi
+
+
+def verify(engine: ReadFrameEngine, fw, segments: Sequence[Tuple[int, int, int]],
+           mode: str = VERIFY_FULL, *, layout: Optional[FlashLayout] = None,
+           crc_fn: Optional[CrcFn] = None, retries: int = READ_RETRIES,
+           progress: Optional[Callable[[int, int], None]] = None,
+           check: Optional[Callable[[], None]] = None,
+           on_retry: Optional[Callable[[int, str], None]] = None) -> VerifyResult:
+    """
+    segments(core/image.FirmwareImage.layout())가 가리키는 fw 구간을 타깃과 비교.
+    check()는 프레임/섹터 사이마다 불린다 (취소 지점). 읽기가 retries번 더
+    실패하면 ReadoutError (done = 확인을 마친 바이트).
+    """
+    if mode not in (VERIFY_FAST, VERIFY_FULL):
+        raise ValueError(f"unknown verify mode: {mode}")
+    fv = memoryview(fw)
+    frame = memoryview(bytearray(READ_CHUNK))
+    total = sum(n for _a, _o, n in segments)
+    mismatches: List[int] = []
+    read = crc_ok = done = 0
+    use_crc = mode == VERIFY_FAST and crc_fn is not None
+    t0 = time.monotonic()
+
+    for addr, off, n in _spans(segments, layout if mode == VERIFY_FAST else None):
+        if check is not None:
+            check()
+        dev = None
+        if use_crc and addr % 4 == 0 and n % 4 == 0:
+            dev = crc_fn(addr, n)
+            if dev is None:
+                use_crc = False       # 미지원/실패 → 나머지는 readback
+            elif dev == stm32_crc(fv[off:off + n]):
+                crc_ok += 1
+                done += n
+                if progress is not None:
+                    progress(done, total)
+                continue
+        found = len(mismatches)
+        pos = 0
+        while pos < n:
+            k = min(READ_CHUNK, n - pos)
+            out = frame[:k]
+            if not engine.read_retry(addr + pos, out, retries, on_retry):
+                raise ReadoutError(f"read failed @0x{addr + pos:08X} ({engine.last_error})",
+                                   done + pos)
+            read += k
+            if out != fv[off + pos:off + pos + k]:
+                mismatches.append(addr + pos)
+                if len(mismatches) >= MAX_REPORT:
+                    break
+            pos += k
+            if check is not None:
+                check()
+            if progress is not None:
+                progress(done + pos, total)
+        done += pos
+        if len(mismatches) >= MAX_REPORT:
+            break
+        if dev is not None and len(mismatches) == found:
+            use_crc = False           # CRC는 달랐는데 데이터는 같음 → 이 타깃 CRC는 안 믿음
+    return VerifyResult(mode, not mismatches, done, read, crc_ok, mismatches,
+                        time.monotonic() - t0)
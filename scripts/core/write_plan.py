@@ -0,0 +1,107 @@
+# core/write_plan.py
+#
+# Write 단계 계획: BIN을 256B 프레임으로 자르되, erase 직후 플래시는 이미
+# 0xFF이므로 다음을 생략한다.
+#   - 전부 0xFF인 블록 → 프레임 자체를 보내지 않음 (ACK 3회 왕복 절약)
+#   - 블록 끝의 연속 0xFF → 잘라냄. 단, 부트로더는 4바이트 단위 write를
+#     요구하므로 길이는 4의 배수로 올림 (원래 블록 길이를 넘지 않게).
+#
+# 주의: 생략은 해당 범위가 erase된 경우에만 안전하다. erase 계획
+# (core/flash_layout.py)은 이미지 범위 전체를 덮으므로 flash 경로에서는 성립.
+from typing import List, NamedTuple, Sequence, Tuple
+
+WRITE_CHUNK  = 256   # Write Memory 최대 페이로드
+WRITE_ALIGN  = 4     # 부트로더 write 길이/주소 정렬
+
+
+class WriteBlock(NamedTuple):
+    addr: int      # 절대 주소
+    offset: int    # 이미지 내 오프셋
+    length: int    # 보낼 바이트 수 (1..WRITE_CHUNK)
+
+
+class WritePlan:
+    """프레임 목록과 생략 통계."""
+
+    def __init__(self, blocks: List[WriteBlock], image_bytes: int, total_frames: int,
+                 chunk: int = WRITE_CHUNK):
+        self.blocks = blocks
+        self.image_bytes = image_bytes
+        self.total_frames = total_frames
+        self.chunk = chunk
+
+    @property
+    def write_bytes(self) -> int:
+        return sum(b.length for b in self.blocks)
+
+    @property
+    def skipped_bytes(self) -> int:
+        return self.image_bytes - self.write_bytes
+
+    @property
+    def skipped_frames(self) -> int:
+        return self.total_frames - len(self.blocks)
+
+    def within(self, spans: Sequence[Tuple[int, int]]) -> "WritePlan":
+        """
+        [(start_addr, size), ...] 범위와 겹치는 블록만 남긴 계획.
+        생략된 블록은 통계상 skipped로 잡힌다 (delta flash에서 변경 없는 섹터).
+        """
+        def hit(b: WriteBlock) -> bool:
+            return any(b.addr < s + n and s < b.addr + b.length for s, n in spans)
+        return WritePlan([b for b in self.blocks if hit(b)],
+                         self.image_bytes, self.total_frames, self.chunk)
+
+    def describe(self) -> str:
+        return (f"{len(self.blocks)}/{self.total_frames} frames, "
+                f"{self.write_bytes:,}/{self.image_bytes:,} bytes "
+                f"(skipped {self.skipped_frames} frames, {self.skipped_bytes:,} bytes)")
+
+
+def _align_up(n: int, align: int) -> int:
+    return (n + align - 1) // align * align
+
+
+def trim_erased(data) -> int:
+    """
+    블록 data에서 실제로 보낼 길이: 끝의 0xFF를 자르고 4바이트로 올림
+    (원래 길이를 넘지 않게). 전부 0xFF면 0.
+    """
+    used = len(bytes(data).rstrip(b"\xFF"))
+    if used == 0:
+        return 0
+    return min(_align_up(used, WRITE_ALIGN), len(data))
+
+
+def plan_writes(fw: bytes, base_addr: int, chunk: int = WRITE_CHUNK,
+                skip_erased: bool = True) -> WritePlan:
+    """
+    fw를 chunk 단위 WriteBlock 목록으로 만든다.
+    skip_erased=False면 기존처럼 모든 블록을 그대로 보낸다.
+    """
+    return plan_segments(fw, [(base_addr, 0, len(fw))], chunk, skip_erased)
+
+
+def plan_segments(fw: bytes, layout: Sequence[Tuple[int, int, int]],
+                  chunk: int = WRITE_CHUNK, skip_erased: bool = True) -> WritePlan:
+    """
+    세그먼트 이미지(core/image.FirmwareImage.layout()) 버전.
+    layout의 (addr, offset, length)마다 fw[offset:offset+length]를 addr에 쓰는
+    블록을 만든다. 세그먼트 밖(빈 구간)은 계획에 들어가지 않는다.
+    """
+    if chunk <= 0 or chunk > WRITE_CHUNK or chunk % WRITE_ALIGN:
+        raise ValueError(f"invalid chunk size: {chunk}")
+    blocks: List[WriteBlock] = []
+    frames = 0
+    image_bytes = 0
+    for seg_addr, seg_off, seg_len in layout:
+        image_bytes += seg_len
+        seg_end = seg_off + seg_len
+        for off in range(seg_off, seg_end, chunk):
+            frames += 1
+            data = fw[off:min(off + chunk, seg_end)]
+            length = trim_erased(data) if skip_erased else len(data)
+            if length == 0:
+                continue
+            blocks.append(WriteBlock(seg_addr + off - seg_off, off, length))
+    return WritePlan(blocks, image_bytes, frames, chunk)
@@ -0,0 +1,155 @@
+"""
+Firmware Uploader - Flash Daemon Client
+
+flash_daemon.py 에 요청을 보내는 최소 클라이언트. 표준 라이브러리만 쓰므로
+라인 컨트롤러 쪽에 이 파일만 복사해 써도 된다.
+
+  python3 flash_client.py --target ttyS0 --bin /abs/app.bin [--baud auto] [--delta] ...
+  python3 flash_client.py --status
+  python3 flash_client.py --cancel 7
+
+flash는 데몬 이벤트를 JSON 한 줄씩 stdout으로 그대로 내보낸다. 종료 코드는
+headless와 같다: 0 성공, 1~5 실패한 단계 번호, 64 인자 오류/거절된 요청.
+"""
+
+import base64
+import json
+import os
+import socket
+import sys
+from typing import Iterator, Optional
+
+EXIT_USAGE = 64
+
+
+def default_socket_path() -> str:
+    """$XDG_RUNTIME_DIR/firmware_uploader.sock, 없으면 /tmp/firmware_uploader-<uid>.sock."""
+    run_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if run_dir:
+        return os.path.join(run_dir, "firmware_uploader.sock")
+    return f"/tmp/firmware_uploader-{os.getuid()}.sock"
+
+
+def request(msg: dict, socket_path: Optional[str] = None) -> Iterator[dict]:
+    """요청 하나를 보내고 응답 이벤트를 차례로 낸다 (flash는 done까지)."""
+    s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        s.connect(socket_path or default_socket_path())
+        s.sendall((json.dumps(msg) + "\n").encode("utf-8"))
+        with s.makefile("rb") as f:
+            for line in f:
+                ev = json.loads(line)
+                yield ev
+                if msg.get("op") != "flash" or ev["event"] in ("done", "error"):
+                    return
+    finally:
+        s.close()
+
+
+def flash(target: str, image: str, socket_path: Optional[str] = None, *,
+          send_bytes: bool = False, tag=None, **opts) -> Iterator[dict]:
+    """
+    image를 target에 flash 하는 작업을 넣고 이벤트를 낸다. send_bytes=True면
+    경로 대신 내용을 보낸다 (데몬이 파일을 읽을 수 없을 때). opts는 데몬의
+    작업 옵션 (baud, erase_mode, skip_erased, delta, base_addr, erase_timeout_s, resume,
+    verify).
+    """
+    msg = {"op": "flash", "target": target, "opts": opts}
+    if tag is not None:
+        msg["tag"] = tag
+    if send_bytes:
+        with open(image, "rb") as f:
+            msg["image_b64"] = base64.b64encode(f.read()).decode("ascii")
+        msg["format"] = os.path.splitext(image)[1].lstrip(".").lower() or "bin"
+    else:
+        msg["image"] = os.path.abspath(os.path.expanduser(image))
+    return request(msg, socket_path)
+
+
+def _parse_args(argv) -> Optional[dict]:
+    args = {"socket": None, "target": None, "bin": None, "send": False, "tag": None,
+            "status": False, "cancel": None, "opts": {}}
+    with_value = {"--socket", "--target", "--bin", "--tag", "--cancel", "--baud",
+                  "--base-addr", "--erase-timeout", "--verify"}
+    flags = {"--mass-erase": ("erase_mode", "mass"), "--no-skip-ff": ("skip_erased", False),
+             "--delta": ("delta", True), "--resume": ("resume", True)}
+    argv = list(argv or [])
+    i = 0
+    while i < len(argv):
+        a = argv[i]
+        if a in with_value:
+            if i + 1 >= len(argv):
+                print(f"{a} 에 값이 필요합니다", file=sys.stderr)
+                return None
+            v = argv[i + 1]
+            i += 2
+            if a == "--cancel":
+                try:
+                    args["cancel"] = int(v)
+                except ValueError:
+                    print(f"잘못된 {a} 값: {v}", file=sys.stderr)
+                    return None
+            elif a == "--baud":
+                args["opts"]["baud"] = v
+            elif a == "--base-addr":
+                args["opts"]["base_addr"] = v
+            elif a == "--erase-timeout":
+                args["opts"]["erase_timeout_s"] = v
+            elif a == "--verify":
+                args["opts"]["verify"] = v
+            else:
+                args[a[2:]] = v
+            continue
+        if a in flags:
+            k, v = flags[a]
+            args["opts"][k] = v
+        elif a == "--send":
+            args["send"] = True
+        elif a == "--status":
+            args["status"] = True
+        else:
+            print(f"알 수 없는 인자: {a}", file=sys.stderr)
+            return None
+        i += 1
+    return args
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    if args is None:
+        return EXIT_USAGE
+    if args["status"]:
+        events = request({"op": "status"}, args["socket"])
+    elif args["cancel"] is not None:
+        events = request({"op": "cancel", "job": args["cancel"]}, args["socket"])
+    elif args["target"] and args["bin"]:
+        try:
+            events = flash(args["target"], args["bin"], args["socket"],
+                           send_bytes=args["send"], tag=args["tag"], **args["opts"])
+        except OSError as e:
+            print(f"cannot read {args['bin']}: {e}", file=sys.stderr)
+            return 3
+    else:
+        print("--target 와 --bin, 또는 --status / --cancel 이 필요합니다", file=sys.stderr)
+        return EXIT_USAGE
+
+    code = 1
+    try:
+        for ev in events:
+            print(json.dumps(ev, ensure_ascii=False), flush=True)
+            if ev["event"] == "error":
+                code = EXIT_USAGE
+            elif ev["event"] == "done":
+                code = 0 if ev["ok"] else (ev["result"].get("failed_step") or 1)
+            elif ev["event"] in ("status", "pong"):
+                code = 0
+            elif ev["event"] == "cancel":
+                code = 0 if ev["ok"] else 1
+    except OSError as e:
+        print(f"daemon not reachable: {e}", file=sys.stderr)
+        return 1
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,660 @@
+"""
+Firmware Uploader - Flash Daemon
+
+상주 프로세스로 Unix 소켓에서 flash 작업을 받는다. 작업마다 run_script.sh →
+python3 main.py 를 새로 띄우면 sudo chmod, 파이썬 시작, 모듈 import를 매번
+다시 한다. 데몬은 그걸 한 번만 하고, GPIO brightness fd와 plan 캐시/baud
+기억을 프로세스가 살아 있는 동안 그대로 쓴다.
+
+스케줄: 포트마다 FIFO 큐 + 작업 스레드 하나. 포트끼리는 병렬, 같은 포트는
+순서대로. 작업 하나 = multi_runner.flash_target (진입 → Connect → Flash → 종료).
+포트의 핀 맵은 처음 본 작업(또는 --target)으로 정해지며, 다른 포트와 GPIO가
+겹치는 작업은 받지 않는다 (multi_runner.check_targets와 같은 규칙).
+시리얼 포트는 작업마다 열고 종료 시퀀스 전에 닫는다 (headless와 같은 순서).
+
+프로토콜: 요청/응답 모두 한 줄에 JSON 객체 하나 (UTF-8, '\\n' 끝).
+
+  {"op": "flash", "target": "ttyS0[:FW_UPDATE,BOOT0,NRST]",
+   "image": "/abs/app.bin"  또는  "image_b64": "...", "format": "bin|hex|elf",
+   "opts": {"baud": 115200 | "auto", "erase_mode": "auto|mass",
+            "skip_erased": true, "delta": false, "base_addr": "0x08000000",
+            "erase_timeout_s": 20, "resume": false, "verify": "fast|full|off"},
+   "tag": "응답에 그대로 붙는 임의 값"}
+      → queued, started, state*, log*, progress*, done   (done까지 이 연결로)
+  {"op": "cancel", "job": 7}   → {"event": "cancel", "job": 7, "ok": true}
+  {"op": "status"}             → {"event": "status", "ports": {...}, "jobs": {...}}
+  {"op": "ping"}               → {"event": "pong"}
+
+잘못된 요청은 {"event": "error", "msg": ...}. done의 result는 멀티 타깃 --json의
+타깃 항목과 같다 (metrics 포함). 클라이언트가 도중에 끊어도 작업은 끝까지
+진행한다 — 타깃을 반쯤 쓴 채로 두지 않게. 멈추려면 cancel.
+
+종료(SIGTERM/Ctrl+C): 대기 작업은 버리고, 실행 중인 작업은 취소한 뒤
+(core/bootloader.Bootloader._after_cancel) 끝나기를 기다린다.
+"""
+
+import base64
+import binascii
+import hashlib
+import json
+import os
+import queue
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterator, List, Optional
+
+import core.control_gpio as gpio
+from core.baud import DEFAULT_BAUD, parse_baud
+from core.bootloader import DEFAULT_BASE_ADDR, ERASE_TIMEOUT_S, FLASH_CANCELLED, Reporter
+from core.cancel import CancelToken
+from core.flash_layout import ERASE_AUTO, ERASE_MODES
+from core.image import IMAGE_EXTS
+from core.metrics import export as export_metrics
+from core.ringlog import ProgressThrottle
+from core.verify import VERIFY_FAST, VERIFY_MODES
+from flash_client import default_socket_path
+from headless_runner import BootloaderSerial
+from multi_runner import Target, TargetResult, flash_target
+
+EXIT_USAGE = 64
+
+# 종료 시 실행 중인 작업을 기다리는 시간 (취소 후 재진입 + erase 대기 여유)
+SHUTDOWN_WAIT_S = 30.0
+
+JOB_OPTS = {
+    "baud": DEFAULT_BAUD, "erase_mode": ERASE_AUTO, "skip_erased": True,
+    "delta": False, "base_addr": DEFAULT_BASE_ADDR, "erase_timeout_s": ERASE_TIMEOUT_S,
+    "resume": False, "verify": VERIFY_FAST,
+}
+
+
+def _image_dir() -> str:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "firmware_uploader", "daemon")
+
+
+def _job_opts(raw) -> dict:
+    """요청의 opts → flash_target 인자. 잘못된 값은 ValueError."""
+    if raw is None:
+        raw = {}
+    if not isinstance(raw, dict):
+        raise ValueError("opts must be an object")
+    unknown = sorted(set(raw) - set(JOB_OPTS))
+    if unknown:
+        raise ValueError(f"unknown opts: {', '.join(unknown)}")
+    o = dict(JOB_OPTS)
+    if "baud" in raw:
+        o["baud"] = parse_baud(str(raw["baud"]))
+    if "erase_mode" in raw:
+        if raw["erase_mode"] not in ERASE_MODES:
+            raise ValueError(f"erase_mode must be one of {', '.join(ERASE_MODES)}")
+        o["erase_mode"] = raw["erase_mode"]
+    if "base_addr" in raw:
+        v = raw["base_addr"]
+        o["base_addr"] = v if isinstance(v, int) else int(str(v), 0)
+    if "erase_timeout_s" in raw:
+        o["erase_timeout_s"] = float(raw["erase_timeout_s"])
+        if o["erase_timeout_s"] <= 0:
+            raise ValueError("erase_timeout_s must be > 0")
+    if "verify" in raw:
+        if raw["verify"] not in VERIFY_MODES:
+            raise ValueError(f"verify must be one of {', '.join(VERIFY_MODES)}")
+        o["verify"] = raw["verify"]
+    for k in ("skip_erased", "delta", "resume"):
+        if k in raw:
+            if not isinstance(raw[k], bool):
+                raise ValueError(f"{k} must be true/false")
+            o[k] = raw[k]
+    if o["resume"] and o["delta"]:
+        raise ValueError("resume cannot be combined with delta")
+    return o
+
+
+# ---------------- 작업 ----------------
+
+class Job:
+    """큐에 들어간 flash 하나. 이벤트는 구독한 연결(보통 제출한 연결)로 간다."""
+
+    def __init__(self, job_id: int, target: Target, image_path: str, opts: dict,
+                 tag=None, owned_image: bool = False):
+        self.id = job_id
+        self.target = target
+        self.image_path = image_path
+        self.opts = opts
+        self.tag = tag
+        self.owned_image = owned_image   # 받은 바이트로 데몬이 만든 파일 (끝나면 해제)
+        self.state = "queued"
+        self.pct: Optional[int] = None
+        self.cancel = CancelToken()      # 세션(bs)과 같이 쓰는 작업 토큰, _finish에서 닫는다
+        self.bs: Optional[BootloaderSerial] = None
+        self.result: Optional[TargetResult] = None
+        self.t_submit = time.monotonic()
+        self.t_start: Optional[float] = None
+        self._subs: List[queue.Queue] = []
+        self._lock = threading.Lock()
+
+    def subscribe(self) -> queue.Queue:
+        q: queue.Queue = queue.Queue()
+        with self._lock:
+            self._subs.append(q)
+        return q
+
+    def unsubscribe(self, q: queue.Queue) -> None:
+        with self._lock:
+            if q in self._subs:
+                self._subs.remove(q)
+
+    def emit(self, event: str, **fields) -> None:
+        msg = {"event": event, "job": self.id, **fields}
+        if self.tag is not None:
+            msg["tag"] = self.tag
+        with self._lock:
+            subs = list(self._subs)
+        for q in subs:
+            q.put(msg)
+
+    def request_cancel(self, reason: str) -> None:
+        """
+        큐 밖(실행 중)에서. 세션(bs)도 이 토큰을 쓰므로 단계 사이든 flash
+        도중이든 같다. 작업이 끝나는 중이라 토큰이 닫혔으면 플래그만 켜진다.
+        """
+        self.cancel.cancel(reason)
+
+    def brief(self) -> dict:
+        return {"job": self.id, "port": self.target.port, "state": self.state,
+                "pct": self.pct, "image": os.path.basename(self.image_path), "tag": self.tag}
+
+
+class _JobReporter(Reporter):
+    """core/bootloader.Reporter + flash_target의 state() → 작업 이벤트 (진행률 ≤ 20Hz)."""
+
+    def __init__(self, job: Job):
+        self._job = job
+        self._prog = ProgressThrottle()
+        self._label = None
+
+    def info(self, msg: str):
+        self._job.emit("log", level="info", text=msg)
+
+    def ok(self, msg: str):
+        self._job.emit("log", level="ok", text=msg)
+
+    def warn(self, msg: str):
+        self._job.emit("log", level="warn", text=msg)
+
+    def progress(self, label: str, done: int, total: int):
+        if label != self._label:
+            self._label = label
+            self._prog.reset()
+        pct = int(done * 100.0 / total) if total else 0
+        self._job.pct = pct
+        if self._prog.due(pct):
+            self._job.emit("progress", label=label, done=done, total=total, pct=pct)
+
+    def progress_end(self):
+        self._label = None
+
+    def state(self, text: str):
+        self._job.state = text
+        self._job.emit("state", text=text)
+
+
+class PortWorker:
+    """포트 하나의 FIFO 큐 + 작업 스레드."""
+
+    def __init__(self, daemon: "FlashDaemon", target: Target):
+        self.target = target
+        self._daemon = daemon
+        self._queue: deque = deque()
+        self._cv = threading.Condition()
+        self._stopping = False
+        self.running: Optional[Job] = None
+        self.last: Optional[dict] = None
+        self._thread = threading.Thread(target=self._loop, name=f"port-{target.name}",
+                                        daemon=True)
+        self._thread.start()
+
+    def submit(self, job: Job) -> int:
+        """큐에 넣고 앞에 있는 작업 수(실행 중 포함)를 돌려준다."""
+        with self._cv:
+            if self._stopping:
+                raise RuntimeError("daemon is shutting down")
+            ahead = len(self._queue) + (1 if self.running is not None else 0)
+            self._queue.append(job)
+            self._cv.notify()
+            return ahead
+
+    def remove(self, job_id: int) -> Optional[Job]:
+        """아직 시작하지 않은 작업을 큐에서 뺀다."""
+        with self._cv:
+            for job in self._queue:
+                if job.id == job_id:
+                    self._queue.remove(job)
+                    return job
+        return None
+
+    def find_running(self, job_id: int) -> Optional[Job]:
+        """실행 중인 작업. _finish가 결과를 정한 뒤(running이 아직 안 비었어도)는 None."""
+        job = self.running
+        if job is None or job.id != job_id or job.result is not None:
+            return None
+        return job
+
+    def snapshot(self) -> dict:
+        with self._cv:
+            running = self.running.brief() if self.running is not None else None
+            queued = [j.id for j in self._queue]
+        return {"pins": repr(self.target.pins), "running": running,
+                "queued": queued, "last": self.last}
+
+    def stop(self) -> List[Job]:
+        """새 작업을 막고 대기 작업을 돌려준다. 실행 중인 작업은 그대로."""
+        with self._cv:
+            self._stopping = True
+            dropped = list(self._queue)
+            self._queue.clear()
+            self._cv.notify()
+        return dropped
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        self._thread.join(timeout)
+
+    def _loop(self):
+        while True:
+            with self._cv:
+                while not self._queue and not self._stopping:
+                    self._cv.wait()
+                if self._stopping:
+                    return
+                job = self._queue.popleft()
+                self.running = job
+            try:
+                self._daemon._run(job)
+            finally:
+                with self._cv:
+                    self.running = None
+                    if job.result is not None:
+                        self.last = {"job": job.id, "ok": job.result.ok,
+                                     "msg": job.result.msg,
+                                     "duration_s": round(job.result.elapsed_s, 3)}
+
+
+# ---------------- 데몬 ----------------
+
+class FlashDaemon:
+    """포트별 큐와 작업 실행. 소켓 처리(_Handler)와 분리되어 있어 직접 불러도 된다."""
+
+    def __init__(self, metrics_dir: Optional[str] = None):
+        self._metrics_dir = metrics_dir
+        self._lock = threading.Lock()
+        self._workers: Dict[str, PortWorker] = {}
+        self._images: Dict[str, int] = {}    # 받은 이미지 파일 → 참조 작업 수
+        self._next_id = 1
+        self._t0 = time.monotonic()
+        self._closing = False
+        self.counts = {"submitted": 0, "ok": 0, "failed": 0, "cancelled": 0}
+
+    # ---------- 포트 / 핀 ----------
+    def register(self, target: Target) -> PortWorker:
+        """포트의 작업 스레드 (없으면 만든다). 핀이 다르거나 다른 포트와 겹치면 ValueError."""
+        with self._lock:
+            return self._register_locked(target)
+
+    def _register_locked(self, target: Target) -> PortWorker:
+        leds = (target.pins.fw_update, target.pins.boot0, target.pins.nrst)
+        w = self._workers.get(target.port)
+        if w is not None:
+            have = (w.target.pins.fw_update, w.target.pins.boot0, w.target.pins.nrst)
+            if have != leds:
+                raise ValueError(f"{target.port} already uses {w.target.pins!r}")
+            return w
+        for other in self._workers.values():
+            p = other.target.pins
+            shared = set(leds) & {p.fw_update, p.boot0, p.nrst}
+            if shared:
+                raise ValueError(f"GPIO {sorted(shared)[0]} shared by "
+                                 f"{other.target.port} and {target.port}")
+        w = self._workers[target.port] = PortWorker(self, target)
+        return w
+
+    def _target(self, spec) -> Target:
+        """'PORT' 이면 등록된 핀 맵, 'PORT:핀' 이면 그 핀 (등록과 다르면 거절)."""
+        if not isinstance(spec, str) or not spec:
+            raise ValueError("target is required")
+        target = Target.parse(spec)
+        if ":" not in spec:
+            with self._lock:
+                w = self._workers.get(target.port)
+            if w is not None:
+                return w.target
+        return target
+
+    # ---------- 이미지 ----------
+    def _store_image(self, b64, fmt) -> str:
+        """image_b64 → 내용 해시 이름의 파일 (같은 이미지는 파일 하나를 같이 쓴다)."""
+        fmt = fmt or "bin"
+        if "." + str(fmt).lower() not in IMAGE_EXTS:
+            raise ValueError("format must be bin, hex or elf")
+        try:
+            data = base64.b64decode(b64, validate=True)
+        except (binascii.Error, TypeError, ValueError):
+            raise ValueError("image_b64 is not valid base64") from None
+        if not data:
+            raise ValueError("image is empty")
+        d = _image_dir()
+        os.makedirs(d, exist_ok=True)
+        path = os.path.join(d, hashlib.sha256(data).hexdigest() + "." + str(fmt).lower())
+        with self._lock:
+            if path not in self._images:
+                tmp = f"{path}.{threading.get_ident()}.tmp"
+                with open(tmp, "wb") as f:
+                    f.write(data)
+                os.replace(tmp, path)
+                self._images[path] = 0
+            self._images[path] += 1
+        return path
+
+    def _release_image(self, path: str) -> None:
+        with self._lock:
+            n = self._images.get(path, 0) - 1
+            if n > 0:
+                self._images[path] = n
+                return
+            self._images.pop(path, None)
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+    # ---------- 작업 ----------
+    def submit(self, msg: dict) -> Job:
+        """flash 요청 → 큐에 넣은 Job. 잘못된 요청은 ValueError."""
+        target = self._target(msg.get("target"))
+        opts = _job_opts(msg.get("opts"))
+        if ("image" in msg) == ("image_b64" in msg):
+            raise ValueError("exactly one of image / image_b64 is required")
+        owned = "image_b64" in msg
+        if owned:
+            path = self._store_image(msg["image_b64"], msg.get("format"))
+        else:
+            path = msg["image"]
+            if not isinstance(path, str) or not os.path.isabs(path):
+                raise ValueError("image must be an absolute path")
+            if not os.path.isfile(path):
+                raise ValueError(f"image not found: {path}")
+            if not path.lower().endswith(IMAGE_EXTS):
+                raise ValueError("image must be .bin, .hex or .elf")
+        try:
+            with self._lock:
+                if self._closing:
+                    raise RuntimeError("daemon is shutting down")
+                worker = self._register_locked(target)
+                job = Job(self._next_id, target, path, opts, msg.get("tag"), owned)
+                self._next_id += 1
+                self.counts["submitted"] += 1
+        except Exception:
+            if owned:
+                self._release_image(path)
+            raise
+        return job
+
+    def enqueue(self, job: Job) -> int:
+        return self._workers[job.target.port].submit(job)
+
+    def cancel(self, job_id: int, reason: str = "cancelled by client") -> bool:
+        for w in list(self._workers.values()):
+            job = w.remove(job_id)
+            if job is not None:
+                self._finish(job, TargetResult(job.target).fail(0, FLASH_CANCELLED))
+                return True
+            job = w.find_running(job_id)
+            if job is not None:
+                job.request_cancel(reason)
+                return True
+        return False
+
+    def _run(self, job: Job) -> None:
+        """포트 스레드에서: 작업 하나를 끝까지."""
+        o = job.opts
+        rep = _JobReporter(job)
+        job.t_start = time.monotonic()
+        job.emit("started", port=job.target.port,
+                 queue_s=round(job.t_start - job.t_submit, 3))
+        job.bs = BootloaderSerial(port=job.target.port, baud=o["baud"] or DEFAULT_BAUD,
+                                  erase_mode=o["erase_mode"], skip_erased=o["skip_erased"],
+                                  delta=o["delta"], reporter=rep, verify=o["verify"],
+                                  cancel_token=job.cancel)
+        try:
+            res = flash_target(job.target, job.image_path, rep, baud=o["baud"],
+                               base_addr=o["base_addr"], erase_timeout_s=o["erase_timeout_s"],
+                               resume=o["resume"], bs=job.bs, cancel=job.cancel)
+        except Exception as e:
+            res = TargetResult(job.target).fail(0, f"internal error: {e}")
+            res.metrics = job.bs.metrics
+            job.bs.close()
+        if res.metrics is not None:
+            res.metrics.ok = res.ok
+            if self._metrics_dir:
+                try:
+                    for path in export_metrics(res.metrics, self._metrics_dir):
+                        rep.info(f"metrics → {path}")
+                except OSError as e:
+                    rep.warn(f"metrics export failed: {e}")
+        self._finish(job, res)
+
+    def _finish(self, job: Job, res: TargetResult) -> None:
+        job.result = res
+        job.state = "done"
+        job.bs = None
+        cancelled = res.msg == FLASH_CANCELLED
+        with self._lock:
+            key = "ok" if res.ok else "cancelled" if cancelled else "failed"
+            self.counts[key] += 1
+        job.emit("done", ok=res.ok, cancelled=cancelled, result=res.to_dict(),
+                 queue_s=round((job.t_start or time.monotonic()) - job.t_submit, 3))
+        job.cancel.close()
+        if job.owned_image:
+            self._release_image(job.image_path)
+
+    def status(self) -> dict:
+        with self._lock:
+            workers = dict(self._workers)
+            counts = dict(self.counts)
+        return {"event": "status", "pid": os.getpid(),
+                "uptime_s": round(time.monotonic() - self._t0, 1), "jobs": counts,
+                "ports": {port: w.snapshot() for port, w in workers.items()}}
+
+    # ---------- 요청 ----------
+    def handle(self, msg: dict) -> Iterator[dict]:
+        """요청 하나 → 응답 이벤트들. flash는 done까지 이어진다."""
+        op = msg.get("op")
+        if op == "ping":
+            yield {"event": "pong"}
+        elif op == "status":
+            yield self.status()
+        elif op == "cancel":
+            job_id = msg.get("job")
+            if not isinstance(job_id, int):
+                yield {"event": "error", "msg": "cancel needs an integer job"}
+                return
+            yield {"event": "cancel", "job": job_id, "ok": self.cancel(job_id)}
+        elif op == "flash":
+            try:
+                job = self.submit(msg)
+            except (ValueError, RuntimeError, OSError) as e:
+                yield {"event": "error", "msg": str(e), "tag": msg.get("tag")}
+                return
+            q = job.subscribe()
+            try:
+                try:
+                    ahead = self.enqueue(job)
+                except RuntimeError as e:
+                    self._finish(job, TargetResult(job.target).fail(0, str(e)))
+                else:
+                    yield {"event": "queued", "job": job.id, "port": job.target.port,
+                           "ahead": ahead, "tag": job.tag}
+                while True:
+                    ev = q.get()
+                    yield ev
+                    if ev["event"] == "done":
+                        return
+            finally:
+                job.unsubscribe(q)
+        else:
+            yield {"event": "error", "msg": f"unknown op: {op!r}"}
+
+    def close(self, wait_s: float = SHUTDOWN_WAIT_S) -> None:
+        """대기 작업은 버리고 실행 중인 작업은 취소 후 기다린다."""
+        with self._lock:
+            self._closing = True
+            workers = list(self._workers.values())
+        for w in workers:
+            for job in w.stop():
+                self._finish(job, TargetResult(job.target).fail(0, "daemon shutting down"))
+            job = w.running
+            if job is not None:
+                job.request_cancel("daemon shutting down")
+        deadline = time.monotonic() + wait_s
+        for w in workers:
+            w.join(max(0.0, deadline - time.monotonic()))
+        gpio.cleanup()
+
+
+# ---------------- 소켓 ----------------
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        daemon: FlashDaemon = self.server.flash_daemon
+        for line in self.rfile:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                msg = json.loads(line)
+                if not isinstance(msg, dict):
+                    raise ValueError("request must be a JSON object")
+            except ValueError as e:
+                if not self._send({"event": "error", "msg": f"bad request: {e}"}):
+                    return
+                continue
+            events = daemon.handle(msg)
+            try:
+                for ev in events:
+                    if not self._send(ev):
+                        return      # 연결이 끊겨도 작업은 계속 (구독만 해제)
+            finally:
+                events.close()
+
+    def _send(self, ev: dict) -> bool:
+        try:
+            self.wfile.write((json.dumps(ev, ensure_ascii=False) + "\n").encode("utf-8"))
+            return True
+        except OSError:
+            return False
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path: str, daemon: FlashDaemon):
+        self.flash_daemon = daemon
+        super().__init__(path, _Handler)
+
+
+def _claim_socket(path: str) -> None:
+    """남아 있는 소켓 파일: 살아 있는 데몬이면 RuntimeError, 아니면 지운다."""
+    if not os.path.exists(path):
+        return
+    s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        s.connect(path)
+    except OSError:
+        os.unlink(path)
+        return
+    finally:
+        s.close()
+    raise RuntimeError(f"another daemon is listening on {path}")
+
+
+def serve(socket_path: str, daemon: FlashDaemon, stop: threading.Event) -> None:
+    """stop이 켜질 때까지 socket_path에서 요청을 받는다."""
+    _claim_socket(socket_path)
+    server = _Server(socket_path, daemon)
+    os.chmod(socket_path, 0o660)
+    t = threading.Thread(target=server.serve_forever, name="accept", daemon=True)
+    t.start()
+    try:
+        while not stop.wait(1.0):
+            pass
+    finally:
+        server.shutdown()
+        server.server_close()
+        try:
+            os.unlink(socket_path)
+        except OSError:
+            pass
+
+
+# ---------------- main ----------------
+
+def _parse_args(argv) -> Optional[dict]:
+    opts = {"socket": default_socket_path(), "metrics_dir": None, "targets": []}
+    argv = list(argv or [])
+    i = 0
+    while i < len(argv):
+        a = argv[i]
+        if a in ("--socket", "--metrics-dir", "--target"):
+            if i + 1 >= len(argv):
+                print(f"{a} 에 값이 필요합니다", file=sys.stderr)
+                return None
+            v = argv[i + 1]
+            if a == "--socket":
+                opts["socket"] = os.path.abspath(os.path.expanduser(v))
+            elif a == "--metrics-dir":
+                opts["metrics_dir"] = os.path.expanduser(v)
+            else:
+                opts["targets"].append(v)
+            i += 2
+            continue
+        print(f"알 수 없는 인자: {a}", file=sys.stderr)
+        return None
+    return opts
+
+
+def main(argv=None) -> int:
+    opts = _parse_args(argv)
+    if opts is None:
+        return EXIT_USAGE
+    daemon = FlashDaemon(metrics_dir=opts["metrics_dir"])
+    # --target: 포트/핀을 미리 등록하고 GPIO fd를 열어 둔다 (권한 문제를 먼저 알게)
+    for spec in opts["targets"]:
+        try:
+            daemon.register(Target.parse(spec)).target.pins.open()
+        except ValueError as e:
+            print(f"타깃 지정 오류: {e}", file=sys.stderr)
+            return EXIT_USAGE
+        except OSError as e:
+            print(f"[daemon] {spec}: GPIO open failed: {e}", file=sys.stderr)
+
+    stop = threading.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda *_: stop.set())
+    print(f"[daemon] listening on {opts['socket']} (pid {os.getpid()})", flush=True)
+    try:
+        serve(opts["socket"], daemon, stop)
+    except (RuntimeError, OSError) as e:
+        print(f"[daemon] {e}", file=sys.stderr)
+        return 1
+    finally:
+        daemon.close()
+        print(f"[daemon] stopped ({daemon.counts})", flush=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
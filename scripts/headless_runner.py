@@ -7,35 +7,49 @@ GUI를 띄우지 않고 4단계로 펌웨어 업데이트를 진행한다:
   3) BIN 경로 입력
   4) Flash (Erase + Write)
 
+--readout <파일> 은 3/4단계 대신 플래시를 그 파일로 읽는다 (Read Memory).
+
 각 단계 시작 전에 "진행하시겠습니까?" 확인을 받는다.
+--yes (+ --bin) 를 주면 확인/입력 없이 끝까지 진행하고, --json 으로 단계별
+결과를 기계가 읽을 수 있는 JSON으로 남긴다 (생산 라인 스크립트용).
+
+종료 코드: 0 성공, 1~5 실패한 단계 번호, 64 인자 오류, 130 Ctrl+C.
 """
 
+import contextlib
+import json
 import os
 import sys
 import time
-import struct
-import serial
 
 import core.control_gpio as gpio
+from core.baud import BAUD_AUTO, BAUD_CANDIDATES, DEFAULT_BAUD, parse_baud
+from core.bootloader import DEFAULT_BASE_ADDR, ERASE_TIMEOUT_S, Bootloader, Reporter
+from core.cancel import CancelToken
+from core.flash_layout import ERASE_AUTO, ERASE_MASS
+from core.image import IMAGE_EXTS
+from core.metrics import FlashMetrics, export as export_metrics
+from core.readout import default_backup_path
+from core.ringlog import ProgressThrottle
+from core.stream import STDIN_PATH
+from core.verify import VERIFY_FAST, VERIFY_MODES
 
 
-# ---- STM32 시스템 부트로더 프로토콜 상수 (GUI 코드와 동일) ----
-CMD_ACK       = b"\x79"
-CMD_NACK      = b"\x1F"
-CMD_SYNC      = b"\x7F"
-CMD_EXT_ERASE = b"\x44\xBB"
-CMD_WRITE     = b"\x31\xCE"
+EXIT_USAGE = 64   # 인자 오류 (sysexits EX_USAGE)
 
-DEFAULT_PORT      = "/dev/ttyS0"
-DEFAULT_BAUD      = 115200
-DEFAULT_BASE_ADDR = 0x08000000
-ERASE_TIMEOUT_S   = 20.0
+DEFAULT_PORT = "/dev/ttyS0"
 
 
 # ---------------- TUI 유틸 ----------------
 
+_assume_yes = False   # --yes: 모든 확인을 자동 승인
+
+
 def _confirm(prompt: str) -> bool:
-    """진행 확인. y/yes만 True. 기본값은 No."""
+    """진행 확인. y/yes만 True. 기본값은 No. --yes면 묻지 않고 True."""
+    if _assume_yes:
+        print(f"{prompt} [y/N]: y (--yes)")
+        return True
     try:
         ans = input(f"{prompt} [y/N]: ").strip().lower()
     except EOFError:
@@ -84,199 +98,176 @@ def _info(msg: str):
     print(f"  • {msg}")
 
 
-# ---------------- 시리얼 프로토콜 (동기 버전) ----------------
+def _progress_bar(label: str, pct: int, done: int, total: int):
+    """한 줄 갱신형 진행 막대."""
+    bar_len = 30
+    filled = int(bar_len * pct / 100)
+    bar = "█" * filled + "░" * (bar_len - filled)
+    sys.stdout.write(f"\r  {label} [{bar}] {pct:3d}% ({done:,}/{total:,})")
+    sys.stdout.flush()
 
-class BootloaderSerial:
-    """SerialWorker의 Qt 의존성을 뺀 동기 버전. 같은 프로토콜."""
 
-    def __init__(self, port: str, baud: int = DEFAULT_BAUD, timeout: float = 0.2):
-        self._port = port
-        self._baud = baud
-        self._timeout = timeout
-        self._ser = None
+# ---------------- 시리얼 (core/bootloader.py 어댑터) ----------------
 
-    def open(self) -> bool:
-        if self._ser and self._ser.is_open:
-            return True
-        try:
-            self._ser = serial.Serial(
-                port=self._port,
-                baudrate=self._baud,
-                timeout=self._timeout,
-                bytesize=serial.EIGHTBITS,
-                parity=serial.PARITY_EVEN,    # 8E1
-                stopbits=serial.STOPBITS_ONE,
-                xonxoff=False, rtscts=False, dsrdtr=False,
-            )
-            try:
-                self._ser.setDTR(False); self._ser.setRTS(False)
-                self._ser.reset_input_buffer(); self._ser.reset_output_buffer()
-            except Exception:
-                pass
-            time.sleep(0.03)
-            return True
-        except Exception as e:
-            print(f"  [serial] open error: {e}")
-            self._ser = None
-            return False
+class ConsoleReporter(Reporter):
+    """
+    BootloaderSerial의 출력 대상. 기본은 현재 TTY에 • 줄과 한 줄 갱신 막대.
+    멀티 타깃 모드는 같은 메서드를 가진 객체로 바꿔 끼운다.
+    """
 
-    def close(self):
-        try:
-            if self._ser and self._ser.is_open:
-                self._ser.close()
-        finally:
-            self._ser = None
-
-    def _wait_ack(self, timeout_s: float) -> bool:
-        if not (self._ser and self._ser.is_open):
-            return False
-        deadline = time.time() + timeout_s
-        while time.time() < deadline:
-            b = self._ser.read(1)
-            if b == CMD_ACK:
-                return True
-            elif b:
-                continue
-        return False
+    def __init__(self):
+        self._last = None      # (label, pct) — 같은 퍼센트는 다시 그리지 않음
+        self._pending = None   # throttle로 아직 못 그린 마지막 값
+        self._throttle = ProgressThrottle()   # 느린 시리얼 콘솔: 최대 20Hz
+
+    def info(self, msg: str):
+        _info(msg)
+
+    def ok(self, msg: str):
+        _ok(msg)
+
+    def warn(self, msg: str):
+        # 진행 막대 줄 위에 쓰고, 막대는 다음 progress에서 다시 그린다
+        if self._last is not None:
+            sys.stdout.write("\r\033[K")
+            self._last = None
+        print(f"  ! {msg}")
+
+    def progress(self, label: str, done: int, total: int):
+        if not total:
+            # 크기를 모르는 스트림: 4 KiB마다 바이트 수만 갱신
+            mark = (label, None, done // 4096)
+            if mark != self._last:
+                sys.stdout.write(f"\r  {label} {done:,} bytes")
+                sys.stdout.flush()
+                self._last = mark
+            return
+        pct = int(done * 100.0 / total)
+        if (label, pct) == self._last:
+            return
+        if self._last is not None and self._last[0] != label:
+            self._throttle.reset()
+        if self._throttle.due(pct):
+            _progress_bar(label, pct, done, total)
+            self._last = (label, pct)
+            self._pending = None
+        else:
+            self._pending = (label, pct, done, total)
+
+    def progress_end(self):
+        if self._pending is not None:
+            _progress_bar(*self._pending)
+            self._last = self._pending[:2]
+            self._pending = None
+        if self._last is not None:
+            sys.stdout.write("\n")
+            self._last = None
+        self._throttle.reset()
+
+
+class BootloaderSerial(Bootloader):
+    """
+    headless용 Bootloader (core/bootloader.py): 기본 reporter가 콘솔이고,
+    --bin - 는 stdin 스트림으로, write/readout 실패 시 --resume 안내를 붙인다.
+    """
 
-    def sync(self, window_s: float = 5.0) -> bool:
-        """0x7F 반복 송신하며 ACK 대기."""
-        if not (self._ser and self._ser.is_open):
-            return False
-        deadline = time.time() + window_s
-        while time.time() < deadline:
-            self._ser.write(CMD_SYNC); self._ser.flush()
-            if self._wait_ack(0.25):
-                return True
-            time.sleep(0.03)
-        return False
+    def __init__(self, port: str, baud: int = DEFAULT_BAUD, timeout: float = 0.2,
+                 erase_mode: str = ERASE_AUTO, skip_erased: bool = True,
+                 delta: bool = False, pipelined: bool = False,
+                 reporter: "ConsoleReporter | None" = None, verify: str = VERIFY_FAST,
+                 cancel_token: CancelToken | None = None):
+        super().__init__(port, baud, timeout, erase_mode, skip_erased, delta, pipelined,
+                         reporter=reporter or ConsoleReporter(), verify=verify,
+                         cancel_token=cancel_token)
 
     def flash(self, bin_path: str, base_addr: int = DEFAULT_BASE_ADDR,
-              erase_timeout_s: float = ERASE_TIMEOUT_S) -> tuple[bool, str]:
-        """Erase + Write. 진행률을 stdout에 한 줄 갱신 형태로 출력."""
-        if not os.path.isfile(bin_path):
-            return False, "BIN file not found"
-
-        with open(bin_path, "rb") as f:
-            fw = f.read()
-        total = len(fw)
-        if total == 0:
-            return False, "BIN is empty"
-        _info(f"BIN size = {total:,} bytes")
-
-        if not self.open():
-            return False, "cannot open port"
-
-        old_to = self._ser.timeout
-        if (old_to or 0) < 0.5:
-            self._ser.timeout = 0.5
-
-        # --- Erase ---
-        def try_ext_erase() -> bool:
-            self._ser.reset_input_buffer()
-            self._ser.write(CMD_EXT_ERASE); self._ser.flush()
-            if not self._wait_ack(0.8):
-                return False
-            self._ser.write(b"\xFF\xFF\x00"); self._ser.flush()
-            return self._wait_ack(erase_timeout_s)
-
-        _info("Mass erase...")
-        if not try_ext_erase():
-            _info("Re-SYNC and retry erase")
-            if not self.sync(5.0):
-                self._ser.timeout = old_to
-                return False, "Bootloader SYNC failed"
-            if not try_ext_erase():
-                self._ser.timeout = old_to
-                return False, "Erase NACK/timeout"
-        _ok("Erase OK")
-
-        # --- Write ---
-        CHUNK = 256
-        written = 0
-        addr = base_addr
-
-        def write_block(a: int, data: bytes) -> bool:
-            self._ser.write(CMD_WRITE); self._ser.flush()
-            if not self._wait_ack(0.8):
-                return False
-            ab = struct.pack(">I", a)
-            chk = ab[0] ^ ab[1] ^ ab[2] ^ ab[3]
-            self._ser.write(ab + bytes([chk])); self._ser.flush()
-            if not self._wait_ack(0.8):
-                return False
-            lb = bytes([len(data) - 1])
-            csum = lb[0]
-            for b in data:
-                csum ^= b
-            self._ser.write(lb + data + bytes([csum])); self._ser.flush()
-            return self._wait_ack(1.5)
-
-        last_pct = -1
-        while written < total:
-            block = fw[written:written + CHUNK]
-            for attempt in range(2):
-                if write_block(addr, block):
-                    written += len(block); addr += len(block)
-                    pct = int(written * 100.0 / total)
-                    if pct != last_pct:
-                        bar_len = 30
-                        filled = int(bar_len * pct / 100)
-                        bar = "█" * filled + "░" * (bar_len - filled)
-                        sys.stdout.write(
-                            f"\r  Writing [{bar}] {pct:3d}% ({written:,}/{total:,})"
-                        )
-                        sys.stdout.flush()
-                        last_pct = pct
-                    break
-                else:
-                    time.sleep(0.05)
-            else:
-                sys.stdout.write("\n")
-                self._ser.timeout = old_to
-                return False, f"write block failed @0x{addr:08X}"
-
-        sys.stdout.write("\n")
-        self._ser.timeout = old_to
-        return True, ""
+              erase_timeout_s: float = ERASE_TIMEOUT_S,
+              resume: bool = False, backup: str = "") -> tuple[bool, str]:
+        if bin_path == STDIN_PATH:
+            if resume or backup:
+                return False, "resume/backup needs a seekable image file"
+            return self.flash_stream(sys.stdin.buffer, base_addr, erase_timeout_s)
+        ok, msg = super().flash(bin_path, base_addr, erase_timeout_s, resume, backup)
+        if not ok and self.last_flash.get("resumable"):
+            self.reporter.info("같은 명령에 --resume 을 붙이면 여기서부터 이어 씁니다")
+        return ok, msg
+
+    def readout(self, path: str, addr: int = DEFAULT_BASE_ADDR, size: int | None = None,
+                resume: bool = False) -> tuple[bool, str]:
+        ok, msg = super().readout(path, addr, size, resume)
+        if not ok and self.last_readout.get("resumable"):
+            self.reporter.info("같은 명령에 --resume 을 붙이면 여기서부터 이어 읽습니다")
+        return ok, msg
 
 
 # ---------------- 단계별 함수 ----------------
 
-def step1_enter_bootloader() -> bool:
+def step1_enter_bootloader(bs: BootloaderSerial | None = None) -> bool:
+    """
+    bs가 있으면 그 포트를 리셋 전에 열고 NRST 해제 직후부터 SYNC 한다
+    (core/entry.py). 응답이 없어도 GPIO 시퀀스가 끝났으면 성공 — 2단계가
+    일반 SYNC로 다시 시도한다.
+    """
     _step(1, 5, "Bootloader 진입")
     print("  실행 시퀀스:")
     print("    1) FW_UPDATE = HIGH  (PMIC keep-alive)")
     print("    2) BOOT_CTRL = HIGH  (BOOT0 system bootloader)")
     print("    3) NRST 펄스 (LOW 100ms → HIGH)")
+    if bs is not None:
+        print("    4) 리셋 해제 직후 SYNC(0x7F) → ACK 대기")
     if not _confirm("  진행하시겠습니까?"):
         _info("취소됨")
         return False
     try:
-        gpio.power_hold_set(1); time.sleep(0.05)
-        gpio.boot0_set(1);      time.sleep(0.01)
-        gpio.nrst_pulse(low_ms=100)
-        time.sleep(0.05)
+        if bs is not None:
+            bs.enter_and_sync(log=_info)
+            _ok("Bootloader 진입 시퀀스 완료")
+            return True
+        seq = gpio.run_sequence("enter", gpio.enter_bootloader_steps(), log=_info)
     except Exception as e:
         _fail(f"GPIO 제어 실패: {e}")
         return False
-    _ok("Bootloader 진입 시퀀스 완료")
+    _ok(f"Bootloader 진입 시퀀스 완료 ({seq.total_ms:.1f}ms)")
     return True
 
 
-def step2_connect(port: str) -> BootloaderSerial | None:
+def step2_connect(port: str, erase_mode: str = ERASE_AUTO,
+                  skip_erased: bool = True, delta: bool = False,
+                  baud: int = DEFAULT_BAUD,
+                  bs: BootloaderSerial | None = None,
+                  verify: str = VERIFY_FAST) -> BootloaderSerial | None:
+    """bs가 1단계에서 이미 SYNC 됐으면 그대로 돌려준다."""
     _step(2, 5, "Connect")
-    _info(f"포트: {port}, 8E1 @ {DEFAULT_BAUD} bps")
-    print("  실행: SYNC(0x7F) 송신 → ACK(0x79) 대기")
+    if bs is not None and bs.metrics.reset_ack_s is not None:
+        _ok(f"Connected (1단계에서 ACK 받음, NRST 해제 후 "
+            f"{bs.metrics.reset_ack_s * 1000:.1f}ms)")
+        return bs
+    if baud == BAUD_AUTO:
+        _info(f"포트: {port}, 8E1 @ auto ({'/'.join(map(str, BAUD_CANDIDATES))} bps)")
+        print("  실행: 후보 baud마다 SYNC(0x7F) + Get ID 확인, 실패 시 리셋 후 다음 후보")
+    else:
+        _info(f"포트: {port}, 8E1 @ {baud} bps")
+        print("  실행: SYNC(0x7F) 송신 → ACK(0x79) 대기")
     if not _confirm("  진행하시겠습니까?"):
         _info("취소됨")
         return None
 
-    bs = BootloaderSerial(port=port)
+    if bs is None:
+        bs = BootloaderSerial(port=port, baud=baud or DEFAULT_BAUD, erase_mode=erase_mode,
+                              skip_erased=skip_erased, delta=delta, verify=verify)
     if not bs.open():
         _fail("시리얼 포트 열기 실패")
         return None
 
+    if baud == BAUD_AUTO:
+        sel = bs.negotiate_baud(reset=gpio.bootloader_reset)
+        if sel:
+            _ok(f"Connected @ {sel} bps (ACK 받음)")
+            return bs
+        _fail("모든 baud 후보에서 응답 없음 — 부트로더 모드가 맞는지 확인하세요")
+        bs.close()
+        return None
+
     if bs.sync(window_s=5.0):
         _ok(f"Connected (ACK 받음)")
         return bs
@@ -286,12 +277,30 @@ def step2_connect(port: str) -> BootloaderSerial | None:
         return None
 
 
-def step3_get_bin_path() -> str | None:
-    _step(3, 5, "BIN 파일 경로 입력")
+def _check_bin_path(raw: str) -> str | None:
+    """--bin 값 검증 (묻지 않음). 실패 시 None. "-"는 stdin 스트림."""
+    if raw == STDIN_PATH:
+        _ok("stdin에서 BIN 스트림을 읽습니다")
+        return STDIN_PATH
+    path = _expand_path(raw)
+    if not os.path.isfile(path):
+        _fail(f"파일 없음: {path}")
+        return None
+    if not path.lower().endswith(IMAGE_EXTS):
+        _fail(f"지원하지 않는 형식 (.bin/.hex/.elf): {path}")
+        return None
+    _ok(f"파일 확인됨: {path} ({os.path.getsize(path):,} bytes)")
+    return path
+
+
+def step3_get_bin_path(bin_arg: str | None = None) -> str | None:
+    _step(3, 5, "펌웨어 파일 경로 입력 (BIN/HEX/ELF)")
+    if bin_arg:
+        return _check_bin_path(bin_arg)
     _info("(빈 입력=취소, ~/path 사용 가능)")
     while True:
         try:
-            raw = input("  BIN 경로: ").strip()
+            raw = input("  파일 경로: ").strip()
         except EOFError:
             return None
         if not raw:
@@ -301,24 +310,38 @@ def step3_get_bin_path() -> str | None:
         if not os.path.isfile(path):
             _fail(f"파일 없음: {path} — 다시 입력하거나 빈 줄로 취소")
             continue
-        if not path.lower().endswith(".bin"):
-            _fail(".bin 파일이 아닙니다 — 다시 입력하거나 빈 줄로 취소")
+        if not path.lower().endswith(IMAGE_EXTS):
+            _fail(".bin/.hex/.elf 파일이 아닙니다 — 다시 입력하거나 빈 줄로 취소")
             continue
         sz = os.path.getsize(path)
         _ok(f"파일 확인됨: {path} ({sz:,} bytes)")
         return path
 
 
-def step4_flash(bs: BootloaderSerial, bin_path: str) -> bool:
+def step4_flash(bs: BootloaderSerial, bin_path: str,
+                base_addr: int = DEFAULT_BASE_ADDR,
+                erase_timeout_s: float = ERASE_TIMEOUT_S, resume: bool = False,
+                backup: str = "") -> bool:
     _step(4, 5, "Flash")
-    _info(f"Base addr: 0x{DEFAULT_BASE_ADDR:08X}")
-    _info(f"Erase timeout: {ERASE_TIMEOUT_S}s")
+    if bin_path == STDIN_PATH or bin_path.lower().endswith(".bin"):
+        _info(f"Base addr: 0x{base_addr:08X}")
+    else:
+        _info("Base addr: 파일의 절대 주소 (HEX/ELF)")
+    _info(f"Erase mode: {bs.erase_mode}, timeout: {erase_timeout_s}s, "
+          f"verify: {bs.verify_mode}")
     _info(f"BIN: {bin_path}")
+    if resume:
+        _info("Resume: 저널이 맞으면 이어서 쓰기")
+    if backup:
+        _info(f"Backup: erase 전 지워질 범위 → {backup}")
     if not _confirm("  진행하시겠습니까?"):
         _info("취소됨")
         return False
 
-    ok, msg = bs.flash(bin_path)
+    ok, msg = bs.flash(bin_path, base_addr=base_addr, erase_timeout_s=erase_timeout_s,
+                       resume=resume, backup=backup)
+    bs.metrics.ok = ok
+    bs.metrics.baud = bs.baud
     if ok:
         _ok("Flash 완료")
         return True
@@ -327,6 +350,41 @@ def step4_flash(bs: BootloaderSerial, bin_path: str) -> bool:
         return False
 
 
+def _check_out_path(raw: str) -> str | None:
+    """--readout 출력 경로 검증: 상위 디렉터리가 있어야 하고 디렉터리면 안 된다."""
+    path = _expand_path(raw)
+    if os.path.isdir(path):
+        _fail(f"디렉터리입니다: {path}")
+        return None
+    if not os.path.isdir(os.path.dirname(path)):
+        _fail(f"디렉터리 없음: {os.path.dirname(path)}")
+        return None
+    _ok(f"출력 파일: {path}" + (" (덮어씀)" if os.path.exists(path) else ""))
+    return path
+
+
+def step4_readout(bs: BootloaderSerial, path: str, base_addr: int = DEFAULT_BASE_ADDR,
+                  size: int | None = None, resume: bool = False) -> bool:
+    _step(4, 5, "Readout")
+    _info(f"Base addr: 0x{base_addr:08X}, 크기: "
+          + (f"{size:,} bytes" if size else "플래시 끝까지 (Get ID)"))
+    _info(f"출력: {path}")
+    if resume:
+        _info("Resume: 사이드카(.part.json)가 맞으면 이어서 읽기")
+    if not _confirm("  진행하시겠습니까?"):
+        _info("취소됨")
+        return False
+
+    ok, msg = bs.readout(path, addr=base_addr, size=size, resume=resume)
+    bs.metrics.ok = ok
+    bs.metrics.baud = bs.baud
+    if ok:
+        _ok("Readout 완료")
+        return True
+    _fail(f"Readout 실패: {msg}")
+    return False
+
+
 def step5_exit_bootloader() -> bool:
     _step(5, 5, "Bootloader 빠져나오기 (앱 펌웨어 부팅)")
     print("  실행 시퀀스:")
@@ -336,46 +394,360 @@ def step5_exit_bootloader() -> bool:
         _info("취소됨 — BOOT0/NRST는 그대로 둡니다")
         return False
     try:
-        gpio.boot0_set(0); time.sleep(0.01)
-        gpio.nrst_pulse(low_ms=100)
-        time.sleep(0.05)
+        seq = gpio.run_sequence("exit", gpio.exit_bootloader_steps(), log=_info)
     except Exception as e:
         _fail(f"GPIO 제어 실패: {e}")
         return False
-    _ok("Bootloader 종료, 앱 펌웨어로 부팅 시작")
+    _ok(f"Bootloader 종료, 앱 펌웨어로 부팅 시작 ({seq.total_ms:.1f}ms)")
     return True
 
 
+# ---------------- 인자 / 결과 ----------------
+
+class _UsageError(ValueError):
+    """인자 오류 → 종료 코드 EXIT_USAGE (--json이면 결과 JSON에도 남긴다)."""
+
+
+def _default_opts() -> dict:
+    return {
+        "port": DEFAULT_PORT, "baud": DEFAULT_BAUD, "erase_mode": ERASE_AUTO,
+        "skip_erased": True, "delta": False, "targets": [], "bin": None,
+        "base_addr": DEFAULT_BASE_ADDR, "erase_timeout_s": ERASE_TIMEOUT_S,
+        "yes": False, "json": None, "metrics_dir": None, "resume": False,
+        "readout": None, "read_size": None, "backup": None, "verify": VERIFY_FAST,
+    }
+
+
+def _json_dest(argv) -> str | None:
+    """--json 값만 먼저 (인자 오류도 JSON으로 남기려고). 마지막 것이 유효."""
+    dest = None
+    for i, a in enumerate(argv[:-1]):
+        if a == "--json":
+            dest = argv[i + 1]
+    return dest
+
+
+def _parse_args(argv) -> dict:
+    """headless 인자 → 옵션 dict. 잘못된 인자는 _UsageError."""
+    opts = _default_opts()
+    with_value = {"--port", "--baud", "--target", "--bin", "--base-addr",
+                  "--erase-timeout", "--json", "--metrics-dir", "--readout",
+                  "--read-size", "--backup", "--verify"}
+    argv = list(argv or [])
+    i = 0
+    while i < len(argv):
+        a = argv[i]
+        if a in with_value:
+            if i + 1 >= len(argv):
+                raise _UsageError(f"{a} 에 값이 필요합니다")
+            v = argv[i + 1]
+            i += 2
+            try:
+                if a == "--port":
+                    opts["port"] = v
+                elif a == "--baud":
+                    opts["baud"] = parse_baud(v)
+                elif a == "--target":
+                    opts["targets"].append(v)
+                elif a == "--bin":
+                    opts["bin"] = v
+                elif a == "--base-addr":
+                    opts["base_addr"] = int(v, 0)
+                    if not 0 <= opts["base_addr"] <= 0xFFFFFFFF:
+                        raise ValueError(v)
+                elif a == "--erase-timeout":
+                    opts["erase_timeout_s"] = float(v)
+                    if opts["erase_timeout_s"] <= 0:
+                        raise ValueError(v)
+                elif a == "--json":
+                    opts["json"] = v
+                elif a == "--metrics-dir":
+                    opts["metrics_dir"] = _expand_path(v)
+                elif a == "--readout":
+                    opts["readout"] = v
+                elif a == "--read-size":
+                    opts["read_size"] = int(v, 0)
+                    if opts["read_size"] <= 0:
+                        raise ValueError(v)
+                elif a == "--backup":
+                    opts["backup"] = v
+                elif a == "--verify":
+                    if v not in VERIFY_MODES:
+                        raise ValueError(v)
+                    opts["verify"] = v
+            except ValueError:
+                raise _UsageError(f"잘못된 {a} 값: {v}") from None
+            continue
+        if a in ("--yes", "-y"):
+            opts["yes"] = True
+        elif a == "--mass-erase":
+            opts["erase_mode"] = ERASE_MASS
+        elif a == "--no-skip-ff":
+            opts["skip_erased"] = False
+        elif a == "--delta":
+            opts["delta"] = True
+        elif a == "--resume":
+            opts["resume"] = True
+        else:
+            raise _UsageError(f"알 수 없는 인자: {a}")
+        i += 1
+    return opts
+
+
+def _check_opts(opts: dict) -> None:
+    """인자 조합 검사. 안 되는 조합은 _UsageError."""
+    if opts["bin"] == STDIN_PATH and not opts["yes"]:
+        # 확인 프롬프트가 stdin을 읽으면 이미지가 섞인다
+        raise _UsageError("--bin - (stdin 스트림)은 --yes 와 함께 써야 합니다")
+    if opts["yes"] and not opts["bin"] and not opts["readout"]:
+        # 3단계가 경로 입력을 기다리면 무인 실행이 멈춘다
+        raise _UsageError("--yes 는 --bin (또는 --readout) 과 함께 써야 합니다")
+    if opts["resume"] and (opts["delta"] or opts["bin"] == STDIN_PATH):
+        raise _UsageError("--resume 은 --delta / --bin - 와 함께 쓸 수 없습니다")
+    if opts["readout"] and (opts["bin"] or opts["targets"] or opts["backup"]):
+        raise _UsageError("--readout 은 --bin / --target / --backup 과 함께 쓸 수 없습니다")
+    if opts["read_size"] and not opts["readout"]:
+        raise _UsageError("--read-size 는 --readout 과 함께 씁니다")
+    if opts["backup"] and (opts["targets"] or opts["bin"] == STDIN_PATH):
+        raise _UsageError("--backup 은 멀티 타깃 / --bin - 와 함께 쓸 수 없습니다")
+
+
+class _RunReport:
+    """--json 결과: 단계별 상태/소요 시간과 flash 통계."""
+
+    STEP_NAMES = {1: "enter_bootloader", 2: "connect", 3: "bin_path",
+                  4: "flash", 5: "exit_bootloader"}
+    READOUT_STEP_NAMES = {**STEP_NAMES, 3: "output_path", 4: "readout"}
+
+    def __init__(self, opts: dict):
+        if opts["readout"]:
+            self.STEP_NAMES = self.READOUT_STEP_NAMES
+        self._t0 = time.monotonic()
+        self.data = {
+            "ok": False, "exit_code": None, "failed_step": None,
+            "port": opts["port"], "baud": opts["baud"] or "auto",
+            "bin": None, "base_addr": f"0x{opts['base_addr']:08X}",
+            "steps": [], "flash": {}, "total_s": 0.0,
+        }
+
+    def run(self, idx: int, fn):
+        """단계 실행 + 상태/시간 기록. fn의 반환값을 그대로 돌려준다."""
+        t = time.monotonic()
+        status = "failed"
+        try:
+            ret = fn()
+            status = "ok" if ret else "failed"
+            return ret
+        except KeyboardInterrupt:
+            status = "interrupted"
+            raise
+        finally:
+            self.data["steps"].append({
+                "step": idx, "name": self.STEP_NAMES[idx], "status": status,
+                "duration_s": round(time.monotonic() - t, 3),
+            })
+
+    def finish(self, code: int) -> dict:
+        ran = {st["step"] for st in self.data["steps"]}
+        self.data["steps"] += [
+            {"step": i, "name": n, "status": "not_run", "duration_s": 0.0}
+            for i, n in self.STEP_NAMES.items() if i not in ran
+        ]
+        self.data["ok"] = code == 0
+        self.data["exit_code"] = code
+        self.data["failed_step"] = code if code in self.STEP_NAMES else None
+        self.data["total_s"] = round(time.monotonic() - self._t0, 3)
+        return self.data
+
+
+def _export_metrics(metrics: FlashMetrics, directory: str | None) -> None:
+    """--metrics-dir: <포트>.json / <포트>.prom 저장. 실패는 경고만."""
+    if not directory:
+        return
+    try:
+        for path in export_metrics(metrics, directory):
+            _info(f"metrics → {path}")
+    except OSError as e:
+        _fail(f"metrics 저장 실패: {e}")
+
+
+def _write_json(dest: str | None, data) -> None:
+    """--json 목적지("-"는 stdout)에 결과를 쓴다."""
+    if not dest:
+        return
+    text = json.dumps(data, ensure_ascii=False, indent=2)
+    if dest == "-":
+        sys.__stdout__.write(text + "\n")
+        sys.__stdout__.flush()
+        return
+    with open(_expand_path(dest), "w") as f:
+        f.write(text + "\n")
+
+
+# ---------------- 멀티 타깃 ----------------
+
+def run_multi(target_specs, bin_arg, json_dest=None, metrics_dir=None, **flash_opts) -> int:
+    """--target 여러 개: 확인 한 번 후 타깃들을 동시에 flash (multi_runner.py)."""
+    import multi_runner
+
+    try:
+        targets = [multi_runner.Target.parse(spec) for spec in target_specs]
+        multi_runner.check_targets(targets)
+    except ValueError as e:
+        raise _UsageError(f"타깃 지정 오류: {e}") from None
+    if not bin_arg:
+        raise _UsageError("멀티 타깃 모드는 --bin 이 필요합니다")
+    if bin_arg == STDIN_PATH:
+        raise _UsageError("멀티 타깃 모드는 stdin 스트림(--bin -)을 쓸 수 없습니다")
+    bin_path = _check_bin_path(bin_arg)
+    if bin_path is None:
+        return 3
+
+    _step(1, 1, f"멀티 타깃 Flash ({len(targets)}개)")
+    for t in targets:
+        _info(f"{t.port}  {t.pins!r}")
+    _info(f"BIN: {bin_path} ({os.path.getsize(bin_path):,} bytes)")
+    print("  각 타깃: Bootloader 진입 → Connect → Flash → Bootloader 종료")
+    if not _confirm("  진행하시겠습니까?"):
+        _info("취소됨")
+        return 1
+
+    t0 = time.monotonic()
+    results = multi_runner.run(targets, bin_path, **flash_opts)
+    total_s = time.monotonic() - t0
+    multi_runner.print_summary(results, total_s)
+    for r in results:
+        if r.metrics is not None:
+            _export_metrics(r.metrics, metrics_dir)
+    code = multi_runner.exit_code(results)
+    _write_json(json_dest, {
+        "ok": code == 0, "exit_code": code, "bin": bin_path,
+        "total_s": round(total_s, 3),
+        "targets": [r.to_dict() for r in results],
+    })
+    return code
+
+
 # ---------------- main ----------------
 
+def _usage_exit(msg: str, opts: dict | None, json_dest: str | None) -> int:
+    """인자 오류: 메시지 + (--json이면) failed_step=null, error=msg 인 결과."""
+    _fail(msg)
+    report = _RunReport(opts or _default_opts())
+    report.data["error"] = msg
+    _write_json(json_dest, report.finish(EXIT_USAGE))
+    return EXIT_USAGE
+
+
 def main(argv=None):
-    print("════════════════════════════════════════")
-    print("  Firmware Uploader — Headless Mode")
-    print("════════════════════════════════════════")
-
-    # 포트 인자 파싱 (--port /dev/ttyS0)
-    port = DEFAULT_PORT
-    if argv:
-        for i, a in enumerate(argv):
-            if a == "--port" and i + 1 < len(argv):
-                port = argv[i + 1]
-
-    bs = None
+    global _assume_yes
+
+    argv = list(argv or [])
+    json_dest = _json_dest(argv)
+    # --json - : 결과 JSON만 stdout으로, 사람용 출력은 stderr로
+    out = sys.stderr if json_dest == "-" else sys.stdout
+    with contextlib.redirect_stdout(out):
+        opts = None
+        try:
+            opts = _parse_args(argv)
+            _check_opts(opts)
+        except _UsageError as e:
+            return _usage_exit(str(e), opts, json_dest)
+        _assume_yes = opts["yes"]
+
+        print("════════════════════════════════════════")
+        print("  Firmware Uploader — Headless Mode")
+        print("════════════════════════════════════════")
+
+        if opts["targets"]:
+            try:
+                return run_multi(opts["targets"], opts["bin"], json_dest=opts["json"],
+                                 metrics_dir=opts["metrics_dir"],
+                                 baud=opts["baud"], erase_mode=opts["erase_mode"],
+                                 skip_erased=opts["skip_erased"], delta=opts["delta"],
+                                 base_addr=opts["base_addr"],
+                                 erase_timeout_s=opts["erase_timeout_s"],
+                                 resume=opts["resume"], verify=opts["verify"])
+            except _UsageError as e:
+                return _usage_exit(str(e), opts, json_dest)
+
+        report = _RunReport(opts)
+        code = _run_steps(opts, report)
+        data = report.finish(code)
+    _write_json(opts["json"], data)
+    return code
+
+
+def _run_flash(bs: BootloaderSerial, opts: dict, report: _RunReport) -> int:
+    """3~4단계 (flash). 0 또는 실패한 단계 번호."""
+    bin_path = report.run(3, lambda: step3_get_bin_path(opts["bin"]))
+    if not bin_path:
+        return 3
+    report.data["bin"] = bin_path
+    backup = ""
+    if opts["backup"]:
+        # 디렉터리를 주면 그 안에 <포트>-<시각>.bin
+        backup = _expand_path(opts["backup"])
+        if os.path.isdir(backup):
+            backup = default_backup_path(opts["port"], backup)
     try:
-        if not step1_enter_bootloader():
+        if not report.run(4, lambda: step4_flash(
+                bs, bin_path, opts["base_addr"], opts["erase_timeout_s"],
+                opts["resume"], backup)):
+            return 4
+        return 0
+    finally:
+        report.data["flash"] = dict(bs.last_flash)
+        if backup:
+            report.data["backup"] = dict(bs.last_readout)
+        report.data["metrics"] = bs.metrics.to_dict()
+        _export_metrics(bs.metrics, opts["metrics_dir"])
+
+
+def _run_readout(bs: BootloaderSerial, opts: dict, report: _RunReport) -> int:
+    """3~4단계 (--readout). 0 또는 실패한 단계 번호."""
+    _step(3, 5, "출력 파일 확인")
+    path = report.run(3, lambda: _check_out_path(opts["readout"]))
+    if not path:
+        return 3
+    try:
+        if not report.run(4, lambda: step4_readout(
+                bs, path, opts["base_addr"], opts["read_size"], opts["resume"])):
+            return 4
+        return 0
+    finally:
+        report.data["readout"] = dict(bs.last_readout) or {"path": path}
+        report.data["metrics"] = bs.metrics.to_dict()
+        _export_metrics(bs.metrics, opts["metrics_dir"])
+
+
+def _run_steps(opts: dict, report: _RunReport) -> int:
+    """1~5단계 실행. 종료 코드 반환."""
+    # 고정 baud면 포트를 1단계 전에 만들어 두고 진입 직후 SYNC 한다.
+    # auto는 후보마다 리셋이 필요하므로 2단계의 협상에 맡긴다.
+    early = None
+    if opts["baud"] != BAUD_AUTO:
+        early = BootloaderSerial(port=opts["port"], baud=opts["baud"],
+                                 erase_mode=opts["erase_mode"],
+                                 skip_erased=opts["skip_erased"], delta=opts["delta"],
+                                 verify=opts["verify"])
+    bs = early
+    try:
+        if not report.run(1, lambda: step1_enter_bootloader(early)):
             return 1
-        bs = step2_connect(port)
+        bs = report.run(2, lambda: step2_connect(
+            opts["port"], opts["erase_mode"], opts["skip_erased"],
+            opts["delta"], opts["baud"], bs=early, verify=opts["verify"]))
         if bs is None:
             return 2
-        bin_path = step3_get_bin_path()
-        if not bin_path:
-            return 3
-        if not step4_flash(bs, bin_path):
-            return 4
+        report.data["baud"] = bs.baud
+        code = (_run_readout if opts["readout"] else _run_flash)(bs, opts, report)
+        if code:
+            return code
         # 시리얼 포트는 5단계 NRST 펄스 전에 닫는 게 안전
         bs.close()
         bs = None
-        if not step5_exit_bootloader():
+        if not report.run(5, step5_exit_bootloader):
             return 5
         print()
         print("════════════════════════════════════════")
@@ -1,11 +1,63 @@
 import sys
 
+EXIT_USAGE = 64   # 인자 오류 (headless_runner와 같은 sysexits EX_USAGE)
+
+GUI_USAGE = ("usage: main.py [--baud auto|N] [--verify off|fast|full] "
+             "[--metrics-dir DIR] [--verbose]\n"
+             "       main.py --headless ...   |   main.py --daemon ...")
+
 
 def _is_headless(argv):
     return any(a in ("--headless", "-H") for a in argv[1:])
 
 
+def _is_daemon(argv):
+    return "--daemon" in argv[1:]
+
+
+def _gui_baud(argv) -> int:
+    """GUI용 --baud auto|N. 없으면 기본 baud. 잘못된 값은 ValueError."""
+    from core.baud import DEFAULT_BAUD, parse_baud
+    for i, a in enumerate(argv[1:], 1):
+        if a == "--baud" and i + 1 < len(argv):
+            try:
+                return parse_baud(argv[i + 1])
+            except ValueError:
+                raise ValueError(f"잘못된 --baud 값: {argv[i + 1]}") from None
+    return DEFAULT_BAUD
+
+
+def _gui_metrics_dir(argv) -> str:
+    """GUI용 --metrics-dir <dir>. 없으면 "" (저장 안 함)."""
+    import os
+    for i, a in enumerate(argv[1:], 1):
+        if a == "--metrics-dir" and i + 1 < len(argv):
+            return os.path.expanduser(argv[i + 1])
+    return ""
+
+
+def _gui_verify(argv) -> str:
+    """GUI용 --verify off|fast|full (write 후 verify, core/verify.py). 기본 fast."""
+    from core.verify import VERIFY_FAST, VERIFY_MODES
+    for i, a in enumerate(argv[1:], 1):
+        if a == "--verify" and i + 1 < len(argv):
+            if argv[i + 1] not in VERIFY_MODES:
+                raise ValueError(f"잘못된 --verify 값: {argv[i + 1]}")
+            return argv[i + 1]
+    return VERIFY_FAST
+
+
+def _gui_verbose(argv) -> bool:
+    """GUI용 --verbose: 블록별 flash 로그도 stdout으로."""
+    return "--verbose" in argv[1:] or "-v" in argv[1:]
+
+
 def main():
+    if _is_daemon(sys.argv):
+        # 상주 flash 데몬 (Unix 소켓 작업 큐, flash_daemon.py). Qt는 부르지 않는다.
+        import flash_daemon
+        sys.exit(flash_daemon.main([a for a in sys.argv[1:] if a != "--daemon"]))
+
     if _is_headless(sys.argv):
         # GUI(Qt) 의존성을 부르지 않고 헤드리스 러너로 직행
         import headless_runner
@@ -13,11 +65,21 @@ def main():
         rest = [a for a in sys.argv[1:] if a not in ("--headless", "-H")]
         sys.exit(headless_runner.main(rest))
 
+    # Qt를 띄우기 전에 인자부터 (headless처럼 traceback 대신 사용법 + 64)
+    try:
+        baud = _gui_baud(sys.argv)
+        verify = _gui_verify(sys.argv)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        print(GUI_USAGE, file=sys.stderr)
+        sys.exit(EXIT_USAGE)
+
     from PySide6.QtWidgets import QApplication
     from uploader_window import UploaderWindow
 
     app = QApplication(sys.argv)
-    win = UploaderWindow()
+    win = UploaderWindow(baud=baud, metrics_dir=_gui_metrics_dir(sys.argv),
+                         verbose=_gui_verbose(sys.argv), verify=verify)
     win.show()
     sys.exit(app.exec())
 
@@ -0,0 +1,288 @@
+"""
+Firmware Uploader - Multi-target Runner
+
+한 호스트에 붙은 여러 캐리어보드를 동시에 flash 한다.
+타깃마다 자기 시리얼 포트와 GPIO 핀 맵(FW_UPDATE/BOOT0/NRST LED)을 가지며,
+스레드 풀에서 다음을 독립적으로 진행한다:
+  1) Bootloader 진입 → 2) Connect → 4) Flash → 5) Bootloader 종료
+(단계 번호는 headless 단일 모드와 같다. BIN은 미리 지정하므로 3단계는 없음.)
+
+시리얼 대기는 read/poll에서 GIL을 놓으므로 스레드로 충분하다.
+GPIO는 LED 경로별 락만 잡으므로 보드끼리 서로 막지 않는다.
+"""
+
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from core.baud import BAUD_AUTO, DEFAULT_BAUD
+from core.bootloader import FLASH_CANCELLED, Bootloader, Reporter
+from core.cancel import CancelToken, Cancelled
+from core.control_gpio import DEFAULT_PINS, PinMap
+from core.flash_layout import ERASE_AUTO
+from core.verify import VERIFY_FAST
+from headless_runner import (DEFAULT_BASE_ADDR, ERASE_TIMEOUT_S, BootloaderSerial,
+                             _fail, _info, _ok)
+
+
+class Target:
+    """포트 + 핀 맵. 스펙: 'PORT' 또는 'PORT:FW_UPDATE,BOOT0,NRST'."""
+
+    def __init__(self, port: str, pins: PinMap):
+        self.port = port
+        self.pins = pins
+
+    @classmethod
+    def parse(cls, spec: str) -> "Target":
+        port, sep, pin_spec = spec.partition(":")
+        if not port:
+            raise ValueError(f"empty port in target: {spec!r}")
+        if not port.startswith("/dev/"):
+            port = f"/dev/{port}"
+        return cls(port, PinMap.parse(pin_spec) if sep else DEFAULT_PINS)
+
+    @property
+    def name(self) -> str:
+        return os.path.basename(self.port)
+
+
+def check_targets(targets) -> None:
+    """포트/핀이 타깃끼리 겹치면 ValueError (같은 보드를 두 스레드가 건드리지 않게)."""
+    seen_ports = set()
+    seen_leds = {}
+    for t in targets:
+        if t.port in seen_ports:
+            raise ValueError(f"port used twice: {t.port}")
+        seen_ports.add(t.port)
+        for led in (t.pins.fw_update, t.pins.boot0, t.pins.nrst):
+            if led in seen_leds:
+                raise ValueError(f"GPIO {led} shared by {seen_leds[led]} and {t.port}")
+            seen_leds[led] = t.port
+
+
+class TargetResult:
+    def __init__(self, target: Target):
+        self.port = target.port
+        self.ok = False
+        self.step = 0          # 실패한 단계 (성공이면 0)
+        self.msg = ""
+        self.elapsed_s = 0.0
+        self.baud = 0
+        self.written_bytes = 0
+        self.verify = None     # last_flash["verify"] (core/verify.py)
+        self.metrics = None    # core/metrics.FlashMetrics (포트를 연 경우)
+
+    def to_dict(self) -> dict:
+        return {
+            "port": self.port, "ok": self.ok, "failed_step": self.step or None,
+            "msg": self.msg, "duration_s": round(self.elapsed_s, 3),
+            "baud": self.baud, "bytes_written": self.written_bytes, "verify": self.verify,
+            "metrics": self.metrics.to_dict() if self.metrics is not None else None,
+        }
+
+    def fail(self, step: int, msg: str) -> "TargetResult":
+        self.ok = False
+        self.step = step
+        self.msg = msg
+        return self
+
+
+# ---------------- 진행 표시 ----------------
+
+class MultiProgress:
+    """
+    타깃별 진행률을 상태 줄 하나로 모아 그린다 (최대 10Hz).
+    메시지 줄은 [포트] 접두어를 붙여 상태 줄 위로 출력한다.
+    """
+
+    MIN_INTERVAL_S = 0.1
+
+    def __init__(self, targets):
+        self._lock = threading.Lock()
+        self._state = {t.name: "대기" for t in targets}
+        self._last_draw = 0.0
+
+    def reporter(self, target: Target) -> "_TargetReporter":
+        return _TargetReporter(self, target.name)
+
+    def _draw(self, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self._last_draw < self.MIN_INTERVAL_S:
+            return
+        self._last_draw = now
+        line = " | ".join(f"{k} {v}" for k, v in self._state.items())
+        sys.stdout.write(f"\r\033[K  {line}")
+        sys.stdout.flush()
+
+    def message(self, name: str, text: str):
+        with self._lock:
+            sys.stdout.write(f"\r\033[K  [{name}] {text}\n")
+            self._draw(force=True)
+
+    def update(self, name: str, state: str, force: bool = False):
+        with self._lock:
+            self._state[name] = state
+            self._draw(force)
+
+    def close(self):
+        with self._lock:
+            self._draw(force=True)
+            sys.stdout.write("\n")
+            sys.stdout.flush()
+
+
+class _TargetReporter(Reporter):
+    """core/bootloader.Reporter 구현: 메시지는 [포트] 줄, 진행률은 상태 줄."""
+
+    def __init__(self, board: MultiProgress, name: str):
+        self._board = board
+        self._name = name
+
+    def info(self, msg: str):
+        self._board.message(self._name, f"• {msg}")
+
+    def ok(self, msg: str):
+        self._board.message(self._name, f"✓ {msg}")
+
+    def warn(self, msg: str):
+        self._board.message(self._name, f"! {msg}")
+
+    def progress(self, label: str, done: int, total: int):
+        pct = int(done * 100.0 / total) if total else 100
+        self._board.update(self._name, f"{label} {pct:3d}%", force=(done >= total))
+
+    def progress_end(self):
+        pass
+
+    def state(self, text: str):
+        self._board.update(self._name, text, force=True)
+
+
+# ---------------- 타깃 하나 ----------------
+
+def flash_target(target: Target, bin_path: str, rep: _TargetReporter, *,
+                 baud: int = DEFAULT_BAUD, erase_mode: str = ERASE_AUTO,
+                 skip_erased: bool = True, delta: bool = False,
+                 base_addr: int = DEFAULT_BASE_ADDR,
+                 erase_timeout_s: float = ERASE_TIMEOUT_S,
+                 resume: bool = False, verify: str = VERIFY_FAST,
+                 bs: Optional[Bootloader] = None,
+                 cancel: Optional[CancelToken] = None) -> TargetResult:
+    """
+    bs: 미리 만든 세션 (호출자가 flash 도중 bs.cancel() 할 수 있게, flash_daemon.py).
+        주면 위의 세션 옵션은 쓰지 않는다. 포트는 어느 경우든 여기서 닫는다.
+    cancel: 단계 사이에서 확인하는 작업 취소 토큰 (flash 전 단계용 — flash 도중은
+        bs.cancel()). 켜져 있으면 그 단계에서 FLASH_CANCELLED로 끝낸다. 마지막
+        확인 뒤에 온 bs.cancel()은 flash의 첫 취소 지점에서 걸린다.
+    """
+    res = TargetResult(target)
+    t0 = time.monotonic()
+    session = None
+    try:
+        if bs is None:
+            bs = BootloaderSerial(port=target.port, baud=baud or DEFAULT_BAUD,
+                                  erase_mode=erase_mode, skip_erased=skip_erased,
+                                  delta=delta, reporter=rep, verify=verify)
+        session = bs
+
+        # 고정 baud: 포트를 먼저 열고 NRST 해제 직후부터 SYNC (core/entry.py)
+        rep.state("Bootloader 진입")
+        synced = False
+        try:
+            if baud == BAUD_AUTO:
+                target.pins.enter_bootloader(log=rep.info)
+            else:
+                synced = bs.enter_and_sync(target.pins, log=rep.info)
+        except Exception as e:
+            return res.fail(1, f"GPIO 제어 실패: {e}")
+
+        if cancel is not None and cancel.cancelled:
+            return res.fail(2, FLASH_CANCELLED)
+        rep.state("Connect")
+        if not bs.open():
+            return res.fail(2, "시리얼 포트 열기 실패")
+        try:
+            if baud == BAUD_AUTO:
+                if not bs.negotiate_baud(reset=target.pins.bootloader_reset):
+                    return res.fail(2, "모든 baud 후보에서 응답 없음")
+            elif not synced and not bs.sync(window_s=5.0):
+                return res.fail(2, "SYNC 실패")
+        except Cancelled:   # SYNC 중 bs.cancel()
+            return res.fail(2, FLASH_CANCELLED)
+        res.baud = bs.baud
+
+        if cancel is not None and cancel.cancelled:
+            return res.fail(4, FLASH_CANCELLED)
+        rep.state("Flash")
+        ok, msg = bs.flash(bin_path, base_addr=base_addr, erase_timeout_s=erase_timeout_s,
+                           resume=resume)
+        bs.metrics.ok = ok
+        bs.metrics.baud = bs.baud
+        res.written_bytes = bs.last_flash.get("written_bytes", 0)
+        res.verify = bs.last_flash.get("verify")
+        if not ok:
+            return res.fail(4, msg)
+        bs.close()
+        bs = None
+
+        rep.state("Bootloader 종료")
+        try:
+            target.pins.exit_bootloader(log=rep.info)
+        except Exception as e:
+            return res.fail(5, f"GPIO 제어 실패: {e}")
+        res.ok = True
+        return res
+    finally:
+        if bs is not None:
+            bs.close()
+        # 세션은 flash마다 계측 객체를 새로 만든다 → 이번 실행 것을 끝에 가져온다
+        if session is not None:
+            res.metrics = session.metrics
+        res.elapsed_s = time.monotonic() - t0
+        rep.state("완료" if res.ok else f"실패({res.step})")
+
+
+# ---------------- 전체 ----------------
+
+def run(targets, bin_path: str, max_workers: int = 0, **flash_opts) -> list:
+    """targets를 동시에 flash 하고 TargetResult 목록(타깃 순서)을 반환."""
+    check_targets(targets)
+    board = MultiProgress(targets)
+    workers = max_workers or len(targets)
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="flash") as pool:
+            futures = [
+                pool.submit(flash_target, t, bin_path, board.reporter(t), **flash_opts)
+                for t in targets
+            ]
+            return [f.result() for f in futures]
+    finally:
+        board.close()
+
+
+def print_summary(results, total_s: float) -> None:
+    print()
+    print("════════════════════════════════════════")
+    print("  타깃별 결과")
+    print("════════════════════════════════════════")
+    total_bytes = 0
+    for r in results:
+        total_bytes += r.written_bytes
+        line = (f"{r.port:<14} {r.elapsed_s:6.1f}s  {r.written_bytes:>9,} B"
+                f"  @{r.baud or '-'}")
+        if r.ok:
+            _ok(line)
+        else:
+            _fail(f"{line}  [{r.step}단계] {r.msg}")
+    n_ok = sum(1 for r in results if r.ok)
+    _info(f"{n_ok}/{len(results)} 성공, 총 {total_bytes:,} bytes / {total_s:.1f}s "
+          f"({total_bytes / total_s / 1024 if total_s else 0:.1f} KB/s 합계)")
+
+
+def exit_code(results) -> int:
+    """모두 성공이면 0, 아니면 실패한 단계 중 가장 앞 단계 번호 (단일 모드와 같은 의미)."""
+    failed = [r.step for r in results if not r.ok]
+    return min(failed) if failed else 0
@@ -1,7 +1,142 @@
-from PySide6.QtUiTools import QUiLoader
-from PySide6.QtCore import QFile
+# ui_loader.py
+#
+# .ui → 위젯.
+#
+# 예전에는 실행마다 QUiLoader로 XML을 파싱했다. ARM 호스트에서는 QtUiTools
+# import + 파싱이 GUI 콜드 스타트의 눈에 띄는 몫이었고, 경로도 CWD 기준
+# ("../ui/...")이라 shell/ 밖에서 실행하면 깨졌다.
+#
+# 이제는 pyside6-uic로 .ui를 파이썬 모듈로 컴파일해 캐시에 두고 import 한다
+# ($XDG_CACHE_HOME 또는 ~/.cache + /firmware_uploader/ui/). 모듈의 .pyc는
+# 파이썬이 __pycache__에 알아서 남기므로 두 번째 실행부터는 import만 한다.
+#
+#   무효화   메타(<stem>_ui.json)의 mtime_ns/size가 .ui와 같으면 그대로 쓴다.
+#            다르면 SHA-256을 비교해 내용이 같으면 메타만 갱신, 다르면 재컴파일.
+#   폴백     uic가 없거나 컴파일/실행이 실패하면 QUiLoader (이때만 QtUiTools import).
+#
+# 컴파일된 폼의 위젯은 QUiLoader처럼 최상위 위젯의 속성으로도 붙여 준다
+# (self.ui.flash_btn 등 기존 접근 그대로).
+#
+# 설치 시 미리 만들어 두려면: python3 scripts/ui_loader.py
+import hashlib
+import importlib.util
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+from typing import List, Optional
+
+UI_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                       os.pardir, "ui", "firmware_uploader.ui")
+
+_TOP_CLASS = re.compile(rb'<widget\s+class="(\w+)"')
+
+
+def cache_dir() -> str:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "firmware_uploader", "ui")
+
+
+def _paths(ui_path: str):
+    stem = os.path.splitext(os.path.basename(ui_path))[0] + "_ui"
+    d = cache_dir()
+    return os.path.join(d, stem + ".py"), os.path.join(d, stem + ".json")
+
+
+def _uic_cmd() -> Optional[List[str]]:
+    """pyside6-uic (PATH) 또는 PySide6 패키지 안의 uic 바이너리."""
+    exe = shutil.which("pyside6-uic")
+    if exe:
+        return [exe]
+    try:
+        import PySide6
+    except ImportError:
+        return None
+    d = os.path.dirname(PySide6.__file__)
+    for cand in (os.path.join(d, "uic"), os.path.join(d, "Qt", "libexec", "uic")):
+        if os.access(cand, os.X_OK):
+            return [cand, "-g", "python"]
+    return None
+
+
+def _read_meta(meta_path: str) -> Optional[dict]:
+    try:
+        with open(meta_path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_meta(meta_path: str, meta: dict) -> None:
+    tmp = meta_path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp, meta_path)
+
+
+def compile_ui(ui_path: str = UI_PATH, force: bool = False) -> Optional[str]:
+    """
+    캐시 모듈이 최신이면 그 경로, 아니면 컴파일해서 경로. uic가 없거나
+    실패하면 None (호출자가 QUiLoader로 폴백).
+    """
+    ui_path = os.path.abspath(ui_path)
+    py_path, meta_path = _paths(ui_path)
+    st = os.stat(ui_path)
+    meta = None if force else _read_meta(meta_path)
+    if meta and os.path.isfile(py_path):
+        if meta.get("mtime_ns") == st.st_mtime_ns and meta.get("size") == st.st_size:
+            return py_path
+    with open(ui_path, "rb") as f:
+        raw = f.read()
+    digest = hashlib.sha256(raw).hexdigest()
+    m = _TOP_CLASS.search(raw)
+    fresh = {"ui_path": ui_path, "mtime_ns": st.st_mtime_ns, "size": st.st_size,
+             "sha256": digest, "top_class": m.group(1).decode() if m else "QWidget"}
+    try:
+        os.makedirs(os.path.dirname(py_path), exist_ok=True)
+        if meta and meta.get("sha256") == digest and os.path.isfile(py_path):
+            # touch/checkout으로 mtime만 바뀜 → 재컴파일 없이 메타만
+            _write_meta(meta_path, fresh)
+            return py_path
+        cmd = _uic_cmd()
+        if cmd is None:
+            return None
+        tmp = py_path + ".tmp"
+        r = subprocess.run(cmd + [ui_path, "-o", tmp], capture_output=True, text=True)
+        if r.returncode != 0 or not os.path.isfile(tmp):
+            print(f"[UI] uic failed: {(r.stderr or r.stdout).strip()}")
+            return None
+        os.replace(tmp, py_path)
+        _write_meta(meta_path, fresh)
+        print(f"[UI] compiled {os.path.basename(ui_path)} → {py_path}")
+        return py_path
+    except OSError as e:
+        print(f"[UI] cache unavailable: {e}")
+        return None
+
+
+def _load_compiled(py_path: str, top_class: str):
+    from PySide6 import QtWidgets
+    spec = importlib.util.spec_from_file_location("_firmware_uploader_ui", py_path)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    form_cls = next(v for k, v in vars(mod).items() if k.startswith("Ui_") and isinstance(v, type))
+    w = getattr(QtWidgets, top_class)()
+    form = form_cls()
+    form.setupUi(w)
+    # QUiLoader와 같이 objectName으로 접근할 수 있게
+    for name, obj in vars(form).items():
+        if not hasattr(w, name):
+            setattr(w, name, obj)
+    return w
+
+
+def _load_with_quiloader(path: str):
+    from PySide6.QtUiTools import QUiLoader
+    from PySide6.QtCore import QFile
 
-def load_ui(path: str):
     f = QFile(path)
     if not f.open(QFile.ReadOnly):
         raise RuntimeError(f"UI open failed: {path}")
@@ -13,3 +148,28 @@ def load_ui(path: str):
         return w
     finally:
         f.close()
+
+
+def load_ui(path: str = UI_PATH):
+    """컴파일된 캐시 모듈로 위젯 생성. 안 되면 QUiLoader."""
+    py_path = None
+    try:
+        py_path = compile_ui(path)
+    except OSError as e:
+        raise RuntimeError(f"UI open failed: {path} ({e})")
+    if py_path is not None:
+        meta = _read_meta(_paths(os.path.abspath(path))[1]) or {}
+        try:
+            return _load_compiled(py_path, meta.get("top_class", "QWidget"))
+        except Exception as e:
+            print(f"[UI] compiled form failed ({e}) → QUiLoader")
+    return _load_with_quiloader(path)
+
+
+if __name__ == "__main__":
+    # 설치 단계: 캐시 모듈을 미리 만든다
+    out = compile_ui(sys.argv[1] if len(sys.argv) > 1 else UI_PATH, force=True)
+    if out is None:
+        print("[UI] uic not available — GUI will use QUiLoader")
+        sys.exit(1)
+    print(out)
@@ -1,7 +1,13 @@
 from PySide6.QtWidgets import QWidget, QFileDialog, QMessageBox, QVBoxLayout, QApplication
+from PySide6.QtGui import QKeySequence, QShortcut
 from PySide6.QtCore import Slot, QTimer, QThread, Qt, Signal
 from ui_loader import load_ui
-from core.serial_communication import SerialWorker
+from core.serial_communication import FLASH_CANCELLED, SerialWorker
+from core.baud import BAUD_AUTO, DEFAULT_BAUD
+from core.image import IMAGE_EXTS, load_firmware
+from core.journal import FlashJournal
+from core.readout import default_backup_path, resumable as readout_resumable
+from core.verify import VERIFY_FAST
 import core.control_gpio as gpio
 import os
 
@@ -12,15 +18,33 @@ CMD_EXT_ERASE = b"\x44\xBB"
 CMD_WRITE     = b"\x31\xCE"
 BOOT_SYNC     = b"\x7F"
 
+# 창 닫기: 워커에 취소를 건 뒤 스레드 종료를 기다리는 한도. write 취소는 프레임
+# 하나, erase 취소는 재진입 + SYNC(core/entry.ENTRY_DEADLINE_S)까지 걸린다.
+CLOSE_WAIT_MS = 3000
+
 
 class UploaderWindow(QWidget):
     # 워커 슬롯 시그니처와 동일하게 정의
     request_cmd = Signal(bytes, int, float)
     request_flash_img = Signal(bytes, int, float)
+    request_resume_flash_img = Signal(bytes, int, float)
+    request_readout = Signal(bytes, int, int, bool)
+    request_negotiate = Signal()
+    request_enter_sync = Signal()
 
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, baud: int = DEFAULT_BAUD, metrics_dir: str = "",
+                 verbose: bool = False, verify: str = VERIFY_FAST):
         super().__init__(parent)
-        self.ui = load_ui("../ui/firmware_uploader.ui")
+        self.ui = load_ui()   # 캐시된 컴파일 모듈, 없으면 QUiLoader (ui_loader.py)
+
+        # BAUD_AUTO면 Connect 시 후보 baud 협상 (core/baud.py)
+        self._baud = baud
+        # 있으면 flash마다 계측 결과를 <포트>.json / <포트>.prom 으로 저장 (core/metrics.py)
+        self._metrics_dir = metrics_dir
+        # True면 워커의 블록별 진행 로그도 stdout으로 (기본은 버퍼에만, Ctrl+L로 저장)
+        self._verbose = verbose
+        # write 후 verify 모드 (core/verify.py). 결과는 워커 로그 / 실패 메시지로
+        self._verify = verify
 
         self.flash_percent = 0
         # 핀 상태는 캐시 기반. None = "아직 모름" (라인을 잡기 전).
@@ -29,6 +53,10 @@ class UploaderWindow(QWidget):
         self._boot0_pin_state = None
         self._request_connected = False
         self._selected_bin_path = ""
+        self._port_path = ""
+        self._last_flash_req = None   # (bin, base, erase_to): 실패 후 이어 쓰기용
+        self._flashing = False        # flash_img/readout 요청 ~ flash_done/readout_done 사이
+        self._last_readout_path = ""  # 실패 후 이어 읽기용
 
         layout = QVBoxLayout(self)
         layout.setContentsMargins(0, 0, 0, 0)
@@ -44,6 +72,7 @@ class UploaderWindow(QWidget):
 
         self._wire_signals(self.ui)
         self._refresh_gpio_label()
+        QShortcut(QKeySequence("Ctrl+L"), self, activated=self._on_save_log)
 
         # Serial
         self._serial_thread = QThread(self)
@@ -59,6 +88,10 @@ class UploaderWindow(QWidget):
         u.nrst_btn.clicked.connect(self._on_set_nrst_pin)
         if hasattr(u, "flash_btn"):
             u.flash_btn.clicked.connect(self._on_flash)
+        if hasattr(u, "cancel_btn"):
+            u.cancel_btn.clicked.connect(self._on_cancel_flash)
+        if hasattr(u, "readout_btn"):
+            u.readout_btn.clicked.connect(self._on_readout)
         # Enter/Exit Update Mode 버튼이 UI에 추가되면 자동 연결.
         if hasattr(u, "enter_update_btn"):
             u.enter_update_btn.clicked.connect(self._on_enter_update_mode)
@@ -77,18 +110,28 @@ class UploaderWindow(QWidget):
         # .BIN / .Bin 등이 숨겨질 수 있다. 대소문자 변형까지 모두 명시.
         fn, _ = QFileDialog.getOpenFileName(
             self, "프로그램 선택", "",
+            "Firmware (*.bin *.BIN *.Bin *.hex *.HEX *.elf *.ELF);;"
             "BIN files (*.bin *.BIN *.Bin);;"
-            "Binary/Hex (*.bin *.BIN *.hex *.HEX *.elf *.ELF);;"
+            "Intel HEX (*.hex *.HEX);;"
+            "ELF (*.elf *.ELF);;"
             "All Files (*)",
-            "BIN files (*.bin *.BIN *.Bin)",
+            "Firmware (*.bin *.BIN *.Bin *.hex *.HEX *.elf *.ELF)",
             options=QFileDialog.DontUseNativeDialog,
         )
         if not fn:
             return
 
-        if not fn.lower().endswith(".bin"):
-            QMessageBox.warning(self, "파일 형식 오류", "BIN(.bin) 파일을 선택해 주세요.")
+        if not fn.lower().endswith(IMAGE_EXTS):
+            QMessageBox.warning(self, "파일 형식 오류", "BIN/HEX/ELF 파일을 선택해 주세요.")
             return
+        # HEX/ELF는 여기서 한 번 파싱해 형식 오류를 flash 전에 알린다
+        if not fn.lower().endswith(".bin"):
+            try:
+                image = load_firmware(fn, 0x08000000)
+            except (ValueError, OSError) as e:
+                QMessageBox.warning(self, "파일 형식 오류", f"이미지를 읽을 수 없습니다:\n{e}")
+                return
+            print(f"[Browse] {image.describe()}")
 
         self._selected_bin_path = fn
         if hasattr(self.ui, "leFilePath"):
@@ -163,8 +206,8 @@ class UploaderWindow(QWidget):
     def _on_set_nrst_pin(self):
         """NRST 펄스(LOW→HIGH). 호출 후 NRST는 HIGH(non-reset)."""
         try:
-            gpio.nrst_pulse(low_ms=100)
-            print("[GPIO] NRST pulse (LOW 100ms → HIGH)")
+            width = gpio.nrst_pulse(low_ms=100)
+            print(f"[GPIO] NRST pulse (LOW 100ms → HIGH, measured {width:.3f}ms)")
         except Exception as e:
             self._show_gpio_error("NRST", e)
             return
@@ -181,6 +224,8 @@ class UploaderWindow(QWidget):
           2) BOOT_CTRL = HIGH  → BOOT0 = system memory bootloader
           3) NRST 펄스 (LOW → HIGH)
         """
+        if self._flashing:
+            return   # 실행 중인 워커/핀은 건드리지 않는다 (_set_flashing)
         ans = QMessageBox.question(
             self, "Enter Update Mode",
             "다음 시퀀스를 실행합니다:\n"
@@ -193,18 +238,27 @@ class UploaderWindow(QWidget):
         )
         if ans != QMessageBox.Yes:
             return
+        if self._baud != BAUD_AUTO:
+            # 포트를 리셋 전에 열고 NRST 해제 직후부터 SYNC → 결과는 Connect와 같이
+            # cmd_done으로 (core/entry.py). auto는 후보마다 리셋이 필요해 Connect에 맡긴다.
+            self._set_comm_status("Entering...")
+            port_path = self._normalize_port(self.ui.device_name_le.text())
+            if self._worker is None or port_path != self._port_path:
+                self._make_worker(port_path)
+            self.request_enter_sync.emit()
+            return
         try:
-            import time
-            gpio.power_hold_set(1); time.sleep(0.05)
-            gpio.boot0_set(1);      time.sleep(0.01)
-            gpio.nrst_pulse(low_ms=100)
-            time.sleep(0.05)
-            print("[UpdateMode] Entered")
+            seq = gpio.run_sequence("enter", gpio.enter_bootloader_steps(), log=print)
+            print(f"[UpdateMode] Entered ({seq.total_ms:.1f}ms)")
         except Exception as e:
             self._show_gpio_error("Enter Update Mode", e)
             return
         self._refresh_gpio_label()
 
+    @Slot(str)
+    def _on_worker_gpio_error(self, msg: str):
+        self._show_gpio_error("Enter Update Mode", msg)
+
     @Slot()
     def _on_exit_update_mode(self):
         """
@@ -213,6 +267,8 @@ class UploaderWindow(QWidget):
           2) NRST 펄스
           3) (대기 후) FW_UPDATE 라인을 high-Z로 release → MCU/풀업이 인계
         """
+        if self._flashing:
+            return   # 실행 중인 워커/핀은 건드리지 않는다 (_set_flashing)
         ans = QMessageBox.question(
             self, "Exit Update Mode",
             "다음 시퀀스를 실행합니다:\n"
@@ -227,12 +283,9 @@ class UploaderWindow(QWidget):
         if ans != QMessageBox.Yes:
             return
         try:
-            import time
-            gpio.boot0_set(0);      time.sleep(0.01)
-            gpio.nrst_pulse(low_ms=100)
-            time.sleep(0.5)
-            gpio.fw_update_release()
-            print("[UpdateMode] Exited")
+            seq = gpio.run_sequence(
+                "exit", gpio.exit_bootloader_steps(release_power=True), log=print)
+            print(f"[UpdateMode] Exited ({seq.total_ms:.1f}ms)")
         except Exception as e:
             self._show_gpio_error("Exit Update Mode", e)
             return
@@ -303,9 +356,11 @@ class UploaderWindow(QWidget):
         t = text.lower()
         if "fail" in t or "error" in t:
             lbl.setStyleSheet("color:#dc2626; font-weight:600;")        # red
+        elif "cancel" in t:
+            lbl.setStyleSheet("color:#ca8a04; font-weight:600;")        # amber
         elif "complete" in t or "done" in t or "ok" in t:
             lbl.setStyleSheet("color:#16a34a; font-weight:600;")        # green
-        elif "flash" in t:
+        elif "flash" in t or "read" in t:
             lbl.setStyleSheet("color:#2563eb; font-weight:600;")        # blue (in progress)
         else:
             lbl.setStyleSheet("color:#000000; font-weight:600;")
@@ -314,16 +369,31 @@ class UploaderWindow(QWidget):
 
     @Slot()
     def _on_connect(self):
+        if self._flashing:
+            return   # 실행 중인 워커/핀은 건드리지 않는다 (_set_flashing)
         dev_text = self.ui.device_name_le.text()
         port_path = self._normalize_port(dev_text)
         print(f"[Connect Button] Trying to open device: {port_path}")
         self._set_comm_status("Connecting...")
+        self._make_worker(port_path)
 
-        # 이전 연결 해제
+        if self._baud == BAUD_AUTO:
+            # 후보 baud 협상 (결과는 cmd_done + baud_selected)
+            self.request_negotiate.emit()
+        else:
+            # 부트로더 ACK 테스트
+            self.request_cmd.emit(BOOT_SYNC, 1, 2.0)
+
+    def _make_worker(self, port_path: str):
+        """이전 워커를 정리하고 port_path용 SerialWorker를 새로 연결한다."""
         if self._request_connected and self._worker is not None:
             try:
                 self.request_cmd.disconnect(self._worker.connect_and_send)
                 self.request_flash_img.disconnect(self._worker.flash_img)
+                self.request_resume_flash_img.disconnect(self._worker.resume_flash_img)
+                self.request_readout.disconnect(self._worker.readout)
+                self.request_negotiate.disconnect(self._worker.negotiate_baud)
+                self.request_enter_sync.disconnect(self._worker.enter_and_sync)
             except Exception:
                 pass
             self._request_connected = False
@@ -337,32 +407,53 @@ class UploaderWindow(QWidget):
                 self._worker.flash_done.disconnect(self._on_flash_done)
             except Exception:
                 pass
+            try:
+                self._worker.readout_done.disconnect(self._on_readout_done)
+            except Exception:
+                pass
             try:
                 self._worker.flash_prog.disconnect(self._on_flash_progress)
             except Exception:
                 pass
+            try:
+                self._worker.baud_selected.disconnect(self._on_baud_selected)
+            except Exception:
+                pass
+            try:
+                self._worker.gpio_error.disconnect(self._on_worker_gpio_error)
+            except Exception:
+                pass
             self._worker.deleteLater()
             self._worker = None
 
         if not self._serial_thread.isRunning():
             self._serial_thread.start()
 
-        self._worker = SerialWorker(port=port_path, baud=115200, timeout=0.2)
+        self._port_path = port_path
+        self._worker = SerialWorker(port=port_path, baud=self._baud or DEFAULT_BAUD, timeout=0.2,
+                                    metrics_dir=self._metrics_dir, verbose=self._verbose,
+                                    verify=self._verify)
         self._worker.flash_prog.connect(self._on_flash_progress)
+        self._worker.baud_selected.connect(self._on_baud_selected, Qt.QueuedConnection)
         self._worker.flash_done.connect(self._on_flash_done, Qt.QueuedConnection)
+        self._worker.readout_done.connect(self._on_readout_done, Qt.QueuedConnection)
+        self._worker.gpio_error.connect(self._on_worker_gpio_error, Qt.QueuedConnection)
         self._worker.moveToThread(self._serial_thread)
         self._worker.cmd_done.connect(self._on_cmd_done, Qt.QueuedConnection)
 
         self.request_cmd.connect(self._worker.connect_and_send, Qt.QueuedConnection)
         self.request_flash_img.connect(self._worker.flash_img, Qt.QueuedConnection)
+        self.request_resume_flash_img.connect(self._worker.resume_flash_img, Qt.QueuedConnection)
+        self.request_readout.connect(self._worker.readout, Qt.QueuedConnection)
+        self.request_negotiate.connect(self._worker.negotiate_baud, Qt.QueuedConnection)
+        self.request_enter_sync.connect(self._worker.enter_and_sync, Qt.QueuedConnection)
         self._request_connected = True
 
-        # 부트로더 ACK 테스트
-        self.request_cmd.emit(BOOT_SYNC, 1, 2.0)
-
     @Slot(bool, bytes)
     def _on_cmd_done(self, ok: bool, resp: bytes):
         print(f"[Serial Response] ok={ok}, resp={resp.hex() if resp else 'None'}")
+        # enter_and_sync는 워커 스레드에서 핀을 바꾼다
+        self._refresh_gpio_label()
 
         if ok and resp == CMD_ACK:
             self._set_comm_status("Connected")
@@ -373,6 +464,11 @@ class UploaderWindow(QWidget):
             # 무응답: 부트로더 모드가 아니거나 시리얼 미연결.
             self._set_comm_status("No response")
 
+    @Slot(int)
+    def _on_baud_selected(self, baud: int):
+        print(f"[Serial] baud negotiated: {baud}")
+        self._set_comm_status(f"Connected @ {baud}")
+
     def _normalize_port(self, dev_text: str) -> str:
         dev_text = (dev_text or "").strip()
         if dev_text.startswith("/dev/"):
@@ -395,33 +491,167 @@ class UploaderWindow(QWidget):
         self.ui.flash_progress_bar.setTextVisible(True)
         self.flash_percent = percent
 
+    @Slot()
+    def _on_save_log(self):
+        """Ctrl+L: 워커 로그 버퍼 전체(블록별 진행 포함)를 파일로 저장."""
+        if self._worker is None:
+            QMessageBox.information(self, "로그 저장", "아직 시리얼 로그가 없습니다.")
+            return
+        default = os.path.join(os.path.expanduser("~"),
+                               f"flash_{os.path.basename(self._port_path) or 'serial'}.log")
+        path, _ = QFileDialog.getSaveFileName(self, "로그 저장", default, "Log (*.log *.txt)")
+        if not path:
+            return
+        try:
+            n = self._worker.log.save(path)
+        except OSError as e:
+            QMessageBox.critical(self, "로그 저장", f"저장 실패: {e}")
+            return
+        print(f"[Log] {n} lines → {path}")
+
     @Slot(bool, str)
     def _on_flash_done(self, ok: bool, msg: str):
         """워커가 flash_img 종료 시 emit. ok=True면 완료, False면 실패."""
+        self._set_flashing(False)
+        if not ok and msg == FLASH_CANCELLED:
+            # 워커가 포트/타깃을 정해진 상태로 돌려놓았다 (erase 중이었으면 재진입)
+            self._set_flash_status("Flash Cancelled")
+            print("[Flash] Cancelled")
+            self._refresh_gpio_label()
+            return
         if ok:
             self._set_flash_status("Flash Complete")
             print("[Flash] Complete")
         else:
             self._set_flash_status(f"Flash Failed: {msg}" if msg else "Flash Failed")
-            print(f"[Flash] Failed: {msg}")
+            print(f"[Flash] Failed: {msg} (Ctrl+L: 블록별 전체 로그 저장)")
+            if self._last_flash_req and FlashJournal(self._port_path).resumable():
+                # 저널이 남았으면 erase 없이 마지막 ACK 다음 블록부터 이어 쓸 수 있다
+                ans = QMessageBox.question(
+                    self, "Flash 실패",
+                    f"{msg or '알 수 없는 오류'}\n\n케이블/연결을 확인한 뒤 이어서 쓰시겠습니까?\n"
+                    "(같은 보드일 때만 — 다른 보드면 No)",
+                    QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+                if ans == QMessageBox.Yes:
+                    self._start_flash(*self._last_flash_req, resume=True)
+                return
             QMessageBox.critical(self, "Flash 실패", msg or "알 수 없는 오류")
 
     @Slot()
     def _on_flash(self):
         bin_path = self._selected_bin_path or getattr(self.ui, "leFilePath", None).text().strip()
         if not bin_path or not os.path.isfile(bin_path):
-            QMessageBox.warning(self, "BIN 파일", "유효한 BIN 파일 경로를 선택하세요.")
+            QMessageBox.warning(self, "펌웨어 파일", "유효한 BIN/HEX/ELF 파일 경로를 선택하세요.")
             return
 
-        base_addr = 0x08000000
+        base_addr = 0x08000000   # BIN 전용. HEX/ELF는 파일의 절대 주소를 쓴다
         erase_timeout_s = 20.0
         print(f"[Flash Button] bin={bin_path}, base=0x{base_addr:08X}, erase_to={erase_timeout_s}s")
+        self._start_flash(bin_path, base_addr, erase_timeout_s)
+
+    def _start_flash(self, bin_path: str, base_addr: int, erase_timeout_s: float,
+                     resume: bool = False):
+        # 워커가 없으면 flash_done이 오지 않아 버튼이 잠긴 채로 남는다
+        if self._worker is None:
+            QMessageBox.warning(self, "Flash", "먼저 Connect 하세요.")
+            return
+        self._last_flash_req = (bin_path, base_addr, erase_timeout_s)
+        # 재개는 이미 일부 지워졌으므로 워커가 backup을 건너뛴다
+        backup = hasattr(self.ui, "backup_chk") and self.ui.backup_chk.isChecked()
+        try:
+            self._worker.backup_path = default_backup_path(self._port_path) \
+                if backup and not resume else ""
+        except OSError as e:
+            QMessageBox.critical(self, "Backup", f"backup 디렉터리를 만들 수 없습니다:\n{e}")
+            return
+        if self._worker.backup_path:
+            print(f"[Flash] backup → {self._worker.backup_path}")
+        self.flash_percent = 0
+        self.ui.flash_progress_bar.setValue(0)
+        self.ui.flash_progress_bar.setFormat("0%")
+        self._set_flash_status("Resuming..." if resume else "Flashing...")
+        self._set_flashing(True)
+
+        request = self.request_resume_flash_img if resume else self.request_flash_img
+        request.emit(bin_path.encode("utf-8"), base_addr, erase_timeout_s)
+
+    # ---------------- Readout ----------------
+
+    @Slot()
+    def _on_readout(self):
+        """Read 버튼: 플래시 전체를 파일로 (core/readout.py). Connect 후에만."""
+        if self._worker is None:
+            QMessageBox.warning(self, "Readout", "먼저 Connect 하세요.")
+            return
+        default = os.path.join(
+            os.path.expanduser("~"),
+            f"readout_{os.path.basename(self._port_path) or 'serial'}.bin")
+        path, _ = QFileDialog.getSaveFileName(self, "Readout 저장", default, "BIN (*.bin)")
+        if not path:
+            return
+        print(f"[Readout Button] out={path}")
+        self._start_readout(path)
+
+    def _start_readout(self, path: str, resume: bool = False):
+        self._last_readout_path = path
         self.flash_percent = 0
         self.ui.flash_progress_bar.setValue(0)
         self.ui.flash_progress_bar.setFormat("0%")
-        self._set_flash_status("Flashing...")
+        self._set_flash_status("Resuming read..." if resume else "Reading...")
+        self._set_flashing(True)
+        self.request_readout.emit(path.encode("utf-8"), 0x08000000, 0, resume)
+
+    @Slot(bool, str)
+    def _on_readout_done(self, ok: bool, msg: str):
+        self._set_flashing(False)
+        path = self._last_readout_path
+        if not ok and msg == FLASH_CANCELLED:
+            self._set_flash_status("Readout Cancelled")
+            print("[Readout] Cancelled")
+            return
+        if ok:
+            self._set_flash_status("Readout Complete")
+            print(f"[Readout] Complete → {path}")
+            return
+        self._set_flash_status(f"Readout Failed: {msg}" if msg else "Readout Failed")
+        print(f"[Readout] Failed: {msg} (Ctrl+L: 전체 로그 저장)")
+        if path and readout_resumable(path):
+            ans = QMessageBox.question(
+                self, "Readout 실패",
+                f"{msg or '알 수 없는 오류'}\n\n연결을 확인한 뒤 이어서 읽으시겠습니까?",
+                QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes)
+            if ans == QMessageBox.Yes:
+                self._start_readout(path, resume=True)
+            return
+        QMessageBox.critical(self, "Readout 실패", msg or "알 수 없는 오류")
+
+    def _set_flashing(self, on: bool):
+        """
+        flash/readout 중에는 워커를 바꾸거나(Connect/Enter) 핀을 건드리는(Enter/Exit,
+        수동 BOOT0/NRST/전원) 버튼도 잠근다 — 실행 중인 워커를 끊고 지우면 done이
+        오지 않고 포트가 둘 열린다.
+        """
+        self._flashing = on
+        for name in ("flash_btn", "readout_btn", "connect_btn", "enter_update_btn",
+                     "exit_update_btn", "boot0_btn", "nrst_btn", "power_hold_btn"):
+            if hasattr(self.ui, name):
+                getattr(self.ui, name).setEnabled(not on)
+        if hasattr(self.ui, "cancel_btn"):
+            self.ui.cancel_btn.setEnabled(on)
 
-        self.request_flash_img.emit(bin_path.encode("utf-8"), base_addr, erase_timeout_s)
+    @Slot()
+    def _on_cancel_flash(self):
+        """
+        워커 스레드는 flash 루프에 막혀 있어 큐 시그널이 닿지 않는다 →
+        토큰을 직접 켠다 (core/cancel.py). 결과는 flash_done/readout_done(FLASH_CANCELLED).
+        """
+        if not self._flashing or self._worker is None:
+            return
+        print("[Flash] Cancel requested")
+        self._worker.cancel()
+        self._set_flash_status("Cancelling...")
+        if hasattr(self.ui, "cancel_btn"):
+            self.ui.cancel_btn.setEnabled(False)
 
     def closeEvent(self, event):
         try:
@@ -433,18 +663,25 @@ class UploaderWindow(QWidget):
                 self._request_connected = False
 
             if self._worker:
+                # 진행 중인 flash를 멈춰야 스레드가 이벤트 루프로 돌아와 quit을 받는다
+                self._worker.cancel("window closed")
                 try:
                     self._worker.cmd_done.disconnect(self._on_cmd_done)
+                    self._worker.flash_done.disconnect(self._on_flash_done)
+                    self._worker.readout_done.disconnect(self._on_readout_done)
                 except Exception:
                     pass
-                self._worker.deleteLater()
-                self._worker = None
-
-            if self._worker and hasattr(self._worker, "close_port"):
-                self._worker.close_port()
 
             if self._serial_thread.isRunning():
                 self._serial_thread.quit()
-                self._serial_thread.wait(500)
+                if not self._serial_thread.wait(CLOSE_WAIT_MS):
+                    print(f"[Serial] worker did not stop within {CLOSE_WAIT_MS}ms")
+
+            if self._worker:
+                # 스레드가 멈췄으면 여기서 닫아도 경합이 없다
+                if not self._serial_thread.isRunning():
+                    self._worker.close_port()
+                self._worker.deleteLater()
+                self._worker = None
         finally:
             super().closeEvent(event)
@@ -7,4 +7,7 @@ sudo apt install python3-libgpiod -y
 sudo apt install -y \
   libxcb-cursor0 libxcb-icccm4 libxcb-image0 libxcb-keysyms1 \
   libxcb-render-util0 libxcb-xinerama0 libxcb-xinput0 libxkbcommon-x11-0 \
-  libegl1-mesa
\ No newline at end of file
+  libegl1-mesa
+
+# GUI .ui를 미리 파이썬 모듈로 컴파일 (첫 실행 시 QUiLoader 파싱 생략, scripts/ui_loader.py)
+python3 "$(dirname "$0")/../scripts/ui_loader.py" || true
@@ -8,5 +8,6 @@ sudo chmod a+w \
   /sys/class/leds/gpio0-a0/brightness
 
 # --headless 또는 -H 플래그가 있으면 TUI 모드로 진입.
+# --daemon 이면 Unix 소켓 작업 큐 데몬으로 상주 (chmod는 이때 한 번).
 # 그 외는 기존 GUI 모드.
 python3 ../scripts/main.py "$@"
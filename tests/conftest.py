@@ -0,0 +1,16 @@
+# tests/conftest.py
+#
+# scripts/ 를 import 경로에 넣고, 캐시/데이터 디렉터리(저널, plan 캐시, baud
+# 캐시, backup)를 테스트마다 임시 디렉터리로 돌린다.
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+
+
+@pytest.fixture(autouse=True)
+def _isolated_dirs(tmp_path, monkeypatch):
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "cache"))
+    monkeypatch.setenv("XDG_DATA_HOME", str(tmp_path / "data"))
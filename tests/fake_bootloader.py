@@ -0,0 +1,274 @@
+# tests/fake_bootloader.py
+#
+# 루프백 STM32 ROM 부트로더 (AN3155). Bootloader(transport=board.transport)로
+# 넘기면 실제 시리얼 대신 이 객체와 바이트를 주고받는다.
+#
+#   - 명령/주소/길이/데이터 프레임의 보수·XOR을 검사하고 틀리면 NACK
+#   - 첫 0x7F는 ACK(autobaud), 그 뒤 명령 대기 중의 0x7F는 모르는 명령 → NACK
+#   - Get / Get ID / Read Memory / Extended Erase / Write Memory / Get Checksum(0xA1)
+#   - 지우지 않은(0xFF가 아닌) 워드에 쓰면 NACK (실제 칩의 program 오류)
+#
+# fileno()가 없으므로 AckReader는 ser.read(1) 폴백 경로로 돈다.
+import collections
+
+ACK = 0x79
+NACK = 0x1F
+BASE = 0x08000000
+PAGE = 2048
+
+CRC_POLY = 0x04C11DB7
+
+
+def stm32_crc_ref(data, init: int = 0xFFFFFFFF, poly: int = CRC_POLY) -> int:
+    """STM32 CRC 유닛을 비트 단위로 (리틀엔디안 32비트 워드, 반사/최종 XOR 없음)."""
+    crc = init
+    for i in range(0, len(data), 4):
+        crc ^= int.from_bytes(data[i:i + 4], "little")
+        for _ in range(32):
+            crc = ((crc << 1) ^ poly if crc & 0x80000000 else crc << 1) & 0xFFFFFFFF
+    return crc
+
+
+def _xor(data) -> int:
+    x = 0
+    for b in data:
+        x ^= b
+    return x
+
+
+class FakeBoard:
+    """타깃 하나: 플래시 내용 + 실패 주입 + 관찰용 기록."""
+
+    def __init__(self, pid: int = 0x460, pages: int = 64, has_crc: bool = True,
+                 fill: int = 0x00):
+        self.pid = pid
+        self.flash = bytearray([fill]) * (PAGE * pages)
+        self.has_crc = has_crc
+        self.fail_writes = {}       # 주소 → 남은 NACK 횟수
+        self.corrupt = {}           # 주소 → write 때 대신 남을 값 (ACK는 정상)
+        self.erases = []            # "mass" 또는 페이지 목록
+        self.writes = []            # ACK 한 write 주소
+        self.reads = 0
+        self.crc_calls = 0
+        self.synced = False
+        self.ports = []
+
+    def transport(self, port: str, baud: int, timeout: float) -> "FakePort":
+        """Bootloader(transport=...) 훅."""
+        p = FakePort(self, port, baud, timeout)
+        self.ports.append(p)
+        return p
+
+
+class FakePort:
+    """pyserial Serial 흉내 + 부트로더 상태 기계."""
+
+    def __init__(self, board: FakeBoard, port: str, baud: int, timeout: float):
+        self.board = board
+        self.port = port
+        self.baudrate = baud
+        self.timeout = timeout
+        self.is_open = True
+        self._rx = collections.deque()
+        self._in = bytearray()
+        self._state = self._idle
+        self._ctx = {}
+
+    # ---------- Serial ----------
+    def fileno(self):
+        raise OSError("no fd")
+
+    def close(self):
+        self.is_open = False
+
+    def flush(self):
+        pass
+
+    def reset_input_buffer(self):
+        self._rx.clear()
+
+    def reset_output_buffer(self):
+        pass
+
+    @property
+    def in_waiting(self) -> int:
+        return len(self._rx)
+
+    def read(self, n: int = 1) -> bytes:
+        out = bytearray()
+        while self._rx and len(out) < n:
+            out.append(self._rx.popleft())
+        return bytes(out)
+
+    def readinto(self, view) -> int:
+        data = self.read(len(view))
+        view[:len(data)] = data
+        return len(data)
+
+    def write(self, data) -> int:
+        self._in += bytes(data)
+        while self._state():
+            pass
+        return len(data)
+
+    # ---------- 상태 기계 (진행했으면 True) ----------
+    def _send(self, *chunks) -> None:
+        for c in chunks:
+            self._rx.extend([c] if isinstance(c, int) else c)
+
+    def _take(self, n: int):
+        if len(self._in) < n:
+            return None
+        data = bytes(self._in[:n])
+        del self._in[:n]
+        return data
+
+    def _to(self, state) -> bool:
+        """ACK 후 다음 상태로."""
+        self._send(ACK)
+        self._state = state
+        return True
+
+    def _nack(self) -> bool:
+        self._send(NACK)
+        self._state = self._idle
+        return True
+
+    def _idle(self) -> bool:
+        b = self.board
+        if not self._in:
+            return False
+        if self._in[0] == 0x7F:
+            self._take(1)
+            self._send(NACK if b.synced else ACK)
+            b.synced = True
+            return True
+        cmd = self._take(2)
+        if cmd is None:
+            return False
+        if cmd[0] ^ cmd[1] != 0xFF:
+            return self._nack()
+        c = cmd[0]
+        if c == 0x00:
+            cmds = bytes([0x00, 0x01, 0x02, 0x11, 0x31, 0x44]) + (b"\xA1" if b.has_crc else b"")
+            self._send(ACK, [len(cmds)], [0x31], cmds, ACK)
+        elif c == 0x02:
+            self._send(ACK, [1], b.pid.to_bytes(2, "big"), ACK)
+        elif c == 0x11:
+            return self._to(self._read_addr)
+        elif c == 0x31:
+            return self._to(self._write_addr)
+        elif c == 0x44:
+            return self._to(self._erase)
+        elif c == 0xA1 and b.has_crc:
+            self._ctx["args"] = []
+            return self._to(self._crc_args)
+        else:
+            self._send(NACK)
+        return True
+
+    def _addr_frame(self):
+        a = self._take(5)
+        if a is None:
+            return None
+        if _xor(a[:4]) != a[4]:
+            self._nack()
+            return False
+        return int.from_bytes(a[:4], "big")
+
+    def _read_addr(self) -> bool:
+        addr = self._addr_frame()
+        if addr is None:
+            return False
+        if addr is False:
+            return True
+        self._ctx["addr"] = addr
+        return self._to(self._read_len)
+
+    def _read_len(self) -> bool:
+        c = self._take(2)
+        if c is None:
+            return False
+        if c[0] ^ c[1] != 0xFF:
+            return self._nack()
+        off = self._ctx["addr"] - BASE
+        self.board.reads += 1
+        self._send(ACK, self.board.flash[off:off + c[0] + 1])
+        self._state = self._idle
+        return True
+
+    def _write_addr(self) -> bool:
+        addr = self._addr_frame()
+        if addr is None:
+            return False
+        if addr is False:
+            return True
+        self._ctx["addr"] = addr
+        return self._to(self._write_data)
+
+    def _write_data(self) -> bool:
+        if not self._in:
+            return False
+        n = self._in[0] + 1
+        frame = self._take(n + 2)
+        if frame is None:
+            return False
+        b, addr = self.board, self._ctx["addr"]
+        data = frame[1:1 + n]
+        if _xor(frame[:-1]) != frame[-1]:
+            return self._nack()
+        if b.fail_writes.get(addr, 0) > 0:
+            b.fail_writes[addr] -= 1
+            return self._nack()
+        off = addr - BASE
+        if any(x != 0xFF for x in b.flash[off:off + n]):
+            return self._nack()
+        b.flash[off:off + n] = data
+        for a, v in b.corrupt.items():
+            if addr <= a < addr + n:
+                b.flash[a - BASE] = v
+        b.writes.append(addr)
+        return self._to(self._idle)
+
+    def _erase(self) -> bool:
+        if len(self._in) < 2:
+            return False
+        count = int.from_bytes(self._in[:2], "big")
+        b = self.board
+        if count == 0xFFFF:
+            frame = self._take(3)
+            if frame is None:
+                return False
+            if frame != b"\xFF\xFF\x00":
+                return self._nack()
+            b.flash[:] = b"\xFF" * len(b.flash)
+            b.erases.append("mass")
+            return self._to(self._idle)
+        frame = self._take(2 + 2 * (count + 1) + 1)
+        if frame is None:
+            return False
+        if _xor(frame[:-1]) != frame[-1]:
+            return self._nack()
+        pages = [int.from_bytes(frame[2 + 2 * i:4 + 2 * i], "big") for i in range(count + 1)]
+        for p in pages:
+            b.flash[p * PAGE:(p + 1) * PAGE] = b"\xFF" * PAGE
+        b.erases.append(pages)
+        return self._to(self._idle)
+
+    def _crc_args(self) -> bool:
+        v = self._addr_frame()
+        if v is None:
+            return False
+        if v is False:
+            return True
+        args = self._ctx["args"]
+        args.append(v)
+        self._send(ACK)
+        if len(args) == 4:
+            addr, size, poly, init = args
+            off = addr - BASE
+            self.board.crc_calls += 1
+            r = stm32_crc_ref(self.board.flash[off:off + size], init, poly).to_bytes(4, "big")
+            self._send(r, [_xor(r)])
+            self._state = self._idle
+        return True
@@ -0,0 +1,50 @@
+import threading
+
+import pytest
+
+from core.baud import (BAUD_AUTO, BAUD_CANDIDATES, cached_baud, candidate_order, negotiate,
+                       parse_baud, remember_baud)
+
+
+def test_parse_baud():
+    assert parse_baud(" Auto ") == BAUD_AUTO
+    assert parse_baud("921600") == 921600
+    for bad in ("0", "-9600", "fast"):
+        with pytest.raises(ValueError):
+            parse_baud(bad)
+
+
+def test_cached_baud_goes_first():
+    assert candidate_order("/dev/ttyX") == list(BAUD_CANDIDATES)
+    remember_baud("/dev/ttyX", 230400)
+    assert cached_baud("/dev/ttyX") == 230400
+    assert candidate_order("/dev/ttyX")[0] == 230400
+
+
+def test_negotiate_resets_between_candidates_and_remembers():
+    tried, resets = [], []
+
+    def try_rate(baud):
+        tried.append(baud)
+        return baud == 230400
+
+    assert negotiate("/dev/ttyY", try_rate, reset=lambda: resets.append(1)) == 230400
+    assert tried == [921600, 460800, 230400]
+    assert len(resets) == 2
+    assert cached_baud("/dev/ttyY") == 230400
+
+
+def test_negotiate_without_reset_tries_only_first():
+    tried = []
+    assert negotiate("/dev/ttyZ", lambda b: tried.append(b) or False) is None
+    assert tried == [BAUD_CANDIDATES[0]]
+
+
+def test_concurrent_remember_keeps_every_port():
+    ports = [f"/dev/ttyUSB{i}" for i in range(16)]
+    threads = [threading.Thread(target=remember_baud, args=(p, 460800)) for p in ports]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert all(cached_baud(p) == 460800 for p in ports)
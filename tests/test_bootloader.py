@@ -0,0 +1,173 @@
+import os
+import random
+
+import pytest
+
+from core.bootloader import FLASH_CANCELLED, Bootloader, Reporter
+from core.verify import VERIFY_FAST, VERIFY_FULL
+
+from fake_bootloader import BASE, PAGE, FakeBoard
+
+PORT = "/dev/ttyFAKE"
+
+
+class _Log(Reporter):
+    def __init__(self):
+        self.lines = []
+
+    def info(self, msg):
+        self.lines.append(msg)
+
+    def ok(self, msg):
+        self.lines.append(msg)
+
+    def warn(self, msg):
+        self.lines.append("WARN " + msg)
+
+
+def _image(tmp_path, pages: float = 5, seed: int = 1, name: str = "fw.bin") -> str:
+    rnd = random.Random(seed)
+    data = bytearray(rnd.getrandbits(8) for _ in range(int(pages * PAGE)))
+    data[PAGE:PAGE + 512] = b"\xFF" * 512        # 생략되는 블록
+    path = tmp_path / name
+    path.write_bytes(bytes(data))
+    return str(path)
+
+
+def _session(board, **kw):
+    log = _Log()
+    bl = Bootloader(PORT, transport=board.transport, reporter=log, **kw)
+    assert bl.open() and bl.sync(1.0)
+    return bl, log
+
+
+def _on_target(board, path) -> bool:
+    data = open(path, "rb").read()
+    return bytes(board.flash[:len(data)]) == data
+
+
+def test_flash_erases_only_image_sectors_and_verifies_by_crc(tmp_path):
+    board = FakeBoard()
+    path = _image(tmp_path)
+    bl, _log = _session(board)
+    assert bl.flash(path) == (True, "")
+    assert _on_target(board, path)
+    assert board.erases == [[0, 1, 2, 3, 4]]
+    assert board.flash[5 * PAGE] == 0x00                  # 이미지 밖은 안 지움
+    v = bl.last_flash["verify"]
+    assert v["mode"] == VERIFY_FAST and v["ok"] and v["read_bytes"] == 0
+    assert board.crc_calls > 0
+    assert BASE + PAGE not in board.writes                # 0xFF 블록 생략
+
+
+def test_fast_verify_without_get_checksum_falls_back_to_full(tmp_path):
+    board = FakeBoard(has_crc=False)
+    path = _image(tmp_path)
+    bl, log = _session(board)
+    assert bl.flash(path) == (True, "")
+    v = bl.last_flash["verify"]
+    assert v["mode"] == "full (0xA1 unsupported)"
+    assert v["read_bytes"] == os.path.getsize(path)
+    assert any(line.startswith("WARN Verify:") and "0xA1" in line for line in log.lines)
+
+
+def test_full_verify_reports_mismatch(tmp_path):
+    board = FakeBoard()
+    path = _image(tmp_path)
+    bl, _log = _session(board, verify=VERIFY_FULL)
+    board.corrupt[BASE + 3 * PAGE + 7] = 0x00
+    ok, msg = bl.flash(path)
+    assert not ok and msg.startswith("verify failed")
+    assert bl.last_flash["verify"]["mismatches"] == [f"0x{BASE + 3 * PAGE:08X}"]
+
+
+def test_delta_rewrites_only_changed_sectors(tmp_path):
+    board = FakeBoard()
+    path = _image(tmp_path)
+    bl, _log = _session(board)
+    assert bl.flash(path) == (True, "")
+
+    data = bytearray(open(path, "rb").read())
+    data[3 * PAGE + 100] ^= 0xFF
+    new = tmp_path / "fw2.bin"
+    new.write_bytes(bytes(data))
+    board.erases.clear()
+    board.writes.clear()
+    bl2, log = _session(board, delta=True)
+    assert bl2.flash(str(new)) == (True, "")
+    assert board.erases == [[3]]
+    assert all(BASE + 3 * PAGE <= a < BASE + 4 * PAGE for a in board.writes)
+    assert _on_target(board, str(new))
+    assert any("1/5 sectors differ" in line for line in log.lines)
+
+
+def test_backup_dumps_erased_range_before_erase(tmp_path):
+    board = FakeBoard()
+    old = bytes(random.Random(9).getrandbits(8) for _ in range(len(board.flash)))
+    board.flash[:] = old
+    path = _image(tmp_path, pages=2.5)
+    backup = tmp_path / "backup.bin"
+    bl, _log = _session(board)
+    assert bl.flash(path, backup=str(backup)) == (True, "")
+    assert backup.read_bytes() == old[:3 * PAGE]          # 지워진 섹터 0..2
+    assert bl.last_flash["backup"] == str(backup)
+    assert not os.path.exists(str(backup) + ".part.json")
+
+
+def test_resume_continues_after_failed_block(tmp_path):
+    board = FakeBoard()
+    path = _image(tmp_path)
+    bad = BASE + 3 * PAGE + 256
+    board.fail_writes[bad] = 2                            # 첫 시도 + 재시도 모두 NACK
+    bl, _log = _session(board)
+    ok, msg = bl.flash(path)
+    assert not ok and f"0x{bad:08X}" in msg
+    assert bl.last_flash["resumable"]
+
+    board.erases.clear()
+    board.writes.clear()
+    assert bl.sync(1.0)
+    assert bl.flash(path, resume=True) == (True, "")
+    assert bl.last_flash["resumed"]
+    assert board.erases == []                             # erase는 저널대로 생략
+    assert board.writes[0] == bad
+    assert _on_target(board, path)
+
+    # 끝까지 쓰면 저널이 지워져 다음 resume은 처음부터
+    board.erases.clear()
+    assert bl.flash(path, resume=True) == (True, "")
+    assert not bl.last_flash["resumed"]
+    assert board.erases == [[0, 1, 2, 3, 4]]
+
+
+def test_metrics_are_fresh_for_each_flash(tmp_path):
+    board = FakeBoard()
+    path = _image(tmp_path)
+    bl, _log = _session(board)
+    assert bl.flash(path) == (True, "")
+    first = bl.metrics
+    assert bl.sync(1.0)
+    assert bl.flash(path) == (True, "")
+    assert bl.metrics is not first
+    assert bl.metrics.written_bytes == first.written_bytes
+    assert bl.metrics.phases["write"] > 0
+
+
+def test_cancel_before_flash_is_not_lost(tmp_path):
+    board = FakeBoard()
+    path = _image(tmp_path)
+    bl, _log = _session(board)
+    bl.cancel("stop")
+    assert bl.flash(path) == (False, FLASH_CANCELLED)
+    assert board.erases == []
+    assert not bl.cancel_token.cancelled
+    assert bl.flash(path) == (True, "")
+
+
+@pytest.mark.parametrize("pipelined", [False, True])
+def test_pipelined_and_plain_frames_write_the_same_image(tmp_path, pipelined):
+    board = FakeBoard()
+    path = _image(tmp_path, pages=3)
+    bl, _log = _session(board, pipelined=pipelined)
+    assert bl.flash(path) == (True, "")
+    assert _on_target(board, path)
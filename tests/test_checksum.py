@@ -0,0 +1,87 @@
+import random
+from functools import reduce
+
+import pytest
+
+from core.checksum import lane_xor, xor_reduce
+from core.frame_engine import WriteFrameEngine, build_frame_table
+from core.write_plan import plan_segments, plan_writes
+
+
+def _xor(data) -> int:
+    return reduce(lambda a, b: a ^ b, data, 0)
+
+
+def _image(n: int, seed: int = 1) -> bytes:
+    rnd = random.Random(seed)
+    # 0xFF 구간을 섞어 trim/생략 블록이 생기게
+    out = bytearray()
+    while len(out) < n:
+        k = rnd.randint(1, 300)
+        out += b"\xFF" * k if rnd.random() < 0.3 else bytes(rnd.getrandbits(8) for _ in range(k))
+    return bytes(out[:n])
+
+
+@pytest.mark.parametrize("n", [0, 1, 2, 3, 7, 8, 255, 256, 1000])
+def test_xor_reduce_matches_naive(n):
+    data = _image(n, n)
+    assert xor_reduce(data) == _xor(data)
+    assert xor_reduce(memoryview(data)) == _xor(data)
+
+
+@pytest.mark.parametrize("lane", [1, 2, 4, 16, 256])
+def test_lane_xor_matches_naive(lane):
+    data = _image(1000, lane)
+    expect = bytes(_xor(data[i:i + lane]) for i in range(0, len(data), lane))
+    assert lane_xor(data, lane) == expect
+
+
+def test_lane_xor_edge_cases():
+    assert lane_xor(b"", 256) == b""
+    for lane in (0, 3, 12):
+        with pytest.raises(ValueError):
+            lane_xor(b"\x00", lane)
+
+
+def _naive_table(fw, plan):
+    addr_frames, lens, csums = bytearray(), bytearray(), bytearray()
+    for addr, off, length in plan.blocks:
+        ab = addr.to_bytes(4, "big")
+        addr_frames += ab + bytes([_xor(ab)])
+        lens.append(length - 1)
+        csums.append((length - 1) ^ _xor(fw[off:off + length]))
+    return bytes(addr_frames), bytes(lens), bytes(csums)
+
+
+@pytest.mark.parametrize("chunk", [256, 128, 252])
+def test_build_frame_table_matches_naive(chunk):
+    fw = _image(5000, chunk)
+    plan = plan_writes(fw, 0x08000000, chunk)
+    assert plan.skipped_frames or plan.write_bytes < len(fw)   # trim 경로가 실제로 돈다
+    table = build_frame_table(fw, plan)
+    assert len(table) == len(plan.blocks)
+    assert (table.addr_frames, table.lens, table.csums) == _naive_table(fw, plan)
+
+
+def test_build_frame_table_segments_with_unaligned_offsets():
+    fw = _image(1500, 7)
+    plan = plan_segments(fw, [(0x08000000, 0, 300), (0x08004000, 300, 1200)])
+    table = build_frame_table(fw, plan)
+    assert (table.addr_frames, table.lens, table.csums) == _naive_table(fw, plan)
+
+
+class _NullSer:
+    def write(self, data):
+        return len(data)
+
+
+def test_prepared_frame_equals_computed_frame():
+    fw = _image(2048, 3)
+    plan = plan_writes(fw, 0x08000000)
+    table = build_frame_table(fw, plan)
+    a = WriteFrameEngine(_NullSer(), lambda t: True)
+    b = WriteFrameEngine(_NullSer(), lambda t: True)
+    for i, (addr, off, length) in enumerate(plan.blocks):
+        n = a.load(addr, fw[off:off + length])
+        b.load_prepared(table, i, fw[off:off + length])
+        assert a._buf[:9 + n] == b._buf[:9 + n]
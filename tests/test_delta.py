@@ -0,0 +1,59 @@
+import pytest
+
+from core.delta import plan_delta
+from core.flash_layout import layout_for_pid
+
+BASE = 0x08000000
+G0 = layout_for_pid(0x460)     # 2 KB 페이지
+
+
+def _reader(flash: bytes, log=None):
+    def read_fn(addr, n):
+        if log is not None:
+            log.append((addr, n))
+        off = addr - BASE
+        return flash[off:off + n]
+    return read_fn
+
+
+def test_identical_image_is_clean():
+    fw = bytes(range(256)) * 16          # 4 KB = 2 섹터
+    plan = plan_delta(fw, BASE, G0, _reader(fw))
+    assert plan.clean
+    assert plan.sectors == [0, 1]
+    assert plan.read_bytes == len(fw)
+
+
+def test_changed_sector_is_dirty_and_rest_of_it_not_read():
+    fw = bytes(range(256)) * 16
+    flash = bytearray(fw)
+    flash[2048 + 10] ^= 0xFF             # 섹터 1 첫 프레임
+    log = []
+    plan = plan_delta(fw, BASE, G0, _reader(bytes(flash), log))
+    assert plan.dirty == [1]
+    assert plan.dirty_spans() == [(BASE + 2048, 2048)]
+    assert [a for a, _n in log if a >= BASE + 2048] == [BASE + 2048]
+    assert plan.read_bytes == 2048 + 256
+
+
+def test_write_block_across_sector_boundary_marks_both():
+    # 세그먼트가 섹터 경계에서 128B 어긋나 write 블록이 섹터 0/1에 걸친다
+    seg = [(BASE + 2048 - 128, 0, 512)]
+    fw = b"\x5A" * 512
+    flash = bytearray(b"\xFF" * 4096)
+    flash[2048 - 128:2048 + 384] = fw
+    flash[2048 + 300] = 0                # 섹터 1만 다름
+    plan = plan_delta(fw, BASE, G0, _reader(bytes(flash)), segments=seg)
+    assert plan.dirty == [0, 1]
+
+
+def test_read_failure_raises():
+    with pytest.raises(RuntimeError):
+        plan_delta(b"\x00" * 512, BASE, G0, lambda a, n: None)
+
+
+def test_progress_reaches_total():
+    fw = b"\x00" * 4096
+    seen = []
+    plan_delta(fw, BASE, G0, _reader(fw), progress=lambda d, t: seen.append((d, t)))
+    assert seen[-1] == (4096, 4096)
@@ -0,0 +1,51 @@
+from core.ack_reader import AckReader
+from core.entry import resync
+
+from fake_bootloader import FakeBoard
+
+COMMANDS = bytes([0x00, 0x01, 0x02, 0x11, 0x31, 0x44, 0xA1])
+
+
+def _port(pending: bytes = b""):
+    board = FakeBoard()
+    board.synced = True
+    port = board.transport("/dev/ttyFAKE", 115200, 0.2)
+    port.write(pending)
+    return port
+
+
+def test_resync_returns_command_list():
+    port = _port()
+    assert resync(port, AckReader(port)) == COMMANDS
+
+
+def test_resync_recovers_from_a_byte_held_by_the_bootloader():
+    # 앞선 바이트 하나가 명령 첫 바이트로 먹혀 부트로더가 보수 바이트를 기다리는 상태
+    port = _port(b"\x00")
+    assert resync(port, AckReader(port)) == COMMANDS
+    assert port.in_waiting == 0
+
+
+class _Mute:
+    timeout = 0.2
+    is_open = True
+
+    def fileno(self):
+        raise OSError("no fd")
+
+    def write(self, data):
+        return len(data)
+
+    def read(self, n=1):
+        return b""
+
+    def flush(self):
+        pass
+
+    def reset_input_buffer(self):
+        pass
+
+
+def test_resync_gives_up_without_response():
+    port = _Mute()
+    assert resync(port, AckReader(port), tries=2) is None
@@ -0,0 +1,83 @@
+import os
+import threading
+
+import pytest
+
+from core.cancel import CancelToken
+from flash_daemon import FlashDaemon
+
+
+def _open_fds() -> int:
+    return len(os.listdir("/proc/self/fd"))
+
+
+@pytest.fixture
+def daemon():
+    d = FlashDaemon()
+    yield d
+    d.close(wait_s=5.0)
+
+
+@pytest.fixture
+def spec(tmp_path):
+    leds = []
+    for name in ("fw_update", "boot0", "nrst"):
+        d = tmp_path / "leds" / name
+        d.mkdir(parents=True)
+        (d / "brightness").write_text("0")
+        leds.append(str(d))
+    # 없는 tty: 진입 시퀀스는 돌고 포트 열기에서 실패하는 작업
+    return "ttyFAKE-daemon:" + ",".join(leds)
+
+
+@pytest.fixture
+def image(tmp_path):
+    path = tmp_path / "fw.bin"
+    path.write_bytes(bytes(range(256)) * 8)
+    return str(path)
+
+
+def _flash(daemon, spec, image, **extra):
+    events = list(daemon.handle({"op": "flash", "target": spec, "image": image, **extra}))
+    assert events[0]["event"] == "queued"
+    assert events[-1]["event"] == "done"
+    return events
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="needs /proc")
+def test_jobs_do_not_leak_fds(daemon, spec, image):
+    _flash(daemon, spec, image)              # 포트 스레드 / GPIO fd 준비
+    before = _open_fds()
+    for _ in range(20):
+        done = _flash(daemon, spec, image)[-1]
+        assert not done["ok"] and done["result"]["failed_step"] == 2
+    assert _open_fds() == before
+    assert daemon.counts["failed"] == 21
+
+
+def test_cancel_of_finished_job_is_rejected(daemon, spec, image):
+    done = _flash(daemon, spec, image, tag="unit-1")[-1]
+    assert done["tag"] == "unit-1"
+    assert list(daemon.handle({"op": "cancel", "job": done["job"]})) == [
+        {"event": "cancel", "job": done["job"], "ok": False}]
+
+
+def test_bad_requests_are_errors(daemon, image):
+    for msg in ({"op": "flash", "target": "ttyX"},
+                {"op": "flash", "target": "ttyX", "image": "relative.bin"},
+                {"op": "flash", "target": "ttyX", "image": image, "opts": {"turbo": 1}},
+                {"op": "cancel", "job": "7"},
+                {"op": "reboot"}):
+        (ev,) = daemon.handle(msg)
+        assert ev["event"] == "error"
+
+
+def test_cancel_token_close_races_with_cancel():
+    # close()와 다른 스레드의 cancel()이 겹쳐도 닫힌 fd에 쓰지 않는다
+    for _ in range(200):
+        token = CancelToken()
+        t = threading.Thread(target=token.cancel, args=("client",))
+        t.start()
+        token.close()
+        t.join()
+        assert token.cancelled and token.fileno() is None
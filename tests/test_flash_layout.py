@@ -0,0 +1,103 @@
+import pytest
+
+from core.flash_layout import (ERASE_AUTO, ERASE_MASS, ERASE_SECTOR, EXT_ERASE_MAX_PAGES,
+                               MASS_ERASE_PAYLOAD, ErasePlan, ext_erase_payload,
+                               layout_for_pid, plan_erase, plan_erase_spans)
+
+G0 = 0x460     # 2 KB x 64
+F4 = 0x413     # 16K x4, 64K, 128K x7
+
+
+def test_ext_erase_payload_single_page():
+    # N-1 = 0, page 5, XOR(00 00 00 05) = 05
+    assert ext_erase_payload([5]) == b"\x00\x00\x00\x05\x05"
+
+
+def test_ext_erase_payload_checksum_covers_count_and_pages():
+    p = ext_erase_payload([0x0102, 0x0304])
+    assert p[:2] == b"\x00\x01"
+    assert p[2:6] == b"\x01\x02\x03\x04"
+    x = 0
+    for b in p[:-1]:
+        x ^= b
+    assert p[-1] == x
+
+
+def test_ext_erase_payload_rejects_empty():
+    with pytest.raises(ValueError):
+        ext_erase_payload([])
+
+
+def test_sectors_for_range_uniform_pages():
+    layout = layout_for_pid(G0)
+    assert layout.sectors_for_range(0x08000000, 1) == [0]
+    assert layout.sectors_for_range(0x08000000, 2048) == [0]
+    assert layout.sectors_for_range(0x08000000, 2049) == [0, 1]
+    assert layout.sectors_for_range(0x080007FF, 2) == [0, 1]
+    assert layout.sectors_for_range(0x08000000, 0) == []
+
+
+def test_sectors_for_range_mixed_sizes():
+    layout = layout_for_pid(F4)
+    assert layout.sectors_for_range(0x08000000, 40 * 1024) == [0, 1, 2]
+    assert layout.sectors_for_range(0x08010000, 1) == [4]       # 64 KB 섹터
+    assert layout.sectors_for_range(0x08020000, 1) == [5]       # 첫 128 KB 섹터
+    assert layout.end == 0x08100000
+
+
+def test_sector_index_out_of_range():
+    with pytest.raises(ValueError):
+        layout_for_pid(G0).sector_index(0x08000000 + 128 * 1024)
+
+
+def test_plan_erase_auto_known_pid_is_sector_erase():
+    plan = plan_erase(G0, 0x08000000, 5000)
+    assert not plan.mass
+    assert plan.pages == [0, 1, 2]
+    assert plan.erase_bytes == 3 * 2048
+    assert list(plan.payloads()) == [ext_erase_payload([0, 1, 2])]
+
+
+def test_plan_erase_auto_unknown_pid_falls_back_to_mass():
+    for pid in (None, 0x999):
+        plan = plan_erase(pid, 0x08000000, 5000, ERASE_AUTO)
+        assert plan.mass
+        assert list(plan.payloads()) == [MASS_ERASE_PAYLOAD]
+
+
+def test_plan_erase_sector_mode_needs_layout():
+    with pytest.raises(ValueError):
+        plan_erase(None, 0x08000000, 5000, ERASE_SECTOR)
+
+
+def test_plan_erase_mass_mode_ignores_pid():
+    assert plan_erase(G0, 0x08000000, 5000, ERASE_MASS).mass
+
+
+def test_plan_erase_outside_flash():
+    with pytest.raises(ValueError):
+        plan_erase(G0, 0x08000000 + 127 * 1024, 4096)
+
+
+def test_plan_erase_spans_only_touched_sectors():
+    plan = plan_erase_spans(G0, [(0x08000000, 100), (0x08008000, 100)])
+    assert plan.pages == [0, 16]
+    assert "0,16" in plan.describe()
+
+
+def test_plan_erase_spans_merges_overlapping_spans():
+    plan = plan_erase_spans(G0, [(0x08000000, 3000), (0x08000800, 3000)])
+    assert plan.pages == [0, 1, 2]
+
+
+def test_payloads_split_into_batches():
+    plan = ErasePlan(layout_for_pid(0x415), range(EXT_ERASE_MAX_PAGES * 2 + 1))
+    payloads = list(plan.payloads())
+    assert len(payloads) == 3
+    assert payloads[0] == ext_erase_payload(range(EXT_ERASE_MAX_PAGES))
+    assert payloads[2] == ext_erase_payload([EXT_ERASE_MAX_PAGES * 2])
+
+
+def test_unknown_erase_mode():
+    with pytest.raises(ValueError):
+        plan_erase_spans(G0, [(0x08000000, 1)], "chip")
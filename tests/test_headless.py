@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+import headless_runner
+from headless_runner import EXIT_USAGE, main
+
+
+def _run(tmp_path, *args):
+    out = tmp_path / "result.json"
+    code = main([*args, "--json", str(out)])
+    return code, json.loads(out.read_text())
+
+
+@pytest.mark.parametrize("args", [
+    ["--bogus"],
+    ["--base-addr", "0x100000000"],
+    ["--base-addr", "-1"],
+    ["--verify", "paranoid"],
+    ["--baud", "fast"],
+    ["--yes"],
+    ["--bin", "-"],
+    ["--resume", "--delta", "--bin", "fw.bin", "--yes"],
+    ["--read-size", "0x100"],
+])
+def test_usage_error_writes_json_report(tmp_path, args):
+    code, data = _run(tmp_path, *args)
+    assert code == EXIT_USAGE
+    assert data["ok"] is False
+    assert data["exit_code"] == EXIT_USAGE
+    assert data["failed_step"] is None
+    assert data["error"]
+    assert all(st["status"] == "not_run" for st in data["steps"])
+
+
+def test_multi_target_usage_error_writes_json_report(tmp_path):
+    code, data = _run(tmp_path, "--target", "ttyUSB0:a,b,c", "--target", "ttyUSB0:d,e,f",
+                      "--bin", "fw.bin", "--yes")
+    assert code == EXIT_USAGE
+    assert "port used twice" in data["error"]
+
+
+def test_yes_with_bin_passes_option_checks():
+    opts = headless_runner._parse_args(["--yes", "--bin", "fw.bin", "--base-addr", "0x08004000"])
+    headless_runner._check_opts(opts)
+    assert opts["base_addr"] == 0x08004000
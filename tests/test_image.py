@@ -0,0 +1,134 @@
+import struct
+
+import pytest
+
+from core.image import (FirmwareImage, Segment, image_format, load_firmware, parse_elf,
+                        parse_hex)
+from core.write_plan import WRITE_CHUNK, plan_segments
+
+
+def _rec(rtype: int, off: int, payload: bytes = b"") -> str:
+    body = bytes([len(payload), off >> 8, off & 0xFF, rtype]) + payload
+    return ":" + (body + bytes([-sum(body) & 0xFF])).hex().upper()
+
+
+def _hex(*records) -> str:
+    return "\n".join(records + (_rec(0x01, 0),)) + "\n"
+
+
+# ---------------- Intel HEX ----------------
+
+def test_hex_merges_consecutive_records_and_splits_gaps():
+    text = _hex(_rec(0x04, 0, b"\x08\x00"),
+                _rec(0x00, 0x0000, b"\x01" * 16),
+                _rec(0x00, 0x0010, b"\x02" * 16),
+                _rec(0x00, 0x8000, b"\x03" * 4),
+                _rec(0x05, 0, b"\x08\x00\x01\x01"))
+    segs = parse_hex(text)
+    assert segs == [Segment(0x08000000, b"\x01" * 16 + b"\x02" * 16),
+                    Segment(0x08008000, b"\x03" * 4)]
+
+
+def test_hex_extended_segment_address():
+    segs = parse_hex(_hex(_rec(0x02, 0, b"\x10\x00"), _rec(0x00, 0x0004, b"\xAA")))
+    assert segs == [Segment(0x10004, b"\xAA")]
+
+
+@pytest.mark.parametrize("line, why", [
+    (":0100000001FF", "checksum"),
+    ("0100000001FE", "':'"),
+    (":01000000", "length"),
+    (_rec(0x06, 0, b"\x00"), "record type"),
+])
+def test_hex_rejects_malformed_lines(line, why):
+    with pytest.raises(ValueError, match=why):
+        parse_hex(line)
+
+
+def test_hex_rejects_duplicate_address():
+    with pytest.raises(ValueError, match="duplicate"):
+        parse_hex(_hex(_rec(0x00, 0, b"\x01"), _rec(0x00, 0x10, b"\x02"), _rec(0x00, 0, b"\x03")))
+
+
+# ---------------- ELF ----------------
+
+def _elf32(phdrs, payload: bytes, enc: str = "<") -> bytes:
+    """phdrs: (type, offset-in-payload, vaddr, paddr, filesz)."""
+    phoff = 0x34
+    data_off = phoff + 32 * len(phdrs)
+    head = bytearray(0x34)
+    head[:6] = b"\x7fELF" + bytes([1, 1 if enc == "<" else 2])
+    struct.pack_into(enc + "I", head, 0x1C, phoff)
+    struct.pack_into(enc + "HH", head, 0x2A, 32, len(phdrs))
+    ph = b"".join(struct.pack(enc + "8I", t, data_off + o, v, p, n, n, 5, 4)
+                  for t, o, v, p, n in phdrs)
+    return bytes(head) + ph + payload
+
+
+def _elf64(phdrs, payload: bytes, enc: str = ">") -> bytes:
+    phoff = 0x40
+    data_off = phoff + 56 * len(phdrs)
+    head = bytearray(0x40)
+    head[:6] = b"\x7fELF" + bytes([2, 1 if enc == "<" else 2])
+    struct.pack_into(enc + "Q", head, 0x20, phoff)
+    struct.pack_into(enc + "HH", head, 0x36, 56, len(phdrs))
+    ph = b"".join(struct.pack(enc + "IIQQQQQQ", t, 5, data_off + o, v, p, n, n, 4)
+                  for t, o, v, p, n in phdrs)
+    return bytes(head) + ph + payload
+
+
+def test_elf32_uses_load_address_and_skips_bss():
+    payload = b"\x11" * 64 + b"\x22" * 8
+    blob = _elf32([(1, 0, 0x08000000, 0x08000000, 64),
+                   (1, 64, 0x20000000, 0x08000040, 8),     # .data: VMA=RAM, LMA=플래시
+                   (1, 0, 0x20000100, 0x20000100, 0),      # .bss
+                   (4, 0, 0, 0, 8)], payload)              # PT_NOTE
+    assert parse_elf(blob) == [Segment(0x08000000, b"\x11" * 64),
+                               Segment(0x08000040, b"\x22" * 8)]
+
+
+def test_elf64_big_endian():
+    blob = _elf64([(1, 0, 0x08001000, 0x08001000, 4)], b"\xDE\xAD\xBE\xEF")
+    assert parse_elf(blob) == [Segment(0x08001000, b"\xDE\xAD\xBE\xEF")]
+
+
+def test_elf_rejects_bad_input():
+    with pytest.raises(ValueError):
+        parse_elf(b"\x7fELF" + bytes(8))
+    with pytest.raises(ValueError, match="past end"):
+        parse_elf(_elf32([(1, 0, 0, 0x08000000, 64)], b"\x00" * 8))
+
+
+# ---------------- FirmwareImage ----------------
+
+def test_image_pads_to_words_and_merges_touching_segments():
+    img = FirmwareImage([Segment(0x08000006, b"\x01\x02"), Segment(0x08000000, b"\xAA" * 5)])
+    assert img.segments == [Segment(0x08000000, b"\xAA" * 5 + b"\xFF\x01\x02")]
+
+
+def test_image_layout_puts_segments_on_chunk_boundaries():
+    img = FirmwareImage([Segment(0x08000000, b"\x01" * 10), Segment(0x08010000, b"\x02" * 8)])
+    assert img.layout() == [(0x08000000, 0, 12), (0x08010000, WRITE_CHUNK, 8)]
+    assert img.spans() == [(0x08000000, 12), (0x08010000, 8)]
+    assert img.data[10:WRITE_CHUNK] == b"\xFF" * (WRITE_CHUNK - 10)
+    plan = plan_segments(img.data, img.layout())
+    assert [(b.addr, b.length) for b in plan.blocks] == [(0x08000000, 12), (0x08010000, 8)]
+
+
+def test_image_rejects_overlap_and_empty():
+    with pytest.raises(ValueError, match="overlapping"):
+        FirmwareImage([Segment(0x08000000, b"\x00" * 8), Segment(0x08000004, b"\x00")])
+    with pytest.raises(ValueError):
+        FirmwareImage([])
+
+
+def test_load_firmware_by_extension(tmp_path):
+    (tmp_path / "fw.bin").write_bytes(b"\x01\x02\x03\x04" * 4)
+    (tmp_path / "fw.hex").write_text(_hex(_rec(0x04, 0, b"\x08\x00"),
+                                          _rec(0x00, 0x100, b"\x05" * 4)))
+    (tmp_path / "fw.elf").write_bytes(_elf32([(1, 0, 0, 0x08000200, 4)], b"\x06" * 4))
+    assert load_firmware(str(tmp_path / "fw.bin"), 0x08004000).layout() == [(0x08004000, 0, 16)]
+    assert load_firmware(str(tmp_path / "fw.hex"), 0).spans() == [(0x08000100, 4)]
+    assert load_firmware(str(tmp_path / "fw.elf"), 0).spans() == [(0x08000200, 4)]
+    with pytest.raises(ValueError):
+        image_format("fw.s19")
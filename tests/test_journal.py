@@ -0,0 +1,64 @@
+from core.journal import FlashJournal
+
+KEY = bytes(range(32))
+PID = 0x460
+
+
+def _journal():
+    j = FlashJournal("/dev/ttyUSB0")
+    j.begin(KEY, PID, [0, 1, 2, 3])
+    return j
+
+
+def test_nothing_to_resume_without_journal():
+    j = FlashJournal("/dev/ttyUSB0")
+    assert not j.resumable()
+    assert j.resume_point(KEY, PID) is None
+
+
+def test_resume_mid_erase_restarts_write():
+    j = _journal()
+    j.erased([0, 1])
+    rp = FlashJournal("/dev/ttyUSB0").resume_point(KEY, PID)
+    assert not rp.erase_done
+    assert rp.erased == [0, 1]
+    assert rp.next_block == 0
+
+
+def test_resume_after_interrupted_write():
+    j = _journal()
+    j.erased([0, 1, 2, 3])
+    j.erase_complete()
+    j.writing()
+    j.interrupted(17, 0x08001000)
+    j2 = FlashJournal("/dev/ttyUSB0")
+    assert j2.resumable()
+    rp = j2.resume_point(KEY, PID)
+    assert rp.erase_done
+    assert rp.next_block == 17
+    assert rp.last_acked == 0x08001000
+
+
+def test_killed_while_writing_is_not_resumed():
+    j = _journal()
+    j.erase_complete()
+    j.writing()
+    assert FlashJournal("/dev/ttyUSB0").resume_point(KEY, PID) is None
+
+
+def test_other_image_or_chip_is_not_resumed():
+    j = _journal()
+    j.erase_complete()
+    j.interrupted(3, None)
+    assert j.resume_point(bytes(32), PID) is None
+    assert j.resume_point(KEY, 0x413) is None
+
+
+def test_mass_erase_and_clear():
+    j = FlashJournal("/dev/ttyUSB1")
+    j.begin(KEY, None, None)
+    assert j.load()["erase"] == "mass"
+    assert j.resume_point(KEY, None).erased == []
+    j.clear()
+    assert j.load() is None
+    assert FlashJournal("/dev/ttyUSB0").load() is None     # 포트별 파일
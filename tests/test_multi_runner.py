@@ -0,0 +1,49 @@
+import pytest
+
+from core.control_gpio import DEFAULT_PINS
+from multi_runner import Target, TargetResult, check_targets, exit_code
+
+
+def test_parse_bare_port_uses_default_pins():
+    t = Target.parse("ttyUSB0")
+    assert t.port == "/dev/ttyUSB0"
+    assert t.name == "ttyUSB0"
+    assert t.pins is DEFAULT_PINS
+
+
+def test_parse_keeps_absolute_port_and_pin_map():
+    t = Target.parse("/dev/ttyS3:led-a,led-b,/sys/class/leds/led-c")
+    assert t.port == "/dev/ttyS3"
+    assert t.pins.fw_update == "/sys/class/leds/led-a"
+    assert t.pins.boot0 == "/sys/class/leds/led-b"
+    assert t.pins.nrst == "/sys/class/leds/led-c"
+
+
+@pytest.mark.parametrize("spec", [":a,b,c", "ttyUSB0:a,b", "ttyUSB0:a,,c", "ttyUSB0:"])
+def test_parse_rejects_bad_specs(spec):
+    with pytest.raises(ValueError):
+        Target.parse(spec)
+
+
+def test_check_targets_accepts_disjoint_boards():
+    check_targets([Target.parse("ttyUSB0:a0,b0,n0"), Target.parse("ttyUSB1:a1,b1,n1")])
+
+
+def test_check_targets_rejects_duplicate_port():
+    with pytest.raises(ValueError, match="port used twice"):
+        check_targets([Target.parse("ttyUSB0:a0,b0,n0"), Target.parse("/dev/ttyUSB0:a1,b1,n1")])
+
+
+def test_check_targets_rejects_shared_gpio():
+    with pytest.raises(ValueError, match="shared"):
+        check_targets([Target.parse("ttyUSB0:a0,b0,n0"), Target.parse("ttyUSB1:a1,b1,n0")])
+
+
+def test_exit_code_is_earliest_failed_step():
+    results = [TargetResult(Target.parse(f"ttyUSB{i}:a{i},b{i},n{i}")) for i in range(3)]
+    results[0].ok = True
+    assert exit_code(results[:1]) == 0
+    results[1].fail(4, "write")
+    results[2].fail(2, "sync")
+    assert exit_code(results) == 2
+    assert results[1].to_dict()["failed_step"] == 4
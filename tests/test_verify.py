@@ -0,0 +1,136 @@
+import random
+
+import pytest
+
+from core.flash_layout import layout_for_pid
+from core.readout import ReadoutError
+from core.verify import (MAX_REPORT, VERIFY_FAST, VERIFY_FULL, VerifyResult, _spans,
+                         stm32_crc, verify)
+
+from fake_bootloader import stm32_crc_ref
+
+BASE = 0x08000000
+G0 = layout_for_pid(0x460)
+
+
+def _data(n: int, seed: int = 1) -> bytes:
+    rnd = random.Random(seed)
+    return bytes(rnd.getrandbits(8) for _ in range(n))
+
+
+@pytest.mark.parametrize("n", [0, 4, 8, 64, 2048])
+def test_stm32_crc_matches_bitwise_reference(n):
+    data = _data(n, n)
+    assert stm32_crc(data) == stm32_crc_ref(data)
+
+
+def test_stm32_crc_known_value():
+    # 워드 0x00000000 하나: CRC 유닛 초기값 0xFFFFFFFF에서 32비트 시프트
+    assert stm32_crc(b"\x00\x00\x00\x00") == 0xC704DD7B
+
+
+def test_spans_split_on_sector_boundaries():
+    segs = [(BASE + 1024, 0, 3072)]
+    assert list(_spans(segs, G0)) == [(BASE + 1024, 0, 1024), (BASE + 2048, 1024, 2048)]
+    assert list(_spans([(0x20000000, 0, 4096)], None)) == [
+        (0x20000000, 0, 2048), (0x20000800, 2048, 2048)]
+
+
+class _Engine:
+    """ReadFrameEngine 대역: target 버퍼에서 읽는다."""
+
+    def __init__(self, target: bytearray, fail_at=None):
+        self.target = target
+        self.fail_at = fail_at
+        self.reads = 0
+        self.last_error = ""
+
+    def read_retry(self, addr, out, retries=0, on_retry=None):
+        if addr == self.fail_at:
+            self.last_error = "len timeout"
+            return False
+        self.reads += 1
+        off = addr - BASE
+        out[:] = self.target[off:off + len(out)]
+        return True
+
+
+def _crc_fn(target, calls=None, bias=0):
+    def crc_fn(addr, size):
+        if calls is not None:
+            calls.append((addr, size))
+        off = addr - BASE
+        return stm32_crc_ref(target[off:off + size]) ^ bias
+    return crc_fn
+
+
+def test_full_verify_reads_everything():
+    fw = _data(5000)
+    eng = _Engine(bytearray(fw))
+    res = verify(eng, fw, [(BASE, 0, len(fw))], VERIFY_FULL)
+    assert res.ok and res.read_bytes == len(fw) and res.checked_bytes == len(fw)
+    assert res.mode == VERIFY_FULL
+
+
+def test_fast_verify_uses_crc_per_sector():
+    fw = _data(3 * 2048)
+    target = bytearray(fw)
+    calls = []
+    res = verify(_Engine(target), fw, [(BASE, 0, len(fw))], VERIFY_FAST, layout=G0,
+                 crc_fn=_crc_fn(target, calls))
+    assert res.ok and res.read_bytes == 0 and res.crc_sectors == 3
+    assert calls == [(BASE, 2048), (BASE + 2048, 2048), (BASE + 4096, 2048)]
+
+
+def test_fast_verify_reads_back_only_the_bad_sector():
+    fw = _data(3 * 2048)
+    target = bytearray(fw)
+    target[2048 + 300] ^= 0x40
+    res = verify(_Engine(target), fw, [(BASE, 0, len(fw))], VERIFY_FAST, layout=G0,
+                 crc_fn=_crc_fn(target))
+    assert not res.ok
+    assert res.mismatches == [BASE + 2048 + 256]
+    assert res.crc_sectors == 2 and res.read_bytes == 2048
+    assert "1 frames differ" in res.describe()
+
+
+def test_fast_verify_stops_trusting_a_wrong_crc():
+    fw = _data(3 * 2048)
+    target = bytearray(fw)
+    calls = []
+    res = verify(_Engine(target), fw, [(BASE, 0, len(fw))], VERIFY_FAST, layout=G0,
+                 crc_fn=_crc_fn(target, calls, bias=1))
+    assert res.ok and res.read_bytes == len(fw)
+    assert len(calls) == 1
+
+
+def test_fast_verify_without_crc_reads_back():
+    fw = _data(4096)
+    res = verify(_Engine(bytearray(fw)), fw, [(BASE, 0, len(fw))], VERIFY_FAST, layout=G0,
+                 crc_fn=lambda a, n: None)
+    assert res.ok and res.read_bytes == len(fw) and res.crc_sectors == 0
+
+
+def test_mismatch_report_is_capped():
+    fw = _data(64 * 256)
+    target = bytearray(b"\x00" * len(fw))
+    eng = _Engine(target)
+    res = verify(eng, fw, [(BASE, 0, len(fw))], VERIFY_FULL)
+    assert len(res.mismatches) == MAX_REPORT
+    assert eng.reads == MAX_REPORT
+    assert res.describe().startswith(f"{MAX_REPORT}+ frames differ")
+
+
+def test_read_failure_raises_with_progress():
+    fw = _data(2048)
+    with pytest.raises(ReadoutError) as e:
+        verify(_Engine(bytearray(fw), fail_at=BASE + 512), fw, [(BASE, 0, len(fw))],
+               VERIFY_FULL)
+    assert e.value.done == 512
+
+
+def test_result_dict_and_unknown_mode():
+    res = VerifyResult("full (0xA1 unsupported)", True, 8, 8, 0, [], 0.01)
+    assert res.to_dict()["mode"] == "full (0xA1 unsupported)"
+    with pytest.raises(ValueError):
+        verify(_Engine(bytearray(4)), b"\x00" * 4, [(BASE, 0, 4)], "off")
@@ -0,0 +1,56 @@
+import pytest
+
+from core.write_plan import WRITE_CHUNK, plan_segments, plan_writes, trim_erased
+
+
+def test_trim_erased_all_ff_is_skipped():
+    assert trim_erased(b"\xFF" * 256) == 0
+    assert trim_erased(b"") == 0
+
+
+def test_trim_erased_rounds_up_to_word():
+    assert trim_erased(b"\x01" + b"\xFF" * 255) == 4
+    assert trim_erased(b"\x01" * 5 + b"\xFF" * 11) == 8
+    assert trim_erased(b"\x00" * 256) == 256
+
+
+def test_trim_erased_never_exceeds_block():
+    assert trim_erased(b"\x01\x02\x03\x04\x05\xFF") == 6
+
+
+def test_plan_writes_skips_erased_frames():
+    fw = b"\x01" * 256 + b"\xFF" * 256 + b"\x02" * 10 + b"\xFF" * 246
+    plan = plan_writes(fw, 0x08000000)
+    assert [(b.addr, b.offset, b.length) for b in plan.blocks] == [
+        (0x08000000, 0, 256), (0x08000200, 512, 12)]
+    assert plan.total_frames == 3
+    assert plan.skipped_frames == 1
+    assert plan.write_bytes == 268
+    assert plan.skipped_bytes == len(fw) - 268
+
+
+def test_plan_writes_without_skip_sends_everything():
+    fw = b"\xFF" * 600
+    plan = plan_writes(fw, 0x08000000, skip_erased=False)
+    assert [b.length for b in plan.blocks] == [256, 256, 88]
+
+
+def test_plan_writes_rejects_bad_chunk():
+    for chunk in (0, 6, WRITE_CHUNK + 4):
+        with pytest.raises(ValueError):
+            plan_writes(b"\x00" * 16, 0x08000000, chunk)
+
+
+def test_plan_segments_maps_offsets_to_addresses():
+    fw = b"\x11" * 300 + b"\x22" * 100
+    plan = plan_segments(fw, [(0x08000000, 0, 300), (0x08010000, 300, 100)])
+    assert [(b.addr, b.offset, b.length) for b in plan.blocks] == [
+        (0x08000000, 0, 256), (0x08000100, 256, 44), (0x08010000, 300, 100)]
+    assert plan.image_bytes == 400
+
+
+def test_within_keeps_only_overlapping_blocks():
+    plan = plan_writes(b"\x00" * 1024, 0x08000000)
+    sub = plan.within([(0x08000100, 0x100)])
+    assert [b.addr for b in sub.blocks] == [0x08000100]
+    assert sub.skipped_frames == 3